@@ -0,0 +1,64 @@
+"""
+科研成果转化分析智能体 - 分析会话用量基准测试
+
+在模拟模式的分析服务上完整执行若干个分析会话（市场、专利、策略、总结四个阶段），
+测量每个会话的耗时，并检查每个完成的会话都带有非空的用量汇总、各阶段都有记录。
+
+运行方式：
+    python benchmarks/bench_analysis_usage.py [会话数]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api import routes
+from src.api.routes import AnalysisRequest, get_session_usage, perform_analysis, session_store
+
+STAGES = ("market", "patent", "strategy", "summary")
+
+
+def percentile(samples: list, ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def run_session(number: int) -> float:
+    session_id = f"bench-usage-{number}"
+    session_store[session_id] = {"status": "processing", "result": None}
+    request = AnalysisRequest(title=f"工业设备故障智能预测系统{number}", description="基于振动信号的剩余寿命预测",
+                              field="智能制造", maturity="中试", keywords="故障预测,深度学习")
+    routes.analysis_pending.inc()
+    started = time.perf_counter()
+    await perform_analysis(session_id, request)
+    return (time.perf_counter() - started) * 1000
+
+
+async def main_async(count: int) -> bool:
+    samples = [await run_session(number) for number in range(count)]
+    missing = []
+    for number in range(count):
+        usage = (await get_session_usage(f"bench-usage-{number}"))["usage"]
+        if not usage or any(stage not in usage["by_stage"] for stage in STAGES):
+            missing.append(number)
+
+    usage = (await get_session_usage("bench-usage-0"))["usage"]
+    print(f"会话数: {count}，每会话耗时 p50 {percentile(samples, 0.5):.2f}ms，p99 {percentile(samples, 0.99):.2f}ms")
+    print(f"单个会话用量: 调用{usage['calls']}次，提示{usage['prompt_tokens']} tokens，"
+          f"生成{usage['completion_tokens']} tokens")
+    print(f"用量非空且四个阶段齐全的会话: {count - len(missing)}/{count}")
+    return not missing
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    if not asyncio.run(main_async(count)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
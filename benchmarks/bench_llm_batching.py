@@ -0,0 +1,84 @@
+"""
+科研成果转化分析智能体 - 模型调用微批处理基准测试
+
+用模拟的豆包API（固定请求开销 + 按生成token计的耗时）比较逐条调用与
+微批处理在离线批量分析场景下的吞吐。模拟参数可按实际部署调整：
+    python benchmarks/bench_llm_batching.py [每次请求开销秒数] [每token生成秒数]
+"""
+
+import os
+import sys
+import time
+from unittest import mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.doubao_ai_service_impl import DoubaoAnalysisService
+from src.services.llm_batcher import split_batch_response
+
+ANSWER = "该成果具有较高的转化潜力，建议采取技术许可方式分阶段推进。"
+
+
+def make_fake_post(request_overhead: float, seconds_per_token: float):
+    """构建模拟的 requests.post：合并调用按任务数返回带编号的回答"""
+    def fake_post(url, headers=None, json=None):
+        prompt = json["messages"][-1]["content"]
+        count = max(1, len(split_batch_response(prompt, 1000)))
+        if count > 1:
+            content = "\n".join(f"### {index}\n{ANSWER}" for index in range(1, count + 1))
+        else:
+            content = ANSWER
+        completion_tokens = len(content)
+        time.sleep(request_overhead + completion_tokens * seconds_per_token)
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": len(prompt), "completion_tokens": completion_tokens},
+        }
+        return response
+    return fake_post
+
+
+def build_achievements(count: int) -> list:
+    return [
+        {"title": f"科研成果{index}", "field": "智能制造", "description": "一种工业设备故障预测方法。"}
+        for index in range(count)
+    ]
+
+
+def run(service: DoubaoAnalysisService, achievements: list) -> float:
+    start = time.perf_counter()
+    results = service.analyze_achievements(achievements)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if "error" in result)
+    assert failed == 0, f"{failed} 条任务失败"
+    return elapsed
+
+
+def main():
+    request_overhead = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    seconds_per_token = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0005
+
+    print("模型调用微批处理基准测试")
+    print("==================================")
+    print(f"模拟API：每次请求开销 {request_overhead}s，每token {seconds_per_token * 1000:.2f}ms")
+
+    achievements = build_achievements(32)
+    with mock.patch("requests.post", make_fake_post(request_overhead, seconds_per_token)):
+        sequential = DoubaoAnalysisService({"api_key": "benchmark"})
+        baseline = run(sequential, achievements)
+        print(f"\n逐条调用      {baseline:6.2f} s  {len(achievements) / baseline:6.1f} 条/秒")
+
+        for batch_size, concurrency in ((4, 1), (8, 1), (8, 4)):
+            batched = DoubaoAnalysisService({"api_key": "benchmark", "batching": {
+                "enabled": True, "max_batch_size": batch_size, "max_concurrency": concurrency
+            }})
+            elapsed = run(batched, achievements)
+            batched.shutdown()
+            print(f"每批{batch_size}条 并发{concurrency}  {elapsed:6.2f} s  {len(achievements) / elapsed:6.1f} 条/秒"
+                  f"（{baseline / elapsed:.1f}倍）")
+
+
+if __name__ == "__main__":
+    main()
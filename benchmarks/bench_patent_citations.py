@@ -0,0 +1,83 @@
+"""
+科研成果转化分析智能体 - 专利引用图基准测试
+
+在合成专利语料上构建索引，测量引用图构建和PageRank影响力计算的耗时（与逐边循环的
+纯Python迭代对比），以及引用关系查询、附带被引统计的趋势分析的延迟（p50/p99）。
+专利数可通过命令行参数调整：
+    python benchmarks/bench_patent_citations.py [专利数]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_patents import patent_id, write_jsonl
+from src.services.local_patent_service_impl import LocalPatentQueryService
+
+QUERIES = ["人工智能", "锂电池 储能", "基因编辑 疫苗 抗体", "光刻"]
+
+
+def percentile(samples: list, ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def python_iteration(graph, rank: list) -> float:
+    """逐边循环完成一轮PageRank传播，返回耗时（毫秒）"""
+    sources = graph.forward_offsets.tolist()
+    targets = graph.forward_targets.tolist()
+    started = time.perf_counter()
+    spread = [0.0] * graph.node_count
+    for doc_id in range(graph.node_count):
+        start, end = sources[doc_id], sources[doc_id + 1]
+        if end > start:
+            share = rank[doc_id] / (end - start)
+            for target in targets[start:end]:
+                spread[target] += share
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = os.path.join(workdir, "patents.jsonl")
+        write_jsonl(corpus, count)
+        started = time.perf_counter()
+        service = LocalPatentQueryService({"index_dir": os.path.join(workdir, "index"), "corpus": corpus,
+                                           "query_cache_size": 0})
+        print(f"专利数: {count}，索引构建耗时: {time.perf_counter() - started:.1f}s")
+
+        view = service._view
+        started = time.perf_counter()
+        graph = view.citations
+        print(f"引用图构建耗时: {(time.perf_counter() - started) * 1000:.0f}ms，引用关系: {graph.edge_count}")
+        started = time.perf_counter()
+        graph.influence()
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"PageRank耗时: {elapsed:.0f}ms，迭代{graph.iterations}轮，每轮 {elapsed / graph.iterations:.1f}ms")
+        print(f"纯Python逐边迭代每轮: {python_iteration(graph, [1.0 / count] * count):.0f}ms")
+
+        samples = []
+        for number in range(0, count, max(1, count // 500)):
+            started = time.perf_counter()
+            service.get_patent_citations(patent_id(number))
+            samples.append((time.perf_counter() - started) * 1000)
+        trend = []
+        for _ in range(5):
+            for query in QUERIES:
+                started = time.perf_counter()
+                service.analyze_patent_trend(query)
+                trend.append((time.perf_counter() - started) * 1000)
+
+        print(f"\n{'操作':<14}{'p50(ms)':>10}{'p99(ms)':>10}")
+        for label, values in (("引用关系查询", samples), ("趋势分析", trend)):
+            print(f"{label:<14}{percentile(values, 0.5):>10.2f}{percentile(values, 0.99):>10.2f}")
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
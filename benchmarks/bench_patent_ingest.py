@@ -0,0 +1,99 @@
+"""
+科研成果转化分析智能体 - 专利索引增量更新基准测试
+
+在已构建的合成专利索引上写入一批增量（其中一半为已有专利的更新，并撤回少量专利），
+比较增量写入与全量重建的耗时，测量多段和合并后的关键词查询延迟，以及段合并期间的查询延迟，
+并检查多段时的检索排序和得分与合并后一致。
+专利数和增量数可通过命令行参数调整：
+    python benchmarks/bench_patent_ingest.py [专利数] [增量数]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_patents import generate_patents, patent_id, write_jsonl
+from src.services.local_patent_service_impl import LocalPatentQueryService
+
+QUERIES = ["人工智能", "锂电池 储能", "基因编辑 疫苗 抗体", "光刻"]
+
+
+def percentile(samples: list, ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def query_latencies(service: LocalPatentQueryService, rounds: int = 20) -> list:
+    samples = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            started = time.perf_counter()
+            service.query_by_keyword(query, 10)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def rankings(service: LocalPatentQueryService, limit: int = 100) -> dict:
+    return {query: [(result["patent_id"], result["score"]) for result in service.query_by_keyword(query, limit)]
+            for query in QUERIES}
+
+
+def write_delta(path: str, count: int, delta: int) -> None:
+    """一半更新已有专利，一半为新专利"""
+    with open(path, "w", encoding="utf-8") as f:
+        for number, patent in enumerate(generate_patents(delta, seed=1)):
+            patent["patent_id"] = patent_id(number * 2 if number < delta // 2 else count + number)
+            f.write(json.dumps(patent, ensure_ascii=False) + "\n")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    delta = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = os.path.join(workdir, "patents.jsonl")
+        delta_path = os.path.join(workdir, "delta.jsonl")
+        write_jsonl(corpus, count)
+        write_delta(delta_path, count, delta)
+
+        started = time.perf_counter()
+        service = LocalPatentQueryService({"index_dir": os.path.join(workdir, "index"), "corpus": corpus})
+        print(f"专利数: {count}，全量构建耗时: {time.perf_counter() - started:.1f}s")
+        single = query_latencies(service)
+
+        withdrawn = [patent_id(number) for number in range(1, count, count // 100)]
+        stats = service.ingest_delta(delta_path, withdrawn)
+        print(f"增量: {delta}件（撤回{len(withdrawn)}件），写入耗时: {stats['seconds']:.2f}s，"
+              f"删除标记: {stats['deleted']}件，段数: {stats['segments']}")
+        segmented = query_latencies(service)
+        before_merge = rankings(service)
+
+        # 合并期间持续查询
+        during, done = [], threading.Event()
+
+        def query_loop():
+            while not done.is_set():
+                during.extend(query_latencies(service, 1))
+
+        worker = threading.Thread(target=query_loop)
+        worker.start()
+        merge_stats = service.merge_segments()
+        done.set()
+        worker.join()
+        merged = query_latencies(service)
+        print(f"段合并耗时: {merge_stats['seconds']:.1f}s，合并期间完成查询: {len(during)}次")
+        print(f"合并前后检索排序一致: {'是' if rankings(service) == before_merge else '否'}")
+
+        print(f"\n{'索引状态':<14}{'p50(ms)':>10}{'p99(ms)':>10}")
+        for label, samples in (("单段", single), ("增量后(2段)", segmented), ("合并期间", during), ("合并后", merged)):
+            print(f"{label:<14}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}")
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
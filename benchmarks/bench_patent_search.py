@@ -0,0 +1,100 @@
+"""
+科研成果转化分析智能体 - 本地专利检索基准测试
+
+生成合成专利语料并构建倒排索引，测量索引构建耗时和关键词查询延迟（p50/p99），
+并与逐条扫描全部专利文本的朴素检索对比；另测量按技术领域查询IPC倒排表的延迟，
+以及深度翻页时游标分页与“取前 offset+limit 条再切片”的耗时对比；最后对比热门查询命中结果缓存时的延迟。
+专利数可通过命令行参数调整：
+    python benchmarks/bench_patent_search.py [专利数]
+"""
+
+import os
+import sys
+import itertools
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_patents import write_jsonl
+from src.patents import TECHNOLOGY_FIELD_LABELS, iter_jsonl, searchable_text, tokenize
+from src.services.local_patent_service_impl import LocalPatentQueryService
+
+QUERIES = ["人工智能", "锂电池 储能", "基于深度学习的图像识别", "石墨烯复合材料制备", "基因编辑 疫苗 抗体", "光刻"]
+
+
+def percentile(samples: list, ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def measure(func, query: str, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = os.path.join(workdir, "patents.jsonl")
+        started = time.perf_counter()
+        write_jsonl(corpus, count)
+        print(f"合成专利数: {count}，生成耗时: {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        index_dir = os.path.join(workdir, "index")
+        # 检索延迟在关闭结果缓存的情况下测量
+        service = LocalPatentQueryService({"index_dir": index_dir, "corpus": corpus, "query_cache_size": 0})
+        print(f"索引构建并加载耗时: {time.perf_counter() - started:.1f}s")
+
+        # 朴素检索：逐条检查文本是否包含全部关键词
+        texts = [searchable_text(patent) for patent in iter_jsonl(corpus)]
+
+        def scan(query):
+            words = query.split()
+            return [i for i, text in enumerate(texts) if all(word in text for word in words)][:10]
+
+        print(f"\n{'查询':<16}{'命中数':>10}{'索引p50(ms)':>14}{'索引p99(ms)':>14}{'扫描p50(ms)':>14}")
+        for query in QUERIES:
+            service.query_by_keyword(query, 10)
+            indexed = measure(lambda q: service.query_by_keyword(q, 10), query, 50)
+            scanned = measure(scan, query, 3)
+            matched = len(service._view.score(tokenize(query))[0])
+            print(f"{query:<16}{matched:>10}{percentile(indexed, 0.5):>14.2f}"
+                  f"{percentile(indexed, 0.99):>14.2f}{percentile(scanned, 0.5):>14.1f}")
+
+        counts = service.technology_field_counts()
+        print(f"\n{'技术领域':<16}{'专利数':>10}{'p50(ms)':>12}{'p99(ms)':>12}")
+        for field in TECHNOLOGY_FIELD_LABELS:
+            by_ipc = measure(lambda f: service.query_by_technology_field(f, 10), field, 50)
+            print(f"{field:<16}{counts[field]:>10}{percentile(by_ipc, 0.5):>12.3f}{percentile(by_ipc, 0.99):>12.3f}")
+
+        query = QUERIES[0]
+        print(f"\n深度翻页（{query}，每页10条）")
+        print(f"{'起始位置':<12}{'游标p50(ms)':>14}{'切片p50(ms)':>14}")
+        for offset in (10, 1000, 10000, 50000):
+            previous = next(itertools.islice(service.iter_keyword_results(query), offset - 1, None), None)
+            if previous is None:
+                break
+            paged = measure(lambda c: service.query_by_keyword_page(limit=10, cursor=c), previous["cursor"], 20)
+            sliced = measure(lambda q: service.query_by_keyword(q, offset + 10)[offset:], query, 3)
+            print(f"{offset:<12}{percentile(paged, 0.5):>14.2f}{percentile(sliced, 0.5):>14.2f}")
+
+        cached_service = LocalPatentQueryService({"index_dir": index_dir})
+        print(f"\n{'热门查询':<16}{'无缓存p50(ms)':>16}{'命中缓存p50(ms)':>18}")
+        for query in QUERIES:
+            uncached = measure(lambda q: service.analyze_patent_trend(q, 5), query, 10)
+            cached_service.analyze_patent_trend(query, 5)
+            cached = measure(lambda q: cached_service.analyze_patent_trend(q, 5), query, 50)
+            print(f"{'趋势:' + query:<16}{percentile(uncached, 0.5):>16.2f}{percentile(cached, 0.5):>18.3f}")
+        cached_service.shutdown()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
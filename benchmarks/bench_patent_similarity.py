@@ -0,0 +1,76 @@
+"""
+科研成果转化分析智能体 - 相似专利检索基准测试
+
+在合成专利语料上构建哈希TF-IDF向量和IVF索引，测量不同扫描簇数（nprobe）下
+top-10 相似检索的延迟（p50/p99）和相对精确暴力检索的召回率。
+专利数可通过命令行参数调整：
+    python benchmarks/bench_patent_similarity.py [专利数]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_patents import generate_patents
+from src.patents import InvertedIndex, VectorIndex, normalize_patent, searchable_text, tokenize, top_k, write_vector_index
+
+QUERIES = [
+    "一种基于深度学习的图像识别方法，用于工业设备的故障诊断与预测性维护",
+    "锂电池储能系统的热管理装置及其控制方法",
+    "石墨烯复合材料涂层的制备方法及其在防腐中的应用",
+    "基于基因编辑技术的疫苗抗体筛选平台",
+    "无人机集群的路径规划与目标检测系统",
+    "污水处理中重金属离子的吸附材料",
+]
+
+
+def percentile(samples: list, ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        index = InvertedIndex.build(searchable_text(normalize_patent(patent)) for patent in generate_patents(count))
+        print(f"合成专利数: {count}，倒排索引构建耗时: {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        stats = write_vector_index(index, workdir)
+        print(f"向量索引构建耗时: {time.perf_counter() - started:.1f}s，维度: {stats['dim']}，簇数: {stats['lists']}")
+
+        vectors = VectorIndex(workdir, index)
+        matrix = np.load(os.path.join(workdir, "vec_matrix.npy"), mmap_mode="r")
+        doc_ids = np.load(os.path.join(workdir, "vec_doc_ids.npy"), mmap_mode="r")
+        queries = [tokenize(query) for query in QUERIES]
+
+        # 精确暴力检索作为召回率基准
+        exact, brute = [], []
+        for tokens in queries:
+            started = time.perf_counter()
+            exact.append({doc for doc, _ in top_k(doc_ids, matrix @ vectors.embed(tokens), 10)})
+            brute.append((time.perf_counter() - started) * 1000)
+        print(f"\n暴力检索 p50: {percentile(brute, 0.5):.1f}ms")
+
+        print(f"\n{'nprobe':<10}{'p50(ms)':>10}{'p99(ms)':>10}{'recall@10':>12}")
+        for nprobe in (4, 8, 16, 32, 64):
+            samples, recalls = [], []
+            for tokens, expected in zip(queries, exact):
+                for _ in range(20):
+                    started = time.perf_counter()
+                    found = vectors.search(tokens, 10, nprobe)
+                    samples.append((time.perf_counter() - started) * 1000)
+                recalls.append(len(expected & {doc for doc, _ in found}) / len(expected))
+            print(f"{nprobe:<10}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}"
+                  f"{np.mean(recalls):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
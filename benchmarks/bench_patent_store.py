@@ -0,0 +1,77 @@
+"""
+科研成果转化分析智能体 - 专利存储详情查询基准测试
+
+比较两种详情查询方式：把JSONL语料全部加载为Python字典，以及内存映射的列式专利存储。
+输出加载耗时、加载后新增的Python堆内存和单次查询延迟，以及500件专利逐条查询与批量读取的耗时。
+专利数可通过命令行参数调整：
+    python benchmarks/bench_patent_store.py [专利数]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_patents import patent_id, write_jsonl
+from src.patents import PatentStore, build_store, iter_jsonl
+
+
+def measure_load(load):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    seconds = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, memory
+
+
+def measure_lookups(lookup, ids: list) -> float:
+    started = time.perf_counter()
+    for value in ids:
+        lookup(value)
+    return (time.perf_counter() - started) / len(ids) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = os.path.join(workdir, "patents.jsonl")
+        write_jsonl(corpus, count)
+        started = time.perf_counter()
+        build_store(corpus, os.path.join(workdir, "store"))
+        print(f"专利数: {count}，存储构建耗时: {time.perf_counter() - started:.1f}s")
+
+        rng = random.Random(7)
+        ids = [patent_id(rng.randrange(count)) for _ in range(20000)]
+
+        patents, dict_seconds, dict_memory = measure_load(
+            lambda: {patent["patent_id"]: patent for patent in iter_jsonl(corpus)})
+        dict_latency = measure_lookups(patents.get, ids)
+        del patents
+
+        store, store_seconds, store_memory = measure_load(lambda: PatentStore(os.path.join(workdir, "store")))
+        store_latency = measure_lookups(store.get_by_id, ids)
+        batch = ids[:500]
+        started = time.perf_counter()
+        for value in batch:
+            store.get_by_id(value)
+        single_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        store.get_many([record for record in store.lookup_many(batch) if record is not None])
+        bulk_ms = (time.perf_counter() - started) * 1000
+        store.close()
+
+        print(f"\n{'方式':<14}{'加载耗时(s)':>12}{'Python堆内存(MB)':>18}{'查询延迟(us)':>14}")
+        print(f"{'JSONL全量加载':<14}{dict_seconds:>12.2f}{dict_memory / 1e6:>18.1f}{dict_latency:>14.2f}")
+        print(f"{'列式存储':<14}{store_seconds:>12.4f}{store_memory / 1e6:>18.2f}{store_latency:>14.2f}")
+        print(f"\n500件专利详情：逐条查询 {single_ms:.2f}ms，批量读取 {bulk_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+科研成果转化分析智能体 - 专利趋势分析基准测试
+
+在合成专利数据的统计列上，比较向量化趋势分析与逐条遍历专利记录的Python聚合，
+命中比例分别取1%、10%和50%。专利数可通过命令行参数调整：
+    python benchmarks/bench_patent_trend.py [专利数]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_patents import generate_patents
+from src.patents import PatentColumns, TrendEngine, normalize_patent, write_columns
+from src.patents.columns import parse_year
+
+
+def python_trend(patents: list, doc_ids: np.ndarray, years: int) -> dict:
+    """逐条遍历命中专利的聚合实现，作为对比基线"""
+    selected = [patents[doc_id] for doc_id in doc_ids.tolist()]
+    last_year = max(parse_year(patent["application_date"]) for patent in selected)
+    yearly = {year: [0, 0, 0] for year in range(last_year - years + 1, last_year + 1)}
+    applicants, inventors = Counter(), Counter()
+    for patent in selected:
+        grant_year = parse_year(patent["grant_date"])
+        if grant_year in yearly:
+            yearly[grant_year][1] += 1
+        year = parse_year(patent["application_date"])
+        if year in yearly:
+            yearly[year][0] += 1
+            yearly[year][2] += len(patent["cited_patents"])
+            applicants.update(patent["applicant"])
+            inventors.update(patent["inventor"])
+    return {"yearly": yearly, "applicants": applicants.most_common(5), "inventors": inventors.most_common(5)}
+
+
+def best_of(func, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return min(samples) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    patents = [normalize_patent(patent) for patent in generate_patents(count)]
+    with tempfile.TemporaryDirectory() as workdir:
+        write_columns(patents, workdir)
+        engine = TrendEngine(PatentColumns(workdir))
+        rng = np.random.default_rng(7)
+
+        print(f"专利数: {count}")
+        print(f"{'命中比例':<10}{'命中数':>10}{'向量化(ms)':>14}{'逐条聚合(ms)':>16}{'加速比':>10}")
+        for ratio in (0.01, 0.1, 0.5):
+            doc_ids = np.sort(rng.choice(count, int(count * ratio), replace=False))
+            vectorized = best_of(lambda: engine.analyze(doc_ids, "基准", 5))
+            looped = best_of(lambda: python_trend(patents, doc_ids, 5), repeat=2)
+            print(f"{ratio:<10.0%}{len(doc_ids):>10}{vectorized:>14.1f}{looped:>16.1f}{looped / vectorized:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
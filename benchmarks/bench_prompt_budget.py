@@ -0,0 +1,170 @@
+"""
+科研成果转化分析智能体 - 提示词预算基准测试
+
+通过 DoubaoAnalysisService 的实际调用路径请求一个模拟的豆包API，实测调用耗时。
+模拟API按提示词token数计预填充耗时、按实际生成的token数计生成耗时，生成到
+回答结束或达到 max_tokens 为止（达到上限即截断）。分两部分报告：
+
+1. 字段压缩：固定 max_tokens，比较未设预算的提示词（原始数据整体序列化）与
+   预算压缩后的提示词，只反映输入长度的影响；同时给出预算处理本身的耗时。
+2. 默认生成长度：同一压缩后的提示词，比较原默认 max_tokens（2048）与按
+   analysis 阶段选择的上限。只有模型本来会生成超过该上限的回答时才有差别，
+   此时节省的时间来自截断输出，会在结果中标出。
+
+模拟API的吞吐可按实际部署调整：
+    python benchmarks/bench_prompt_budget.py [预填充tokens/秒] [生成tokens/秒] [每次请求开销秒数]
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+from unittest import mock
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.doubao_ai_service_impl import DoubaoAnalysisService
+from src.services.prompt_budget import estimate_tokens
+
+# 原默认的生成长度上限
+BASELINE_MAX_TOKENS = 2048
+
+# 典型描述段落
+PARAGRAPH = (
+    "本成果提出了一种基于深度学习的工业设备故障预测方法，通过多源传感器数据融合和时序建模，"
+    "实现了对关键部件剩余寿命的精确预测。实验表明，在三个公开数据集上预测误差降低了23%。"
+    "该方法已在两家制造企业完成试点部署，累计减少非计划停机时间约40小时。"
+)
+
+
+def build_achievement(paragraphs: int) -> dict:
+    """
+    构建科研成果数据
+
+    Args:
+        paragraphs: 描述包含的段落数
+
+    Returns:
+        dict: 与 analyze_achievement 输入一致的成果数据
+    """
+    return {
+        "title": "工业设备故障智能预测系统",
+        "field": "智能制造",
+        "maturity": "中试",
+        "keywords": ["故障预测", "深度学习", "剩余寿命", "传感器融合"],
+        "description": PARAGRAPH * paragraphs,
+        "team_size": "10-20人",
+        "investment_needs": "500万元",
+        "patent_status": "已有专利",
+        "expected_outcome": "技术许可",
+        "additional_notes": PARAGRAPH * (paragraphs // 2),
+    }
+
+
+def unbudgeted_prompt(data: dict) -> str:
+    return f"请分析以下科研成果的转化潜力：\n{json.dumps(data, ensure_ascii=False)}"
+
+
+class FakeModel:
+    """
+    模拟的豆包API：按提示词和实际生成的token数休眠，记录最近一次调用的生成情况
+    """
+
+    def __init__(self, prefill_rate: float, decode_rate: float, request_overhead: float):
+        self.prefill_rate = prefill_rate
+        self.decode_rate = decode_rate
+        self.request_overhead = request_overhead
+        # 模型本来会生成的回答长度（tokens）
+        self.answer_tokens = 600
+        self.last_completion_tokens = 0
+        self.last_truncated = False
+
+    def post(self, url, headers=None, json=None):
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in json["messages"])
+        completion_tokens = min(self.answer_tokens, json["max_tokens"])
+        self.last_completion_tokens = completion_tokens
+        self.last_truncated = completion_tokens < self.answer_tokens
+        time.sleep(self.request_overhead + prompt_tokens / self.prefill_rate
+                   + completion_tokens / self.decode_rate)
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {
+            "choices": [{
+                "message": {"content": "析" * completion_tokens},
+                "finish_reason": "length" if self.last_truncated else "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+        }
+        return response
+
+
+def time_call(service: DoubaoAnalysisService, prompt: str, max_tokens: int, repeat: int = 3) -> float:
+    """
+    实测一次模型调用的耗时
+
+    Args:
+        service: 分析服务
+        prompt: 提示词
+        max_tokens: 最大生成 tokens 数
+        repeat: 重复次数
+
+    Returns:
+        float: 耗时中位数（秒）
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        service._call_api(prompt, max_tokens)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    prefill_rate = float(sys.argv[1]) if len(sys.argv) > 1 else 20000.0
+    decode_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 1000.0
+    request_overhead = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+
+    print("提示词预算基准测试")
+    print("==================================")
+    print(f"模拟API：预填充 {prefill_rate:.0f} tokens/秒，生成 {decode_rate:.0f} tokens/秒，"
+          f"每次请求开销 {request_overhead}s")
+
+    model = FakeModel(prefill_rate, decode_rate, request_overhead)
+    service = DoubaoAnalysisService({"api_key": "benchmark"})
+    budgeted_max_tokens = service._prompt_budget.max_tokens_for("analysis")
+
+    with mock.patch("requests.post", model.post):
+        print(f"\n1. 字段压缩（max_tokens 固定为 {BASELINE_MAX_TOKENS}，回答 {model.answer_tokens} tokens）")
+        for paragraphs in (2, 20, 100, 400):
+            data = build_achievement(paragraphs)
+            before = unbudgeted_prompt(data)
+            after = service._build_achievement_prompt(data)
+
+            number = 200
+            seconds = min(timeit.repeat(lambda: service._build_achievement_prompt(data), number=number, repeat=3))
+            before_latency = time_call(service, before, BASELINE_MAX_TOKENS)
+            after_latency = time_call(service, after, BASELINE_MAX_TOKENS)
+
+            print(f"\n描述段落数 {paragraphs}")
+            print(f"  提示词tokens  {estimate_tokens(before):>8} -> {estimate_tokens(after):>6}")
+            print(f"  预算处理耗时  {seconds / number * 1e3:>8.3f} ms")
+            print(f"  调用耗时      {before_latency:>8.2f} s -> {after_latency:>6.2f} s"
+                  f"（降低 {(1 - after_latency / before_latency) * 100:.0f}%）")
+
+        print(f"\n2. 默认生成长度（max_tokens {BASELINE_MAX_TOKENS} -> {budgeted_max_tokens}，压缩后的提示词）")
+        prompt = service._build_achievement_prompt(build_achievement(20))
+        for answer_tokens in (600, 1200, 1800):
+            model.answer_tokens = answer_tokens
+            rows = []
+            for max_tokens in (BASELINE_MAX_TOKENS, budgeted_max_tokens):
+                latency = time_call(service, prompt, max_tokens)
+                rows.append((latency, model.last_completion_tokens, model.last_truncated))
+            (before_latency, before_tokens, _), (after_latency, after_tokens, truncated) = rows
+            note = f"，回答被截断 {answer_tokens - after_tokens} tokens" if truncated else "，回答完整"
+            print(f"  回答 {answer_tokens:>4} tokens  调用耗时 {before_latency:.2f} s -> {after_latency:.2f} s"
+                  f"（生成 {before_tokens} -> {after_tokens} tokens{note}）")
+
+
+if __name__ == "__main__":
+    main()
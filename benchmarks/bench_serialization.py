@@ -0,0 +1,98 @@
+"""
+科研成果转化分析智能体 - JSON序列化基准测试
+
+对比标准库 json、orjson 以及预编码缓存在报告级负载下的编码耗时与体积。
+
+运行方式：
+    python benchmarks/bench_serialization.py
+"""
+
+import os
+import sys
+import json
+import timeit
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.serialization import StdlibJSONSerializer, OrjsonSerializer, orjson
+
+# 典型分析段落，与API返回的详细分析内容长度相当
+PARAGRAPH = (
+    "基于对该领域的深入分析，我们预测该技术在未来3-5年内将有显著的市场增长。"
+    "当前市场规模约50亿元，预计年增长率达20%。主要应用场景包括企业智能化转型、科研机构数据分析等。"
+    "市场竞争格局相对分散，尚未形成垄断，为新技术提供了良好的切入机会。建议重点关注垂直行业应用，建立示范案例。"
+)
+
+
+def build_report_payload(paragraphs: int) -> dict:
+    """
+    构建与 AnalysisResult 结构一致的报告负载
+
+    Args:
+        paragraphs: 每个分析部分包含的段落数
+
+    Returns:
+        dict: 报告负载
+    """
+    text = PARAGRAPH * paragraphs
+    return {
+        "session_id": "3f2b8a9e-6d1c-4f7a-9b2e-1c5d8e7f6a90",
+        "status": "completed",
+        "market_analysis": {
+            "market_size": "根据豆包AI分析，该成果在相关领域具有市场潜力",
+            "competition": "竞争分析已完成",
+            "commercial_potential": "商业化潜力评估已完成",
+            "detailed_analysis": text
+        },
+        "patent_analysis": {
+            "protection_strategy": "专利保护建议已生成",
+            "risk_assessment": "知识产权风险分析已完成",
+            "detailed_analysis": text
+        },
+        "transfer_strategy": {
+            "recommended_path": "技术转让",
+            "timeline": "转化时间线已规划",
+            "key_factors": "关键成功因素已识别",
+            "detailed_strategy": text
+        },
+        "summary": text,
+        "error": None
+    }
+
+
+def bench(label: str, func, number: int) -> None:
+    """
+    执行单项基准测试并打印结果
+    """
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"  {label:<28} {seconds / number * 1e6:>10.1f} us/次")
+
+
+def main():
+    print("JSON序列化基准测试")
+    print("==================================")
+
+    stdlib = StdlibJSONSerializer()
+    fast = OrjsonSerializer() if orjson is not None else None
+
+    for paragraphs in (1, 10, 50):
+        payload = build_report_payload(paragraphs)
+        encoded = stdlib.dumps(payload)
+        escaped = json.dumps(payload).encode("utf-8")
+        print(f"\n负载: {len(encoded) / 1024:.1f} KiB (ensure_ascii=True 时 {len(escaped) / 1024:.1f} KiB)")
+
+        number = 2000 if paragraphs < 50 else 500
+        bench("json.dumps (默认参数)", lambda: json.dumps(payload).encode("utf-8"), number)
+        bench("StdlibJSONSerializer", lambda: stdlib.dumps(payload), number)
+        if fast is not None:
+            bench("OrjsonSerializer", lambda: fast.dumps(payload), number)
+        else:
+            print("  OrjsonSerializer             未安装 orjson，跳过")
+        # 预编码缓存：轮询时仅需取出已编码的字节串
+        cache = {"session": encoded}
+        bench("预编码缓存命中", lambda: cache["session"], number)
+
+
+if __name__ == "__main__":
+    main()
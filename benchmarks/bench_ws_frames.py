@@ -0,0 +1,59 @@
+"""
+科研成果转化分析智能体 - WebSocket帧编码基准测试
+
+对比JSON文本帧与MessagePack二进制帧在典型聊天帧上的单帧编码耗时与字节数。
+
+运行方式：
+    python benchmarks/bench_ws_frames.py
+"""
+
+import os
+import sys
+import timeit
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api.ws_codec import JSONFrameCodec, MsgPackFrameCodec, msgpack
+
+# 典型聊天帧
+FRAMES = {
+    "机器人回复": {
+        "sender": "bot",
+        "text": "推荐转化路径：第一阶段（0-6个月）进行技术优化和市场验证，完成2-3个试点项目；"
+                "第二阶段（6-12个月）寻求战略合作伙伴，签订技术许可协议；第三阶段（12-24个月）规模化推广。",
+        "timestamp": 1234567.891234
+    },
+    "用户消息确认": {"sender": "user", "text": "如何提高转化成功率？", "timestamp": 1234567.123456},
+    "输入状态": {"sender": "bot", "is_typing": True},
+    "增量片段": {"type": "delta", "seq": 42, "text": "建议组建专业的商业团队"},
+    "分析进度": {
+        "type": "analysis_progress",
+        "session_id": "3f2b8a9e-6d1c-4f7a-9b2e-1c5d8e7f6a90",
+        "stage": "patent",
+        "status": "running"
+    },
+}
+
+
+def main():
+    print("WebSocket帧编码基准测试")
+    print("==================================")
+
+    codecs = [JSONFrameCodec()]
+    if msgpack is not None:
+        codecs.append(MsgPackFrameCodec())
+    else:
+        print("未安装 msgpack，仅测试JSON帧")
+
+    number = 20000
+    for label, frame in FRAMES.items():
+        print(f"\n{label}")
+        for codec in codecs:
+            size = len(codec.encode(frame) if codec.binary else codec.encode(frame).encode("utf-8"))
+            seconds = min(timeit.repeat(lambda: codec.encode(frame), number=number, repeat=5))
+            print(f"  {codec.name:<8} {size:>5} 字节  {seconds / number * 1e6:>7.2f} us/帧")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+科研成果转化分析智能体 - 基准测试用的合成专利数据
+
+按固定随机种子生成JSONL格式的专利数据，词项频率近似长尾分布，
+供专利检索相关的基准测试共用。
+"""
+
+import json
+import random
+
+TERMS = [
+    "人工智能", "深度学习", "神经网络", "图像识别", "语音识别", "自然语言处理", "知识图谱",
+    "数据挖掘", "云计算", "边缘计算", "区块链", "物联网", "传感器", "无人机", "机器人",
+    "自动驾驶", "锂电池", "储能", "光伏", "氢能", "燃料电池", "碳捕集", "污水处理", "节能",
+    "石墨烯", "纳米材料", "复合材料", "高分子", "陶瓷", "合金", "涂层", "半导体", "芯片",
+    "集成电路", "光刻", "封装", "基因编辑", "抗体", "疫苗", "蛋白质", "细胞治疗", "药物递送",
+    "医疗器械", "诊断试剂", "中药", "农业", "育种", "食品检测", "智能制造", "工业互联网",
+    "数字孪生", "增材制造", "激光加工", "精密测量", "故障诊断", "预测维护", "路径规划",
+    "目标检测", "图像分割", "信号处理", "通信协议", "天线", "5G", "卫星导航", "加密算法",
+]
+FILLER = ["一种", "方法", "系统", "装置", "及其", "应用", "基于", "用于", "制备", "检测", "控制", "优化"]
+IPC_CODES = [
+    "G06N3/08", "G06F16/245", "G06T7/00", "G10L15/00", "H04L9/32", "H04W4/70", "H01M10/052",
+    "H02J3/32", "C02F1/00", "C01B32/184", "B82Y30/00", "C08L101/00", "H01L21/027", "A61K39/395",
+    "C12N15/113", "A61B5/00", "A01H1/02", "G01N33/02", "B33Y10/00", "G05B23/02", "G01S19/42",
+]
+APPLICANTS = [f"{prefix}{suffix}" for prefix in ("清华", "北京", "浙江", "上海交通", "华中科技", "中山", "南京", "武汉", "四川", "西安交通")
+              for suffix in ("大学", "研究院", "科技有限公司")]
+
+
+def patent_id(number: int) -> str:
+    """生成第number条专利的专利号"""
+    return f"CN{100000000 + number}A"
+
+
+def generate_patents(count: int, seed: int = 42):
+    """
+    生成合成专利记录
+
+    Args:
+        count: 专利数
+        seed: 随机种子
+
+    Yields:
+        dict: 专利记录
+    """
+    rng = random.Random(seed)
+    # 词项按排名取权重，模拟长尾分布
+    weights = [1.0 / (rank + 1) for rank in range(len(TERMS))]
+    for number in range(count):
+        topic = rng.choices(TERMS, weights, k=3)
+        title = f"{rng.choice(FILLER)}基于{topic[0]}和{topic[1]}的{rng.choice(FILLER)}"
+        abstract = "本发明公开了" + "，".join(
+            f"{rng.choice(FILLER)}{term}{rng.choice(FILLER)}" for term in rng.choices(TERMS, weights, k=12)
+        ) + "。"
+        year = rng.randint(2010, 2024)
+        granted = rng.random() < 0.6
+        yield {
+            "patent_id": patent_id(number),
+            "title": title,
+            "abstract": abstract,
+            "claims": [f"1. 一种{topic[2]}{rng.choice(FILLER)}，其特征在于{topic[0]}模块与{topic[1]}模块连接。"],
+            "application_date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "publication_date": f"{year + 1}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "grant_date": f"{min(year + rng.randint(1, 3), 2025)}-06-01" if granted else "",
+            "status": "授权" if granted else "实审",
+            "applicant": rng.sample(APPLICANTS, rng.randint(1, 2)),
+            "inventor": [f"发明人{rng.randint(1, 5000)}" for _ in range(rng.randint(1, 4))],
+            "ipc_classification": rng.sample(IPC_CODES, rng.randint(1, 3)),
+            "cited_patents": [patent_id(rng.randrange(number)) for _ in range(rng.randint(0, 5))] if number else [],
+        }
+
+
+def write_jsonl(path: str, count: int, seed: int = 42) -> None:
+    """
+    将合成专利数据写入JSONL文件
+
+    Args:
+        path: 输出路径
+        count: 专利数
+        seed: 随机种子
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for patent in generate_patents(count, seed):
+            f.write(json.dumps(patent, ensure_ascii=False) + "\n")
@@ -124,18 +124,7 @@ def demo_analysis_service():
         analysis_result = analysis_service.analyze_achievement(analysis_data)
         
         print("\n分析结果:")
-        print(f"转化潜力评分: {analysis_result.get('conversion_potential_score', '未评分')}/10")
-        print(f"\n优势:")
-        for advantage in analysis_result.get('advantages', []):
-            print(f"- {advantage}")
-        
-        print(f"\n风险:")
-        for risk in analysis_result.get('risks', []):
-            print(f"- {risk}")
-        
-        print(f"\n建议:")
-        for suggestion in analysis_result.get('suggestions', []):
-            print(f"- {suggestion}")
+        print(analysis_result["analysis"])
         
         return analysis_result
         
@@ -0,0 +1,220 @@
+"""
+WebSocket消息发布/订阅后端
+
+多个uvicorn工作进程时，客户端的WebSocket连接与其分析任务可能位于不同进程。
+任意进程通过 publish 发布消息，持有该客户端连接的进程负责投递。
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+from ..utils.logger import get_logger
+from ..utils.serialization import dumps, loads
+
+logger = get_logger(__name__)
+
+# 投递回调：接收客户端ID和消息，客户端连接在本进程并已投递时返回True
+MessageHandler = Callable[[str, dict], Awaitable[bool]]
+
+
+class MessageBroker(ABC):
+    """
+    消息发布/订阅后端基类
+    """
+
+    def __init__(self):
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        """
+        启动后端并注册本进程的投递回调
+
+        Args:
+            handler: 收到消息时调用的协程函数
+        """
+        self._handler = handler
+
+    async def stop(self) -> None:
+        """停止后端"""
+        self._handler = None
+
+    @abstractmethod
+    async def publish(self, client_id: str, message: dict) -> None:
+        """
+        向指定客户端发布消息
+
+        Args:
+            client_id: 目标客户端ID
+            message: 消息内容
+        """
+        pass
+
+
+class InProcessBroker(MessageBroker):
+    """
+    进程内实现，直接调用本进程的投递回调，适用于单进程部署
+    """
+
+    async def publish(self, client_id: str, message: dict) -> None:
+        if self._handler is not None:
+            await self._handler(client_id, message)
+
+
+class SQLiteBroker(MessageBroker):
+    """
+    基于本地SQLite文件的跨进程实现，无需外部服务
+
+    发布即写入消息表；各进程通过 PRAGMA data_version 感知其他连接的提交，
+    有变化时才读取新消息，过期消息定期清理。
+    """
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 0.05,
+                 retention: float = 60.0, batch_size: int = 500):
+        """
+        初始化SQLite消息后端
+
+        Args:
+            path: 数据库文件路径，所有工作进程需使用同一路径
+            poll_interval: 变化检查间隔（秒）
+            retention: 消息保留时间（秒）
+            batch_size: 每次读取的最大消息数
+        """
+        super().__init__()
+        self.path = path or os.path.join(tempfile.gettempdir(), "scientific_achievement_ws_broker.db")
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.batch_size = batch_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._data_version = None
+        self._poller: Optional[asyncio.Task] = None
+        self._last_prune = 0.0
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ws_messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "client_id TEXT NOT NULL, "
+            "payload BLOB NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        # 只投递启动之后发布的消息
+        row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM ws_messages").fetchone()
+        self._last_id = row[0]
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        await asyncio.to_thread(self._open)
+        self._poller = asyncio.create_task(self._poll_loop())
+        logger.info("SQLite消息后端已启动: %s", self.path)
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+        await super().stop()
+
+    def _insert(self, client_id: str, payload: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ws_messages (client_id, payload, created_at) VALUES (?, ?, ?)",
+                (client_id, payload, time.time())
+            )
+
+    async def publish(self, client_id: str, message: dict) -> None:
+        if self._conn is None:
+            raise RuntimeError("SQLite消息后端尚未启动")
+        # 客户端连接在本进程时直接投递，无需经过数据库
+        if self._handler is not None and await self._handler(client_id, message):
+            return
+        await asyncio.to_thread(self._insert, client_id, dumps(message))
+
+    def _fetch_new(self) -> list:
+        with self._lock:
+            # data_version 仅在其他连接提交后变化，无变化时跳过查询
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return []
+            rows = self._conn.execute(
+                "SELECT id, client_id, payload FROM ws_messages WHERE id > ? ORDER BY id LIMIT ?",
+                (self._last_id, self.batch_size)
+            ).fetchall()
+            if len(rows) < self.batch_size:
+                self._data_version = data_version
+            if rows:
+                self._last_id = rows[-1][0]
+
+            now = time.time()
+            if now - self._last_prune > self.retention:
+                self._conn.execute("DELETE FROM ws_messages WHERE created_at < ?", (now - self.retention,))
+                self._last_prune = now
+            return rows
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._fetch_new)
+                for _, client_id, payload in rows:
+                    if self._handler is not None:
+                        await self._handler(client_id, loads(payload))
+                if rows:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("读取消息后端失败: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+
+# 可用消息后端
+BROKERS = {
+    "memory": InProcessBroker,
+    "sqlite": SQLiteBroker,
+}
+
+_broker: Optional[MessageBroker] = None
+
+
+def configure_broker(settings: Optional[dict] = None) -> MessageBroker:
+    """
+    根据配置创建全局消息后端
+
+    Args:
+        settings: 配置项，type 为 "memory"（默认）或 "sqlite"，其余键作为构造参数
+
+    Returns:
+        MessageBroker: 消息后端实例
+    """
+    global _broker
+    settings = dict(settings or {})
+    broker_type = settings.pop("type", "memory")
+    if broker_type not in BROKERS:
+        raise ValueError(f"不支持的消息后端类型: {broker_type}")
+    _broker = BROKERS[broker_type](**settings)
+    return _broker
+
+
+def get_broker() -> MessageBroker:
+    """
+    获取全局消息后端，未配置时使用进程内实现
+
+    Returns:
+        MessageBroker: 消息后端实例
+    """
+    global _broker
+    if _broker is None:
+        _broker = InProcessBroker()
+    return _broker
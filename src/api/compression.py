@@ -0,0 +1,253 @@
+"""HTTP响应压缩：gzip/brotli协商、压缩中间件与预压缩工具"""
+import gzip
+import zlib
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖
+    brotli = None
+
+# 值得压缩的内容类型前缀
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/",
+)
+
+# 默认压缩配置，可通过配置文件中的 api.compression 覆盖
+DEFAULT_COMPRESSION_SETTINGS = {
+    "enabled": True,
+    "minimum_size": 1024,
+    "encodings": ["br", "gzip"],
+    "gzip_level": 6,
+    "brotli_quality": 5,
+    # 预压缩只在结果完成时执行一次，可以使用最高压缩级别
+    "precompress_gzip_level": 9,
+    "precompress_brotli_quality": 11,
+    "websocket_deflate": True,
+}
+
+_settings = dict(DEFAULT_COMPRESSION_SETTINGS)
+
+
+def configure_compression(settings: Optional[dict] = None) -> dict:
+    """
+    更新全局压缩配置
+
+    Args:
+        settings: 覆盖默认值的配置项
+
+    Returns:
+        dict: 生效的压缩配置
+    """
+    _settings.clear()
+    _settings.update(DEFAULT_COMPRESSION_SETTINGS)
+    _settings.update(settings or {})
+    return _settings
+
+
+def get_compression_settings() -> dict:
+    """获取当前压缩配置"""
+    return _settings
+
+
+def available_encodings() -> List[str]:
+    """
+    获取当前环境可用且已启用的压缩编码，按优先级排列
+
+    Returns:
+        list: 编码名称列表
+    """
+    if not _settings["enabled"]:
+        return []
+    return [
+        encoding for encoding in _settings["encodings"]
+        if encoding == "gzip" or (encoding == "br" and brotli is not None)
+    ]
+
+
+def choose_encoding(accept_encoding: Optional[str], encodings: Optional[List[str]] = None) -> Optional[str]:
+    """
+    根据 Accept-Encoding 请求头选择压缩编码
+
+    Args:
+        accept_encoding: Accept-Encoding 请求头的值
+        encodings: 服务端支持的编码（按优先级排列），默认使用当前可用编码
+
+    Returns:
+        str: 选中的编码，不压缩时返回None
+    """
+    if not accept_encoding:
+        return None
+    if encodings is None:
+        encodings = available_encodings()
+
+    accepted = {}
+    for item in accept_encoding.split(","):
+        parts = item.strip().split(";")
+        name = parts[0].strip().lower()
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    压缩完整的响应体
+
+    Args:
+        body: 原始字节串
+        encoding: "gzip" 或 "br"
+        level: 压缩级别，None时使用配置中的默认值
+
+    Returns:
+        bytes: 压缩后的字节串
+    """
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level or _settings["gzip_level"], mtime=0)
+    if encoding == "br":
+        if brotli is None:
+            raise ValueError("未安装 brotli，无法使用br压缩")
+        return brotli.compress(body, quality=level or _settings["brotli_quality"])
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """
+    为已完成的结果预先生成所有可用编码的压缩版本
+
+    Args:
+        body: 已编码的响应体
+
+    Returns:
+        dict: 编码名称到压缩字节串的映射；响应体过小时返回空字典
+    """
+    if len(body) < _settings["minimum_size"]:
+        return {}
+    levels = {
+        "gzip": _settings["precompress_gzip_level"],
+        "br": _settings["precompress_brotli_quality"],
+    }
+    return {encoding: compress(body, encoding, levels[encoding]) for encoding in available_encodings()}
+
+
+class _StreamCompressor:
+    """流式压缩器，每个分块都会刷新输出，保证流式响应的实时性"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "gzip":
+            # wbits=31 生成带gzip头的数据流
+            self._compressor = zlib.compressobj(_settings["gzip_level"], zlib.DEFLATED, 31)
+        else:
+            self._compressor = brotli.Compressor(quality=_settings["brotli_quality"])
+
+    def feed(self, data: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        if self.encoding == "gzip":
+            return self._compressor.flush(zlib.Z_FINISH)
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    ASGI压缩中间件
+
+    根据 Accept-Encoding 选择 br 或 gzip，只压缩超过阈值的可压缩内容；
+    已带 Content-Encoding 的响应（如预压缩结果）原样透传。
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        minimum_size = self.minimum_size if self.minimum_size is not None else _settings["minimum_size"]
+        state = {"start": None, "passthrough": False, "compressor": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if state["compressor"] is None:
+                start = state["start"]
+                headers = {key.lower(): value for key, value in start.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (b"content-encoding" in headers
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)
+                        or (not more_body and len(body) < minimum_size)):
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                new_headers = [
+                    (key, value) for key, value in start.get("headers", [])
+                    if key.lower() not in (b"content-length", b"etag", b"vary")
+                ]
+                new_headers.append((b"content-encoding", encoding.encode("latin-1")))
+                vary = headers.get(b"vary", b"")
+                new_headers.append((b"vary", (vary + b", " if vary else b"") + b"Accept-Encoding"))
+                etag = headers.get(b"etag")
+                if etag:
+                    # 压缩后表示已不同，强ETag降级为弱ETag
+                    new_headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+
+                if not more_body:
+                    compressed = compress(body, encoding)
+                    new_headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send({**start, "headers": new_headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    state["passthrough"] = True
+                    return
+
+                state["compressor"] = _StreamCompressor(encoding)
+                await send({**start, "headers": new_headers})
+
+            compressor = state["compressor"]
+            chunk = compressor.feed(body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
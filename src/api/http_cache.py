@@ -0,0 +1,65 @@
+"""HTTP缓存相关工具：ETag计算与条件请求处理"""
+import hashlib
+from typing import Optional
+
+# 已完成的分析结果不会再变化，允许浏览器和反向代理长期缓存
+COMPLETED_CACHE_CONTROL = "public, max-age=86400, immutable"
+# 处理中的会话每次都需要重新验证
+PENDING_CACHE_CONTROL = "no-cache"
+
+
+def compute_etag(body: bytes) -> str:
+    """
+    根据响应体计算强ETag
+
+    Args:
+        body: 已编码的响应体
+
+    Returns:
+        str: 带引号的ETag值
+    """
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断 If-None-Match 请求头是否与ETag匹配
+
+    按 RFC 7232 对 If-None-Match 使用弱比较，忽略 W/ 前缀。
+
+    Args:
+        if_none_match: If-None-Match 请求头的值
+        etag: 当前资源的ETag
+
+    Returns:
+        bool: 是否匹配
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    为压缩后的表示生成独立的强ETag
+
+    Args:
+        etag: 未压缩表示的ETag
+        encoding: 内容编码，None表示未压缩
+
+    Returns:
+        str: 对应表示的ETag
+    """
+    if not encoding:
+        return etag
+    return etag[:-1] + "-" + encoding + '"'
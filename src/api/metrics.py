@@ -0,0 +1,53 @@
+"""HTTP请求指标：按路由统计请求数与延迟"""
+import time
+
+from ..utils.metrics import get_registry
+
+registry = get_registry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP请求数", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP请求处理耗时（秒）", ("method", "route")
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "正在处理的HTTP请求数"
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI指标中间件
+
+    路由标签使用路由模板（如 /api/result/{session_id}），未匹配的请求
+    统一记为 unmatched，避免路径参数导致标签基数膨胀。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_progress.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests_total.inc(method, route_path, str(status["code"]))
+            http_request_duration_seconds.observe(duration, method, route_path)
@@ -0,0 +1,19 @@
+"""自定义响应类"""
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+
+from ..utils.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """使用可插拔序列化器（优先orjson）编码的JSON响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class PreEncodedJSONResponse(Response):
+    """直接返回已编码JSON字节串的响应，用于缓存的分析结果"""
+
+    media_type = "application/json"
@@ -1,14 +1,31 @@
 """API路由定义"""
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import uuid
 import json
 import datetime
+import itertools
 from ..core.workflow_engine import WorkflowEngine
-from ..services import get_ai_service
+from ..services import PatentQueryService, LocalPatentQueryService, get_patent_query_service
 from ..services.doubao_ai_service_impl import DoubaoAnalysisService
 from ..utils.logger import get_logger
+from ..utils.errors import PatentQueryError
+from ..utils.serialization import dumps
+from ..utils.metrics import get_registry, record_cache_access
+from ..utils.usage import get_usage_tracker, usage_context
+from ..patents import TECHNOLOGY_FIELD_LABELS
+from .responses import PreEncodedJSONResponse
+from .http_cache import (
+    COMPLETED_CACHE_CONTROL,
+    PENDING_CACHE_CONTROL,
+    compute_etag,
+    etag_matches,
+    variant_etag
+)
+from .compression import choose_encoding, precompress
+from .broker import get_broker
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -24,6 +41,8 @@ class AnalysisRequest(BaseModel):
     investmentNeeds: str = ""
     patentStatus: str = "已有专利"
     expectedOutcome: str = "技术转让"
+    # 可选：接收分析进度推送的WebSocket客户端ID
+    client_id: Optional[str] = None
 
 class AnalysisResponse(BaseModel):
     session_id: str
@@ -38,14 +57,55 @@ class AnalysisResult(BaseModel):
     transfer_strategy: Optional[dict] = None
     summary: Optional[str] = None
     error: Optional[str] = None
+    usage: Optional[dict] = None
+
+class SimilarPatentRequest(BaseModel):
+    text: str
+    limit: int = 10
+
+class PatentBatchRequest(BaseModel):
+    patent_ids: List[str]
 
 # 初始化豆包AI服务
 analysis_service = DoubaoAnalysisService()
-analysis_service.initialize({"api_key": "mock_api_key"})  # 实际部署时应从配置中读取
+analysis_service.initialize({"api_key": "mock_api_key", "simulate": True})  # 实际部署时应从配置中读取
 
 # 模拟数据库存储分析请求和结果
 session_store = {}
 
+# 专利查询服务，由API服务启动时按配置中的 patent_query 项创建
+patent_service: Optional[PatentQueryService] = None
+
+def configure_patent_service(config: Optional[dict]) -> Optional[PatentQueryService]:
+    """
+    按配置创建专利查询服务，未配置 patent_query 时不提供专利查询接口
+    
+    Args:
+        config: 完整配置字典
+        
+    Returns:
+        PatentQueryService: 专利查询服务实例，未配置时为None
+    """
+    global patent_service
+    if (config or {}).get("patent_query"):
+        patent_service = get_patent_query_service(config)
+    return patent_service
+
+def require_patent_service() -> PatentQueryService:
+    """获取已初始化的专利查询服务，未启用时返回503"""
+    if patent_service is None or not patent_service.is_initialized:
+        raise HTTPException(status_code=503, detail="专利查询服务未启用")
+    return patent_service
+
+# 分析任务指标
+analysis_pending = get_registry().gauge("analysis_pending", "排队或执行中的分析任务数")
+analysis_completed_total = get_registry().counter(
+    "analysis_completed_total", "已结束的分析任务数", ("status",)
+)
+get_registry().gauge("analysis_session_store_size", "会话存储中的会话数").set_function(
+    lambda: len(session_store)
+)
+
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_scientific_achievement(request: AnalysisRequest, background_tasks: BackgroundTasks):
     """分析科研成果"""
@@ -61,9 +121,10 @@ async def analyze_scientific_achievement(request: AnalysisRequest, background_ta
             "created_at": datetime.datetime.now().isoformat()
         }
         
-        logger.info(f"创建分析会话 {session_id}: {request.title}")
+        logger.info("创建分析会话 %s: %s", session_id, request.title)
         
         # 异步启动分析过程
+        analysis_pending.inc()
         background_tasks.add_task(perform_analysis, session_id, request)
         
         return AnalysisResponse(
@@ -73,13 +134,33 @@ async def analyze_scientific_achievement(request: AnalysisRequest, background_ta
         )
         
     except Exception as e:
-        logger.error(f"分析请求处理错误: {str(e)}")
+        logger.error("分析请求处理错误: %s", e)
         raise HTTPException(status_code=500, detail=f"处理分析请求时发生错误: {str(e)}")
 
+async def publish_progress(request: AnalysisRequest, session_id: str, stage: str, status: str = "running"):
+    """向发起分析的WebSocket客户端推送进度，客户端可连接在任意工作进程"""
+    if not request.client_id:
+        return
+    try:
+        await get_broker().publish(request.client_id, {
+            "type": "analysis_progress",
+            "session_id": session_id,
+            "stage": stage,
+            "status": status
+        })
+    except Exception as e:
+        logger.warning("推送分析进度失败 %s: %s", session_id, e)
+
 async def perform_analysis(session_id: str, request: AnalysisRequest):
     """后台执行实际分析的函数"""
+    # 本次分析中的模型调用用量都归属到该会话
+    with usage_context(session_id=session_id, endpoint="/api/analyze"):
+        await run_analysis(session_id, request)
+
+async def run_analysis(session_id: str, request: AnalysisRequest):
+    """执行分析各阶段并保存结果"""
     try:
-        logger.info(f"开始分析会话 {session_id}")
+        logger.info("开始分析会话 %s", session_id)
         
         # 构建分析输入
         analysis_input = {
@@ -94,22 +175,33 @@ async def perform_analysis(session_id: str, request: AnalysisRequest):
             "expected_outcome": request.expectedOutcome
         }
         
-        # 调用豆包AI服务进行各项分析
-        market_analysis = await analysis_service.analyze_market(
-            f"分析'{request.title}'在{request.field}领域的市场潜力，考虑{request.keywords}等关键词"
+        # 调用豆包AI服务进行各项分析，提示词由模板注册表统一生成（按会话ID做A/B分流）
+        await publish_progress(request, session_id, "market")
+        template, prompt = analysis_service.render_prompt(
+            "market", key=session_id, title=request.title, field=request.field, keywords=request.keywords
         )
+        with usage_context(stage="market", template=template.key):
+            market_analysis = await analysis_service.analyze_market(prompt)
         
-        patent_analysis = await analysis_service.analyze_patent(
-            f"分析{request.field}领域的专利情况，成果名称：{request.title}，专利状态：{request.patentStatus}"
+        await publish_progress(request, session_id, "patent")
+        template, prompt = analysis_service.render_prompt(
+            "patent", key=session_id, title=request.title, field=request.field, patent_status=request.patentStatus
         )
+        with usage_context(stage="patent", template=template.key):
+            patent_analysis = await analysis_service.analyze_patent(prompt)
         
-        transfer_strategy = await analysis_service.generate_strategy(
-            f"为{request.title}制定转化策略，考虑{request.maturity}的技术成熟度和{request.expectedOutcome}的预期转化方式"
+        await publish_progress(request, session_id, "strategy")
+        template, prompt = analysis_service.render_prompt(
+            "strategy", key=session_id, title=request.title, maturity=request.maturity,
+            expected_outcome=request.expectedOutcome
         )
+        with usage_context(stage="strategy", template=template.key):
+            transfer_strategy = await analysis_service.generate_strategy(prompt)
         
-        summary = await analysis_service.generate_summary(
-            f"总结{request.title}的分析，包括市场前景、专利情况和转化策略"
-        )
+        await publish_progress(request, session_id, "summary")
+        template, prompt = analysis_service.render_prompt("summary", key=session_id, title=request.title)
+        with usage_context(stage="summary", template=template.key):
+            summary = await analysis_service.generate_summary(prompt)
         
         # 构建分析结果
         result = {
@@ -138,33 +230,181 @@ async def perform_analysis(session_id: str, request: AnalysisRequest):
         session_store[session_id]["status"] = "completed"
         session_store[session_id]["result"] = result
         session_store[session_id]["completed_at"] = datetime.datetime.now().isoformat()
+        # 用量汇总随结果一起保存
+        session_store[session_id]["usage"] = get_usage_tracker().pop_session(session_id)
+        
+        # 已完成的结果不再变化，预先编码响应体，后续轮询直接返回字节串
+        encoded_result = dumps(
+            build_analysis_result(session_id, session_store[session_id]).model_dump()
+        )
+        session_store[session_id]["encoded_result"] = encoded_result
+        session_store[session_id]["etag"] = compute_etag(encoded_result)
+        # 预压缩各编码版本，压缩开销每个结果只付出一次
+        session_store[session_id]["encoded_variants"] = precompress(encoded_result)
         
-        logger.info(f"分析完成会话 {session_id}")
+        analysis_completed_total.inc("completed")
+        await publish_progress(request, session_id, "done", "completed")
+        logger.info("分析完成会话 %s", session_id)
         
     except Exception as e:
         error_msg = str(e)
         session_store[session_id]["status"] = "error"
         session_store[session_id]["error"] = error_msg
         session_store[session_id]["completed_at"] = datetime.datetime.now().isoformat()
-        logger.error(f"分析错误会话 {session_id}: {error_msg}")
+        session_store[session_id]["usage"] = get_usage_tracker().pop_session(session_id)
+        analysis_completed_total.inc("error")
+        await publish_progress(request, session_id, "done", "error")
+        logger.error("分析错误会话 %s: %s", session_id, error_msg)
+    finally:
+        analysis_pending.dec()
+
+def build_analysis_result(session_id: str, session: dict) -> AnalysisResult:
+    """根据会话数据构建分析结果模型"""
+    result = session["result"] or {}
+    return AnalysisResult(
+        session_id=session_id,
+        status=session["status"],
+        market_analysis=result.get("market_analysis"),
+        patent_analysis=result.get("patent_analysis"),
+        transfer_strategy=result.get("transfer_strategy"),
+        summary=result.get("summary"),
+        error=session.get("error"),
+        usage=session.get("usage")
+    )
 
 @router.get("/result/{session_id}", response_model=AnalysisResult)
-async def get_analysis_result(session_id: str):
+async def get_analysis_result(session_id: str, request: Request, response: Response):
     """获取分析结果"""
     if session_id not in session_store:
         raise HTTPException(status_code=404, detail="会话不存在")
     
     session = session_store[session_id]
     
-    return AnalysisResult(
-        session_id=session_id,
-        status=session["status"],
-        market_analysis=session["result"].get("market_analysis") if session["result"] else None,
-        patent_analysis=session["result"].get("patent_analysis") if session["result"] else None,
-        transfer_strategy=session["result"].get("transfer_strategy") if session["result"] else None,
-        summary=session["result"].get("summary") if session["result"] else None,
-        error=session.get("error")
-    )
+    # 已完成的会话直接返回预编码（及预压缩）的响应体，并支持条件请求
+    encoded_result = session.get("encoded_result")
+    if encoded_result is not None:
+        variants = session.get("encoded_variants", {})
+        encoding = choose_encoding(request.headers.get("accept-encoding"), list(variants))
+        etag = variant_etag(session["etag"], encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": COMPLETED_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # 条件请求命中即客户端缓存仍然有效
+            hit = etag_matches(if_none_match, etag)
+            record_cache_access("result_etag", hit)
+            if hit:
+                return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return PreEncodedJSONResponse(content=variants[encoding], headers=headers)
+        return PreEncodedJSONResponse(content=encoded_result, headers=headers)
+    
+    response.headers["Cache-Control"] = PENDING_CACHE_CONTROL
+    return build_analysis_result(session_id, session)
+
+@router.get("/usage")
+async def get_usage_summary():
+    """获取全局模型调用用量汇总（按接口、节点、阶段、模型分组）"""
+    return get_usage_tracker().summary()
+
+@router.get("/usage/{session_id}")
+async def get_session_usage(session_id: str):
+    """获取单个分析会话的模型调用用量"""
+    if session_id not in session_store:
+        raise HTTPException(status_code=404, detail="会话不存在")
+    
+    session = session_store[session_id]
+    if "usage" in session:
+        usage = session["usage"]
+    else:
+        # 分析仍在进行，返回当前已累计的用量
+        usage = get_usage_tracker().get_session(session_id)
+    return {"session_id": session_id, "status": session["status"], "usage": usage}
+
+@router.get("/patents/fields")
+async def get_patent_field_counts():
+    """获取各技术领域的专利数，用于前端的领域选择"""
+    service = require_patent_service()
+    if not isinstance(service, LocalPatentQueryService):
+        raise HTTPException(status_code=501, detail="当前专利查询服务不支持领域统计")
+    counts = service.technology_field_counts()
+    return {
+        "fields": [
+            {"value": field, "label": label, "count": counts.get(field, 0)}
+            for field, label in TECHNOLOGY_FIELD_LABELS.items()
+        ]
+    }
+
+# 流式检索单次请求返回的最大结果数，更多结果通过游标继续获取
+MAX_STREAM_LIMIT = 1000
+
+@router.get("/patents/search")
+async def search_patents(q: str = "", limit: int = 100, cursor: Optional[str] = None):
+    """
+    以NDJSON流式返回关键词检索结果
+
+    每行一条专利（附带可从该条之后继续的cursor），最后一行为 {"next_cursor": ...}，
+    没有更多结果时为null；传入cursor时从该位置之后继续，可省略q。
+    """
+    service = require_patent_service()
+    limit = max(1, min(limit, MAX_STREAM_LIMIT))
+    if isinstance(service, LocalPatentQueryService):
+        try:
+            results = itertools.islice(service.iter_keyword_results(q or None, cursor), limit)
+        except PatentQueryError as e:
+            if e.error_code == "INVALID_CURSOR":
+                raise HTTPException(status_code=400, detail=e.message)
+            raise
+    elif cursor:
+        raise HTTPException(status_code=501, detail="当前专利查询服务不支持游标分页")
+    else:
+        results = iter(service.query_by_keyword(q, limit))
+
+    def lines():
+        count, last = 0, None
+        for result in results:
+            count, last = count + 1, result
+            yield dumps(result) + b"\n"
+        next_cursor = last.get("cursor") if last is not None and count == limit else None
+        yield dumps({"next_cursor": next_cursor}) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# 批量获取专利详情单次请求的最大专利数
+MAX_BATCH_PATENTS = 500
+
+@router.post("/patents/batch")
+async def get_patent_details_batch(request: PatentBatchRequest):
+    """批量获取专利详情，结果按请求顺序返回，未找到的专利号列在missing中"""
+    service = require_patent_service()
+    if len(request.patent_ids) > MAX_BATCH_PATENTS:
+        raise HTTPException(status_code=400, detail=f"单次最多查询{MAX_BATCH_PATENTS}件专利")
+    return service.get_patent_details_bulk(request.patent_ids)
+
+@router.post("/patents/similar")
+async def search_similar_patents(request: SimilarPatentRequest):
+    """检索与科研成果描述相似的专利（现有技术）"""
+    service = require_patent_service()
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="检索文本不能为空")
+    return {"results": service.search_similar(request.text, max(1, min(request.limit, 100)))}
+
+@router.get("/patents/{patent_id}/citations")
+async def get_patent_citations(patent_id: str, limit: int = 20):
+    """获取专利的引用、被引、逐年被引次数和影响力得分"""
+    service = require_patent_service()
+    if not isinstance(service, LocalPatentQueryService):
+        raise HTTPException(status_code=501, detail="当前专利查询服务不支持引用分析")
+    try:
+        return service.get_patent_citations(patent_id, max(1, min(limit, 100)))
+    except PatentQueryError as e:
+        if e.error_code == "PATENT_NOT_FOUND":
+            raise HTTPException(status_code=404, detail=e.message)
+        raise
 
 # 注意：simulate_analysis 函数已被 perform_analysis 函数替代，该函数直接使用豆包AI服务
 # 不再需要模拟分析，而是通过BackgroundTasks异步执行实际分析
@@ -179,6 +419,6 @@ async def get_config():
     """获取API配置信息"""
     return {
         "api_version": "1.0.0",
-        "supported_methods": ["analyze", "result", "health", "config"],
+        "supported_methods": ["analyze", "result", "usage", "patents", "health", "config"],
         "docs_url": "/docs"
     }
\ No newline at end of file
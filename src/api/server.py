@@ -1,32 +1,110 @@
 """FastAPI服务器配置"""
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import uvicorn
 import json
 import asyncio
-from typing import Dict
+from typing import Dict, Optional
 
-from .routes import router
+from .routes import router, configure_patent_service
+from .responses import FastJSONResponse
+from .compression import CompressionMiddleware, configure_compression
+from .ws_outbound import OutboundQueue
+from .broker import configure_broker, get_broker
+from .ws_codec import FrameCodec, JSONFrameCodec, negotiate_codec
 from ..config.config_loader import load_config
-from ..utils.logger import get_logger
+from ..utils.logger import get_logger, configure_logging
+from ..utils.tracing import configure_tracing, get_prometheus_exporter, get_tracer
+from ..utils.metrics import get_registry
+from ..utils.usage import configure_usage, usage_context
+from .metrics import MetricsMiddleware
 from ..services import get_analysis_service
+from ..services.prompt_templates import configure_prompt_templates
 
-logger = get_logger(__name__)
 config = load_config()
+configure_logging(**config.get('logging', {}))
+configure_tracing(**config.get('tracing', {}))
+configure_usage(**config.get('usage', {}))
+configure_prompt_templates(**config.get('prompt_templates', {}))
+logger = get_logger(__name__)
+
+# WebSocket关闭码
+CLOSE_CODE_GOING_AWAY = 1001
+CLOSE_CODE_TRY_AGAIN_LATER = 1013
 
 # 连接管理器类
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
         # 存储活动连接
         self.active_connections: Dict[str, WebSocket] = {}
         # 存储对话历史
         self.conversation_history: Dict[str, list] = {}
+        # 每个连接的出站发送队列
+        self.outbound_queues: Dict[str, OutboundQueue] = {}
+        # 每个连接协商的帧编解码器
+        self.codecs: Dict[str, FrameCodec] = {}
+        self.send_queue_size = settings.get('send_queue_size', 100)
+        self.overflow_policy = settings.get('overflow_policy', 'drop_oldest')
+        self.send_timeout = settings.get('send_timeout', 10.0)
+        # 连接数限制
+        self.max_connections = settings.get('max_connections', 1000)
+        self.max_connections_per_ip = settings.get('max_connections_per_ip', 20)
+        self.client_ips: Dict[str, str] = {}
+        self.connections_per_ip: Dict[str, int] = {}
+        # 空闲连接回收
+        self.idle_timeout = settings.get('idle_timeout', 600.0)
+        self.reap_interval = settings.get('reap_interval', 30.0)
+        self.last_activity: Dict[str, float] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+        # 连接统计
+        self.total_connections = 0
+        self.rejected_connections = 0
+        self.reaped_connections = 0
     
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, client_id: str) -> bool:
+        client_ip = websocket.client.host if websocket.client else "unknown"
+        
+        # 同一客户端重新连接时先释放旧连接，不计入连接数限制
+        previous = self.active_connections.get(client_id)
+        if previous is not None:
+            self.disconnect(client_id, previous)
+            asyncio.ensure_future(self._close_websocket(previous, CLOSE_CODE_GOING_AWAY))
+        
+        if len(self.active_connections) >= self.max_connections:
+            self.rejected_connections += 1
+            logger.warning("连接数已达上限 %s，拒绝客户端 %s", self.max_connections, client_id)
+            await websocket.close(code=CLOSE_CODE_TRY_AGAIN_LATER)
+            return False
+        if self.connections_per_ip.get(client_ip, 0) >= self.max_connections_per_ip:
+            self.rejected_connections += 1
+            logger.warning("IP %s 连接数已达上限 %s，拒绝客户端 %s", client_ip, self.max_connections_per_ip, client_id)
+            await websocket.close(code=CLOSE_CODE_TRY_AGAIN_LATER)
+            return False
+        
+        # 客户端请求MessagePack子协议时使用二进制帧，否则保持JSON文本帧
+        codec = negotiate_codec(websocket)
+        await websocket.accept(subprotocol=codec.subprotocol)
         self.active_connections[client_id] = websocket
+        self.codecs[client_id] = codec
         self.conversation_history[client_id] = []
-        logger.info(f"客户端 {client_id} 已连接")
+        self.client_ips[client_id] = client_ip
+        self.connections_per_ip[client_ip] = self.connections_per_ip.get(client_ip, 0) + 1
+        self.total_connections += 1
+        self.touch(client_id)
+        queue = OutboundQueue(
+            websocket,
+            client_id,
+            max_size=self.send_queue_size,
+            overflow_policy=self.overflow_policy,
+            send_timeout=self.send_timeout,
+            on_close=lambda closed_id: self.disconnect(closed_id, websocket),
+            codec=codec
+        )
+        self.outbound_queues[client_id] = queue
+        queue.start()
+        logger.info("客户端 %s 已连接", client_id)
         
         # 发送欢迎消息
         welcome_message = {
@@ -34,18 +112,133 @@ class ConnectionManager:
             "text": "您好！我是科研成果转化分析智能体，很高兴为您提供服务。您可以咨询关于科研成果转化的问题，或者获取详细的成果评估。",
             "timestamp": asyncio.get_event_loop().time()
         }
-        await websocket.send_json(welcome_message)
+        await self.send_personal_message(welcome_message, client_id)
         self.conversation_history[client_id].append(welcome_message)
+        return True
     
-    def disconnect(self, client_id: str):
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        # 指定websocket时只清理该连接，避免旧连接的清理误删重连后的新连接
+        if websocket is not None and self.active_connections.get(client_id) is not websocket:
+            return
         if client_id in self.active_connections:
             del self.active_connections[client_id]
         if client_id in self.conversation_history:
             del self.conversation_history[client_id]
-        logger.info(f"客户端 {client_id} 已断开连接")
+        queue = self.outbound_queues.pop(client_id, None)
+        if queue is not None:
+            queue.close()
+        self.last_activity.pop(client_id, None)
+        self.codecs.pop(client_id, None)
+        client_ip = self.client_ips.pop(client_id, None)
+        if client_ip is not None:
+            remaining = self.connections_per_ip.get(client_ip, 1) - 1
+            if remaining > 0:
+                self.connections_per_ip[client_ip] = remaining
+            else:
+                self.connections_per_ip.pop(client_ip, None)
+        logger.info("客户端 %s 已断开连接", client_id)
+    
+    def get_codec(self, client_id: str) -> FrameCodec:
+        """获取连接使用的帧编解码器"""
+        return self.codecs.get(client_id) or JSONFrameCodec()
+    
+    def touch(self, client_id: str):
+        """记录客户端最近一次活动时间"""
+        self.last_activity[client_id] = asyncio.get_event_loop().time()
     
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
+    async def send_personal_message(self, message: dict, client_id: str):
+        # 只负责入队，由连接的写协程发送，慢客户端不会阻塞消息处理
+        queue = self.outbound_queues.get(client_id)
+        if queue is not None:
+            queue.put(message)
+    
+    async def deliver_local(self, client_id: str, message: dict) -> bool:
+        """
+        投递消息给本进程持有的连接（消息后端的投递回调）
+        
+        Returns:
+            bool: 客户端连接在本进程时返回True
+        """
+        if client_id not in self.outbound_queues:
+            return False
+        await self.send_personal_message(message, client_id)
+        return True
+    
+    async def publish(self, client_id: str, message: dict):
+        """向客户端发布消息，客户端可以连接在任意工作进程"""
+        if await self.deliver_local(client_id, message):
+            return
+        await get_broker().publish(client_id, message)
+    
+    def queue_stats(self) -> Dict[str, dict]:
+        """获取所有连接的发送队列指标"""
+        return {client_id: queue.stats() for client_id, queue in self.outbound_queues.items()}
+    
+    def reap_idle_connections(self) -> int:
+        """
+        回收超过空闲时间的连接及其对话历史
+        
+        Returns:
+            int: 回收的连接数
+        """
+        now = asyncio.get_event_loop().time()
+        reaped = 0
+        for client_id, last_seen in list(self.last_activity.items()):
+            if now - last_seen <= self.idle_timeout:
+                continue
+            websocket = self.active_connections.get(client_id)
+            logger.info("客户端 %s 空闲超时，回收连接", client_id)
+            self.disconnect(client_id)
+            if websocket is not None:
+                asyncio.ensure_future(self._close_websocket(websocket, CLOSE_CODE_GOING_AWAY))
+            reaped += 1
+        
+        # 清理没有对应连接的孤立对话历史
+        for client_id in list(self.conversation_history):
+            if client_id not in self.active_connections:
+                del self.conversation_history[client_id]
+        
+        self.reaped_connections += reaped
+        return reaped
+    
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                self.reap_idle_connections()
+            except Exception as e:
+                logger.error("回收空闲连接时出错: %s", e)
+    
+    def start_reaper(self):
+        """启动空闲连接回收任务"""
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reap_loop())
+    
+    def stop_reaper(self):
+        """停止空闲连接回收任务"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+    
+    @staticmethod
+    async def _close_websocket(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+    
+    def connection_stats(self) -> dict:
+        """获取连接统计信息"""
+        return {
+            "active_connections": len(self.active_connections),
+            "conversation_histories": len(self.conversation_history),
+            "unique_ips": len(self.connections_per_ip),
+            "total_connections": self.total_connections,
+            "rejected_connections": self.rejected_connections,
+            "reaped_connections": self.reaped_connections,
+            "send_queue_depth": sum(queue.depth for queue in self.outbound_queues.values()),
+            "send_queue_dropped": sum(queue.dropped for queue in self.outbound_queues.values()),
+        }
     
     def add_to_history(self, client_id: str, message: dict):
         if client_id in self.conversation_history:
@@ -54,7 +247,25 @@ class ConnectionManager:
             if len(self.conversation_history[client_id]) > 50:
                 self.conversation_history[client_id] = self.conversation_history[client_id][-50:]
 
-manager = ConnectionManager()
+manager = ConnectionManager(config.get('api', {}).get('websocket', {}))
+
+registry = get_registry()
+
+# WebSocket连接指标在抓取时从连接管理器读取
+_ws_metrics = [
+    ("gauge", "ws_active_connections", "活动WebSocket连接数", "active_connections"),
+    ("gauge", "ws_conversation_histories", "保存的对话历史数", "conversation_histories"),
+    ("gauge", "ws_unique_client_ips", "已连接的客户端IP数", "unique_ips"),
+    ("counter", "ws_connections_total", "累计接受的WebSocket连接数", "total_connections"),
+    ("counter", "ws_connections_rejected_total", "因连接数限制拒绝的连接数", "rejected_connections"),
+    ("counter", "ws_connections_reaped_total", "因空闲被回收的连接数", "reaped_connections"),
+    ("gauge", "ws_send_queue_depth", "出站队列中待发送的消息数", "send_queue_depth"),
+    ("gauge", "ws_send_queue_dropped", "当前连接出站队列累计丢弃的消息数", "send_queue_dropped"),
+]
+for _kind, _name, _doc, _key in _ws_metrics:
+    getattr(registry, _kind)(_name, _doc).set_function(
+        lambda key=_key: manager.connection_stats()[key]
+    )
 
 def create_app():
     """创建FastAPI应用实例"""
@@ -63,7 +274,8 @@ def create_app():
         description="为科研成果提供市场分析、专利评估和转化策略的智能服务API",
         version="1.0.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        default_response_class=FastJSONResponse
     )
     
     # 配置CORS中间件，允许前端跨域访问
@@ -80,19 +292,36 @@ def create_app():
         allow_headers=["*"],
     )
     
+    # 配置跨进程消息后端
+    broker = configure_broker(config.get('api', {}).get('broker'))
+    
+    # 配置响应压缩中间件，大体积报告按 br/gzip 压缩后传输
+    compression_settings = configure_compression(config.get('api', {}).get('compression'))
+    if compression_settings["enabled"]:
+        app.add_middleware(CompressionMiddleware)
+    
+    # 请求指标中间件放在最外层，统计包含压缩在内的完整耗时
+    app.add_middleware(MetricsMiddleware)
+    
     # 初始化服务
     analysis_service = get_analysis_service()
+    patent_service = configure_patent_service(config)
     
     # WebSocket 端点
     @app.websocket("/ws/{client_id}")
     async def websocket_endpoint(websocket: WebSocket, client_id: str):
-        await manager.connect(websocket, client_id)
+        if not await manager.connect(websocket, client_id):
+            return
+        codec = manager.get_codec(client_id)
         
         try:
             while True:
                 # 接收客户端消息
-                data = await websocket.receive_text()
-                logger.info(f"收到客户端 {client_id} 的消息: {data}")
+                data = await codec.receive_text(websocket)
+                manager.touch(client_id)
+                if data is None:
+                    continue
+                logger.debug("收到客户端 %s 的消息: %s", client_id, data)
                 
                 # 构建用户消息对象
                 user_message = {
@@ -105,10 +334,10 @@ def create_app():
                 manager.add_to_history(client_id, user_message)
                 
                 # 发送确认消息给客户端（回显）
-                await manager.send_personal_message(user_message, websocket)
+                await manager.send_personal_message(user_message, client_id)
                 
                 # 准备AI响应
-                await manager.send_personal_message({"sender": "bot", "is_typing": True}, websocket)
+                await manager.send_personal_message({"sender": "bot", "is_typing": True}, client_id)
                 
                 try:
                     # 获取对话历史上下文
@@ -117,18 +346,19 @@ def create_app():
                     
                     # 调用分析服务获取智能体响应
                     # 这里根据实际服务接口调整参数
-                    response_text = await asyncio.to_thread(
-                        analysis_service.analyze_text,
-                        data,  # 用户当前消息
-                        context=context  # 对话历史上下文
-                    )
+                    with usage_context(endpoint="/ws/{client_id}", stage="chat"):
+                        response_text = await asyncio.to_thread(
+                            analysis_service.analyze_text,
+                            data,  # 用户当前消息
+                            context=context  # 对话历史上下文
+                        )
                     
                     # 如果没有得到有效响应，使用默认回复
                     if not response_text or response_text.strip() == "":
                         response_text = "抱歉，我无法理解您的问题。请尝试用不同的方式表述，或者提出关于科研成果转化的具体问题。"
                     
                 except Exception as e:
-                    logger.error(f"处理消息时出错: {str(e)}")
+                    logger.error("处理消息时出错: %s", e)
                     response_text = "抱歉，处理您的请求时发生了错误。请稍后再试。"
                 
                 # 构建AI响应消息
@@ -142,14 +372,14 @@ def create_app():
                 manager.add_to_history(client_id, bot_message)
                 
                 # 发送AI响应
-                await manager.send_personal_message({"sender": "bot", "is_typing": False}, websocket)
-                await manager.send_personal_message(bot_message, websocket)
+                await manager.send_personal_message({"sender": "bot", "is_typing": False}, client_id)
+                await manager.send_personal_message(bot_message, client_id)
                 
         except WebSocketDisconnect:
-            manager.disconnect(client_id)
+            manager.disconnect(client_id, websocket)
         except Exception as e:
-            logger.error(f"WebSocket错误: {str(e)}")
-            manager.disconnect(client_id)
+            logger.error("WebSocket错误: %s", e)
+            manager.disconnect(client_id, websocket)
     
     # 注册路由
     app.include_router(router, prefix="/api")
@@ -168,15 +398,32 @@ def create_app():
     async def health_check():
         return {"status": "healthy"}
     
+    # 指标端点（Prometheus文本格式）
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        text = registry.render()
+        span_exporter = get_prometheus_exporter()
+        if span_exporter is not None:
+            text += span_exporter.render()
+        return text
+    
     # 启动事件
     @app.on_event("startup")
     async def startup_event():
+        manager.start_reaper()
+        await broker.start(manager.deliver_local)
         logger.info("API服务启动成功")
-        logger.info(f"文档地址: http://localhost:{config.get('api', {}).get('port', 8000)}/docs")
+        logger.info("文档地址: http://localhost:%s/docs", config.get('api', {}).get('port', 8000))
     
     # 关闭事件
     @app.on_event("shutdown")
     async def shutdown_event():
+        manager.stop_reaper()
+        await broker.stop()
+        if patent_service is not None:
+            patent_service.shutdown()
+        # 刷新并关闭span导出文件，避免丢失最后一批记录
+        get_tracer().shutdown()
         logger.info("API服务正在关闭")
     
     return app
@@ -190,14 +437,23 @@ def run_server():
     port = api_config.get('port', 8000)
     host = api_config.get('host', '0.0.0.0')
     reload = api_config.get('reload', False)
+    # WebSocket 启用 permessage-deflate 压缩
+    ws_per_message_deflate = api_config.get('compression', {}).get('websocket_deflate', True)
+    # 协议层ping/pong心跳，及时发现半开连接
+    ws_config = api_config.get('websocket', {})
+    ws_ping_interval = ws_config.get('ping_interval', 20.0)
+    ws_ping_timeout = ws_config.get('ping_timeout', 20.0)
     
-    logger.info(f"启动API服务器: {host}:{port}")
+    logger.info("启动API服务器: %s:%s", host, port)
     
     uvicorn.run(
         "src.api.server:app",
         host=host,
         port=port,
-        reload=reload
+        reload=reload,
+        ws_per_message_deflate=ws_per_message_deflate,
+        ws_ping_interval=ws_ping_interval,
+        ws_ping_timeout=ws_ping_timeout
     )
 
 if __name__ == "__main__":
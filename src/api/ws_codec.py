@@ -0,0 +1,177 @@
+"""
+WebSocket帧编解码
+
+默认使用JSON文本帧，与前端 useWebSocket 保持兼容；客户端在握手时
+请求 MSGPACK_SUBPROTOCOL 子协议并且服务端安装了 msgpack 时，改用紧凑的
+MessagePack二进制帧。
+
+MessagePack帧为数组，首元素为帧类型：
+    [FRAME_MESSAGE, 发送方, 文本, 毫秒时间戳]
+    [FRAME_TYPING, 发送方, 是否输入中]
+    [FRAME_ACK, 毫秒时间戳]          用户消息的确认（替代完整回显）
+    [FRAME_DELTA, 序号, 增量文本]     流式回复的增量片段
+    [FRAME_GENERIC, 原始消息]         其他消息（如分析进度）
+"""
+from typing import Optional, Union
+
+from fastapi import WebSocket
+
+from ..utils.serialization import dumps_str
+
+try:
+    import msgpack
+except ImportError:  # msgpack 为可选依赖
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = "sa.msgpack.v1"
+
+# 帧类型
+FRAME_GENERIC = 0
+FRAME_MESSAGE = 1
+FRAME_TYPING = 2
+FRAME_ACK = 3
+FRAME_DELTA = 4
+
+# 发送方编码
+SENDER_CODES = {"bot": 0, "user": 1}
+SENDER_NAMES = {code: name for name, code in SENDER_CODES.items()}
+
+
+class FrameCodec:
+    """
+    WebSocket帧编解码器基类
+    """
+
+    name = "base"
+    subprotocol: Optional[str] = None
+    binary = False
+
+    def encode(self, message: dict) -> Union[str, bytes]:
+        """
+        编码出站消息
+
+        Args:
+            message: 消息字典
+
+        Returns:
+            文本帧返回str，二进制帧返回bytes
+        """
+        raise NotImplementedError("子类必须实现encode方法")
+
+    async def send(self, websocket: WebSocket, message: dict) -> None:
+        """编码并发送消息"""
+        data = self.encode(message)
+        if self.binary:
+            await websocket.send_bytes(data)
+        else:
+            await websocket.send_text(data)
+
+    async def receive_text(self, websocket: WebSocket) -> Optional[str]:
+        """
+        接收一条客户端消息并返回其中的文本
+
+        Returns:
+            str: 用户输入文本；收到不含文本的控制帧时返回None
+        """
+        raise NotImplementedError("子类必须实现receive_text方法")
+
+
+class JSONFrameCodec(FrameCodec):
+    """
+    JSON文本帧编解码器（默认）
+    """
+
+    name = "json"
+
+    def encode(self, message: dict) -> str:
+        return dumps_str(message)
+
+    async def receive_text(self, websocket: WebSocket) -> Optional[str]:
+        return await websocket.receive_text()
+
+
+class MsgPackFrameCodec(FrameCodec):
+    """
+    MessagePack二进制帧编解码器
+    """
+
+    name = "msgpack"
+    subprotocol = MSGPACK_SUBPROTOCOL
+    binary = True
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("未安装 msgpack")
+
+    @staticmethod
+    def _timestamp_ms(message: dict) -> int:
+        return int(message.get("timestamp", 0) * 1000)
+
+    def to_frame(self, message: dict) -> list:
+        """
+        将消息字典转换为紧凑帧
+
+        Args:
+            message: 消息字典
+
+        Returns:
+            list: 帧数组
+        """
+        sender = SENDER_CODES.get(message.get("sender"))
+        if sender is not None and "is_typing" in message and "text" not in message:
+            return [FRAME_TYPING, sender, bool(message["is_typing"])]
+        if sender == SENDER_CODES["user"] and "text" in message:
+            return [FRAME_ACK, self._timestamp_ms(message)]
+        if sender is not None and "text" in message:
+            return [FRAME_MESSAGE, sender, message["text"], self._timestamp_ms(message)]
+        if message.get("type") == "delta":
+            return [FRAME_DELTA, message.get("seq", 0), message.get("text", "")]
+        return [FRAME_GENERIC, message]
+
+    def encode(self, message: dict) -> bytes:
+        return msgpack.packb(self.to_frame(message), use_bin_type=True)
+
+    async def receive_text(self, websocket: WebSocket) -> Optional[str]:
+        frame = msgpack.unpackb(await websocket.receive_bytes(), raw=False)
+        if isinstance(frame, list) and frame and frame[0] == FRAME_MESSAGE:
+            return frame[2]
+        return None
+
+
+def decode_frame(data: bytes) -> dict:
+    """
+    将MessagePack帧还原为与JSON帧一致的消息字典（用于测试和调试）
+
+    Args:
+        data: 二进制帧
+
+    Returns:
+        dict: 消息字典
+    """
+    frame = msgpack.unpackb(data, raw=False)
+    frame_type = frame[0]
+    if frame_type == FRAME_MESSAGE:
+        return {"sender": SENDER_NAMES[frame[1]], "text": frame[2], "timestamp": frame[3] / 1000}
+    if frame_type == FRAME_TYPING:
+        return {"sender": SENDER_NAMES[frame[1]], "is_typing": frame[2]}
+    if frame_type == FRAME_ACK:
+        return {"type": "ack", "timestamp": frame[1] / 1000}
+    if frame_type == FRAME_DELTA:
+        return {"type": "delta", "seq": frame[1], "text": frame[2]}
+    return frame[1]
+
+
+def negotiate_codec(websocket: WebSocket) -> FrameCodec:
+    """
+    根据握手时客户端请求的子协议选择编解码器
+
+    Args:
+        websocket: 尚未accept的WebSocket连接
+
+    Returns:
+        FrameCodec: 选中的编解码器，默认JSON
+    """
+    requested = websocket.scope.get("subprotocols") or []
+    if msgpack is not None and MSGPACK_SUBPROTOCOL in requested:
+        return MsgPackFrameCodec()
+    return JSONFrameCodec()
@@ -0,0 +1,209 @@
+"""WebSocket出站消息队列：每个连接一个有界队列，由独立的写协程发送"""
+import asyncio
+from collections import deque
+from typing import Callable, Optional
+
+from fastapi import WebSocket
+
+from ..utils.logger import get_logger
+from .ws_codec import FrameCodec, JSONFrameCodec
+
+logger = get_logger(__name__)
+
+# 队列满时的处理策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_CLOSE = "close"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_CLOSE)
+
+# 客户端跟不上时使用的关闭码（1013: Try Again Later）
+CLOSE_CODE_SLOW_CONSUMER = 1013
+
+
+def is_typing_frame(message: dict) -> bool:
+    """判断是否为仅包含输入状态的消息"""
+    return "is_typing" in message and "text" not in message
+
+
+class OutboundQueue:
+    """
+    单个WebSocket连接的有界发送队列
+
+    处理协程只负责入队，实际发送由写协程完成，慢客户端不会阻塞消息处理；
+    连续的输入状态消息会被合并，队列满时按配置的策略丢弃或关闭连接。
+    """
+
+    def __init__(self, websocket: WebSocket, client_id: str,
+                 max_size: int = 100,
+                 overflow_policy: str = OVERFLOW_DROP_OLDEST,
+                 send_timeout: float = 10.0,
+                 on_close: Optional[Callable[[str], None]] = None,
+                 codec: Optional[FrameCodec] = None):
+        """
+        初始化发送队列
+
+        Args:
+            websocket: WebSocket连接
+            client_id: 客户端ID
+            max_size: 队列最大长度
+            overflow_policy: 队列满时的策略（drop_oldest/drop_newest/close）
+            send_timeout: 单条消息发送超时（秒），超时视为客户端跟不上
+            on_close: 写协程因错误退出时的回调
+            codec: 帧编解码器，默认JSON文本帧
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的队列溢出策略: {overflow_policy}")
+
+        self.websocket = websocket
+        self.client_id = client_id
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self._on_close = on_close
+        self.codec = codec or JSONFrameCodec()
+
+        self._queue = deque()
+        self._not_empty = asyncio.Event()
+        self._pending_typing: Optional[dict] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # 队列指标
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        """当前队列深度"""
+        return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        """队列是否已关闭"""
+        return self._closed
+
+    def start(self) -> None:
+        """启动写协程"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    def put(self, message: dict) -> bool:
+        """
+        将消息放入发送队列
+
+        Args:
+            message: 待发送的消息
+
+        Returns:
+            bool: 消息是否被接受（合并也视为接受）
+        """
+        if self._closed:
+            return False
+
+        # 合并尚未发出的输入状态消息，只保留最新状态
+        if is_typing_frame(message):
+            if self._pending_typing is not None:
+                self._pending_typing.update(message)
+                self.coalesced += 1
+                return True
+
+        if len(self._queue) >= self.max_size:
+            if self.overflow_policy == OVERFLOW_DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.overflow_policy == OVERFLOW_CLOSE:
+                logger.warning("客户端 %s 发送队列已满，关闭连接", self.client_id)
+                self.dropped += 1 + len(self._queue)
+                self.close(CLOSE_CODE_SLOW_CONSUMER)
+                return False
+            dropped_message = self._queue.popleft()
+            if dropped_message is self._pending_typing:
+                self._pending_typing = None
+            self.dropped += 1
+
+        if is_typing_frame(message):
+            # 复制一份，后续合并时原地修改不影响调用方
+            message = dict(message)
+            self._pending_typing = message
+        self._queue.append(message)
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._not_empty.set()
+        return True
+
+    async def _run(self) -> None:
+        """写协程：逐条取出消息并发送"""
+        try:
+            while not self._closed:
+                if not self._queue:
+                    self._not_empty.clear()
+                    await self._not_empty.wait()
+                    continue
+
+                message = self._queue.popleft()
+                if message is self._pending_typing:
+                    self._pending_typing = None
+
+                await asyncio.wait_for(
+                    self.codec.send(self.websocket, message),
+                    timeout=self.send_timeout
+                )
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning("客户端 %s 发送超时，关闭连接", self.client_id)
+            self._shutdown(CLOSE_CODE_SLOW_CONSUMER)
+        except Exception as e:
+            logger.error("客户端 %s 消息发送失败: %s", self.client_id, e)
+            self._shutdown(None)
+
+    def _shutdown(self, code: Optional[int]) -> None:
+        """写协程异常退出后的清理"""
+        self._closed = True
+        self._queue.clear()
+        self._pending_typing = None
+        if code is not None:
+            asyncio.ensure_future(self._close_socket(code))
+        if self._on_close is not None:
+            self._on_close(self.client_id)
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def close(self, code: Optional[int] = None) -> None:
+        """
+        关闭队列并停止写协程
+
+        Args:
+            code: 若提供则同时以该关闭码关闭WebSocket
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.clear()
+        self._pending_typing = None
+        self._not_empty.set()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if code is not None:
+            asyncio.ensure_future(self._close_socket(code))
+
+    def stats(self) -> dict:
+        """
+        获取队列指标
+
+        Returns:
+            dict: 队列深度、历史最大深度、已发送/丢弃/合并数量
+        """
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
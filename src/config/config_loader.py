@@ -1,6 +1,29 @@
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+# API服务配置文件的默认路径，可通过环境变量 API_CONFIG 指定其他路径
+DEFAULT_API_CONFIG = os.path.join("config", "api_config.json")
+
+
+def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    加载API服务配置（logging、tracing、api、patent_query 等）
+    
+    Args:
+        config_path: 配置文件路径，默认取环境变量 API_CONFIG，未设置时为 config/api_config.json
+        
+    Returns:
+        配置字典，配置文件不存在时返回空字典（各项均使用默认值）
+        
+    Raises:
+        json.JSONDecodeError: 配置文件格式错误
+    """
+    config_path = config_path or os.environ.get("API_CONFIG", DEFAULT_API_CONFIG)
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 class ConfigLoader:
     """
@@ -4,6 +4,8 @@ from src.services import (
     get_analysis_service
 )
 from src.utils import get_logger, log_info, log_error
+from src.utils.tracing import get_tracer
+from src.utils.usage import usage_context
 
 logger = get_logger(__name__)
 
@@ -25,6 +27,7 @@ class WorkflowEngine:
         self.ai_services = {}
         self.ui = None
         self.is_initialized = False
+        self.tracer = get_tracer()
         
         if workflow_config:
             self.initialize_nodes()
@@ -80,6 +83,21 @@ class WorkflowEngine:
             raise ValueError(f"节点 {node_id} 不存在")
         
         node = self.nodes[node_id]
+        with self.tracer.span("workflow.execute_node", node_id=node_id, node_type=node.get('type')), \
+                usage_context(node=node_id):
+            return self._execute_node(node, input_data)
+    
+    def _execute_node(self, node, input_data=None):
+        """
+        执行节点逻辑
+        
+        Args:
+            node: 节点配置
+            input_data: 输入数据
+            
+        Returns:
+            执行结果字典
+        """
         self.current_node = node
         
         # 处理输入数据，更新变量
@@ -167,16 +185,20 @@ class WorkflowEngine:
         """
         conditions = node.get('config', {}).get('conditions', [])
         
-        for condition in conditions:
-            expression = condition.get('expression')
-            next_node = condition.get('next')
+        with self.tracer.span("workflow.evaluate_condition", node_id=node.get('id'),
+                              node_type='condition', conditions=len(conditions)) as span:
+            for index, condition in enumerate(conditions):
+                expression = condition.get('expression')
+                next_node = condition.get('next')
+                
+                # 这里使用简单的表达式解析，实际使用时可以使用更复杂的表达式引擎
+                if self._evaluate_expression(expression):
+                    span.set_attribute('matched', index)
+                    return next_node
             
-            # 这里使用简单的表达式解析，实际使用时可以使用更复杂的表达式引擎
-            if self._evaluate_expression(expression):
-                return next_node
-        
-        # 如果没有条件满足，返回默认的next
-        return node.get('next', '')
+            # 如果没有条件满足，返回默认的next
+            span.set_attribute('matched', None)
+            return node.get('next', '')
     
     def _evaluate_expression(self, expression):
         """
@@ -281,7 +303,7 @@ class WorkflowEngine:
             log_info("工作流引擎初始化完成")
             return True
         except Exception as e:
-            log_error(f"工作流引擎初始化失败: {str(e)}")
+            log_error("工作流引擎初始化失败: %s", e)
             return False
     
     def shutdown(self):
@@ -295,7 +317,7 @@ class WorkflowEngine:
                     service.shutdown()
             log_info("工作流引擎已关闭")
         except Exception as e:
-            log_error(f"关闭工作流引擎时出错: {str(e)}")
+            log_error("关闭工作流引擎时出错: %s", e)
     
     def run(self, ui):
         """
@@ -325,7 +347,9 @@ class WorkflowEngine:
                     message = result.get('message', '')
                     
                     if message:
-                        ui.display_message(message)
+                        with self.tracer.span("workflow.render_message", node_id=current_node_id,
+                                              node_type='interaction'):
+                            ui.display_message(message)
                     
                     # 显示表单并获取输入
                     form_data = ui.display_form(form_config)
@@ -338,9 +362,18 @@ class WorkflowEngine:
                     current_node_id = result.get('next_node')
                     
         except Exception as e:
-            log_error(f"工作流执行出错: {str(e)}")
+            log_error("工作流执行出错: %s", e)
             ui.display_error(f"执行出错: {str(e)}")
     
+    def set_tracer(self, tracer):
+        """
+        设置追踪器（默认使用全局追踪器）
+        
+        Args:
+            tracer: Tracer实例
+        """
+        self.tracer = tracer
+    
     def get_ai_service(self, service_name):
         """
         获取AI服务实例
@@ -25,7 +25,7 @@ def main():
         
         # 获取默认配置路径
         config_path = ConfigLoader.get_default_config_path()
-        log_info(f"使用配置文件: {config_path}")
+        log_info("使用配置文件: %s", config_path)
         
         # 加载配置
         workflow_config = ConfigLoader.load_from_file(config_path)
@@ -52,7 +52,7 @@ def main():
         log_info("科研成果转化分析完成！")
         
     except ScientificAchievementError as e:
-        log_error(f"科研成果转化分析过程中出现错误: {e}")
+        log_error("科研成果转化分析过程中出现错误: %s", e)
         print(f"\n错误: {e}")
         sys.exit(1)
     except KeyboardInterrupt:
@@ -60,7 +60,7 @@ def main():
         print("\n操作已中断")
         sys.exit(0)
     except Exception as e:
-        log_error(f"发生未预期的错误: {str(e)}", exc_info=True)
+        log_error("发生未预期的错误: %s", e, exc_info=True)
         print(f"\n发生未预期的错误: {str(e)}")
         sys.exit(1)
     finally:
@@ -0,0 +1,51 @@
+"""
+本地专利数据包
+
+提供专利语料导入、中文分词、倒排索引、列式专利存储、统计列、引用图、趋势分析、IPC分类汇总、向量相似检索、分段增量更新、查询结果缓存和索引构建工具。
+"""
+
+from .tokenizer import normalize_query, tokenize
+from .corpus import normalize_patent, searchable_text, iter_jsonl
+from .index import InvertedIndex, top_k
+from .store import PatentStore, PatentStoreWriter, build_store
+from .columns import PatentColumns, PatentColumnsWriter, write_columns
+from .citations import CitationEdges, CitationEdgesWriter, CitationGraph, write_citation_edges
+from .trend import TrendEngine
+from .ipc import TECHNOLOGY_FIELD_IPC, TECHNOLOGY_FIELD_LABELS, IpcRollup, write_ipc_rollup
+from .vectors import VectorIndex, write_vector_index
+from .builder import build_index, build_index_from_patents
+from .segments import PatentIndexView, apply_delta, merge_segments
+from .cache import QueryResultCache
+
+__all__ = [
+    'tokenize',
+    'normalize_query',
+    'normalize_patent',
+    'searchable_text',
+    'iter_jsonl',
+    'InvertedIndex',
+    'top_k',
+    'PatentStore',
+    'PatentStoreWriter',
+    'build_store',
+    'PatentColumns',
+    'PatentColumnsWriter',
+    'write_columns',
+    'CitationEdges',
+    'CitationEdgesWriter',
+    'CitationGraph',
+    'write_citation_edges',
+    'TrendEngine',
+    'TECHNOLOGY_FIELD_IPC',
+    'TECHNOLOGY_FIELD_LABELS',
+    'IpcRollup',
+    'write_ipc_rollup',
+    'VectorIndex',
+    'write_vector_index',
+    'build_index',
+    'build_index_from_patents',
+    'PatentIndexView',
+    'apply_delta',
+    'merge_segments',
+    'QueryResultCache',
+]
@@ -0,0 +1,89 @@
+"""
+专利索引构建工具
+
+将JSONL格式的专利数据转换为本地检索所需的索引目录（倒排索引、专利存储、统计列、引用边、IPC汇总和向量索引）：
+    python -m src.patents.builder patents.jsonl data/patent_index
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Iterable, Sequence
+
+from .citations import CitationEdgesWriter
+from .columns import PatentColumns, PatentColumnsWriter
+from .corpus import iter_jsonl, searchable_text
+from .index import InvertedIndex
+from .ipc import write_ipc_rollup
+from .store import PatentStoreWriter
+from .vectors import corpus_idf, write_vector_index
+
+
+def build_index(jsonl_path: str, out_dir: str) -> dict:
+    """
+    从JSONL专利数据构建索引目录
+
+    Args:
+        jsonl_path: JSONL专利数据路径
+        out_dir: 输出目录
+
+    Returns:
+        dict: 构建统计（专利数、词项数、耗时）
+    """
+    return build_index_from_patents(iter_jsonl(jsonl_path), out_dir)
+
+
+def build_index_from_patents(patents: Iterable[dict], out_dir: str,
+                             background: Sequence[InvertedIndex] = ()) -> dict:
+    """
+    从规范化专利记录构建索引目录
+
+    Args:
+        patents: 规范化专利记录，顺序即文档号顺序
+        out_dir: 输出目录
+        background: 向量idf一并计入其文档频率的倒排索引，写增量段时传入已有的段
+
+    Returns:
+        dict: 构建统计（专利数、词项数、耗时）
+    """
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    writer = PatentStoreWriter(out_dir)
+    columns = PatentColumnsWriter(out_dir)
+    citations = CitationEdgesWriter(out_dir)
+
+    def texts():
+        # 读取一遍语料，同时写入专利存储、统计列和引用边并产出检索文本，文档号即存储中的记录号
+        for patent in patents:
+            writer.add(patent)
+            columns.add(patent)
+            citations.add(patent)
+            yield searchable_text(patent)
+
+    index = InvertedIndex.build(texts())
+    index.save(out_dir)
+    write_vector_index(index, out_dir, idf=corpus_idf(index, background) if background else None)
+    columns.close()
+    citations.close()
+    write_ipc_rollup(PatentColumns(out_dir), out_dir)
+    writer.close()
+
+    return {
+        "patents": index.doc_count,
+        "terms": len(index.vocabulary),
+        "postings": len(index.doc_ids),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从JSONL专利数据构建本地检索索引")
+    parser.add_argument("jsonl_path", help="JSONL专利数据路径，每行一条专利")
+    parser.add_argument("out_dir", help="索引输出目录")
+    args = parser.parse_args()
+    print(json.dumps(build_index(args.jsonl_path, args.out_dir), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
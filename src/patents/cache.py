@@ -0,0 +1,82 @@
+"""
+专利查询结果缓存
+
+按（查询类型, 规范化查询, 参数）缓存检索和趋势分析结果，LRU淘汰。
+每条缓存都属于某个索引版本，索引切换到新版本后第一次访问即清空旧结果，
+热门查询命中时不访问索引。
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+class QueryResultCache:
+    """
+    线程安全的LRU查询结果缓存
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最多缓存的结果数
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+
+    def get_or_compute(self, key: Hashable, version: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        读取缓存结果，未命中时计算并写入
+
+        计算在锁外进行，同一查询并发未命中时可能重复计算，结果一致。
+        返回值是缓存内容的深拷贝，调用方修改结果不会影响缓存。
+
+        Args:
+            key: 缓存键
+            version: 当前索引版本
+            compute: 未命中时计算结果的函数
+
+        Returns:
+            tuple: (结果, 是否命中)
+        """
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(self._entries[key]), True
+            self.stats["misses"] += 1
+
+        value = compute()
+        with self._lock:
+            # 计算期间索引可能已切换，旧版本的结果不再写入
+            if version == self._version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+        return copy.deepcopy(value), False
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,194 @@
+"""
+专利统计列
+
+趋势分析等统计所需的字段以NumPy数组保存：申请年份、授权年份和引用文献数为定长列，
+申请人、发明人和IPC分类号先做字典编码，再按文档号顺序以偏移表加编号数组存放，
+统计时只取选中文档的编号区间，直接做 bincount 分组计数。
+"""
+
+import json
+import os
+from array import array
+from typing import Dict, Iterable
+
+import numpy as np
+
+COLUMNS_META_FILE = "columns_meta.json"
+
+# 字典编码的多值字段
+CODED_FIELDS = ("applicant", "inventor", "ipc_classification")
+
+# 日期缺失或无法解析时的年份
+UNKNOWN_YEAR = 0
+
+
+def parse_year(date: str) -> int:
+    """
+    从日期字符串中取年份
+
+    Args:
+        date: 日期字符串（如 2022-06-15）
+
+    Returns:
+        int: 年份，无法解析时返回 UNKNOWN_YEAR
+    """
+    return int(date[:4]) if date and len(date) >= 4 and date[:4].isdigit() else UNKNOWN_YEAR
+
+
+class _CodedColumn:
+    __slots__ = ("vocabulary", "offsets", "codes")
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.offsets = array("q", [0])
+        self.codes = array("i")
+
+    def add(self, values) -> None:
+        for value in dict.fromkeys(values):
+            code = self.vocabulary.get(value)
+            if code is None:
+                code = self.vocabulary[value] = len(self.vocabulary)
+            self.codes.append(code)
+        self.offsets.append(len(self.codes))
+
+
+class PatentColumnsWriter:
+    """
+    统计列写入器，按文档号顺序追加专利
+    """
+
+    def __init__(self, directory: str):
+        """
+        初始化写入器
+
+        Args:
+            directory: 输出目录
+        """
+        self.directory = directory
+        self._application_years = array("h")
+        self._grant_years = array("h")
+        self._cited_counts = array("i")
+        self._coded = {field: _CodedColumn() for field in CODED_FIELDS}
+
+    def add(self, patent: dict) -> None:
+        """
+        追加一条规范化专利记录
+
+        Args:
+            patent: 规范化后的专利记录
+        """
+        self._application_years.append(parse_year(patent["application_date"]))
+        self._grant_years.append(parse_year(patent["grant_date"]))
+        self._cited_counts.append(len(patent["cited_patents"]))
+        for field, column in self._coded.items():
+            column.add(patent[field])
+
+    def close(self) -> int:
+        """
+        写出统计列
+
+        Returns:
+            int: 文档数
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = {
+            "application_year": np.frombuffer(self._application_years, dtype=np.int16),
+            "grant_year": np.frombuffer(self._grant_years, dtype=np.int16),
+            "cited_count": np.frombuffer(self._cited_counts, dtype=np.int32),
+        }
+        vocabularies = {}
+        for field, column in self._coded.items():
+            arrays[f"{field}_offsets"] = np.frombuffer(column.offsets, dtype=np.int64)
+            arrays[f"{field}_codes"] = np.frombuffer(column.codes, dtype=np.int32)
+            vocabularies[field] = list(column.vocabulary)
+        for name, values in arrays.items():
+            np.save(os.path.join(self.directory, f"col_{name}.npy"), values)
+
+        count = len(self._application_years)
+        # 元数据最后写出，存在即表示统计列完整
+        with open(os.path.join(self.directory, COLUMNS_META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"count": count, "vocabularies": vocabularies}, f, ensure_ascii=False)
+        return count
+
+
+def write_columns(patents: Iterable[dict], directory: str) -> int:
+    """
+    将规范化专利记录写入统计列
+
+    Args:
+        patents: 按文档号顺序排列的规范化专利记录
+        directory: 输出目录
+
+    Returns:
+        int: 文档数
+    """
+    writer = PatentColumnsWriter(directory)
+    for patent in patents:
+        writer.add(patent)
+    return writer.close()
+
+
+class PatentColumns:
+    """
+    只读的专利统计列，数组以内存映射方式加载
+    """
+
+    def __init__(self, directory: str):
+        """
+        加载统计列
+
+        Args:
+            directory: 统计列所在目录
+        """
+        with open(os.path.join(directory, COLUMNS_META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.vocabularies = meta["vocabularies"]
+
+        def load(name):
+            return np.load(os.path.join(directory, f"col_{name}.npy"), mmap_mode="r")
+
+        self.application_year = load("application_year")
+        self.grant_year = load("grant_year")
+        self.cited_count = load("cited_count")
+        self.coded_offsets = {field: load(f"{field}_offsets") for field in CODED_FIELDS}
+        self.coded_codes = {field: load(f"{field}_codes") for field in CODED_FIELDS}
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """判断目录中是否已有完整的统计列"""
+        return os.path.exists(os.path.join(directory, COLUMNS_META_FILE))
+
+    def codes_of(self, field: str, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        取出选中文档的全部编码值
+
+        Args:
+            field: 字典编码字段
+            doc_ids: 文档号数组
+
+        Returns:
+            ndarray: 各文档编码值依次拼接的数组
+        """
+        offsets = self.coded_offsets[field]
+        starts = offsets[doc_ids]
+        lengths = offsets[doc_ids + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int32)
+        # 把各文档的 [start, end) 区间展开为连续下标
+        shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return self.coded_codes[field][shifts + np.arange(total)]
+
+    def count_codes(self, field: str, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        统计选中文档中各编码值出现的文档数
+
+        Args:
+            field: 字典编码字段
+            doc_ids: 文档号数组
+
+        Returns:
+            ndarray: 长度为该字段词典大小的计数数组
+        """
+        return np.bincount(self.codes_of(field, doc_ids), minlength=len(self.vocabularies[field]))
@@ -0,0 +1,97 @@
+"""
+专利语料导入
+
+读取JSONL格式的专利数据（每行一条专利），统一字段名和字段类型。
+"""
+
+import json
+from typing import Iterator, List
+
+# 标题在检索文本中重复的次数，使标题命中的权重高于摘要和权利要求
+TITLE_WEIGHT = 2
+
+# 列表类字段及其在原始数据中的常见别名
+LIST_FIELDS = {
+    "claims": ("claims",),
+    "applicant": ("applicant", "applicants"),
+    "inventor": ("inventor", "inventors"),
+    "ipc_classification": ("ipc_classification", "ipc", "ipc_codes"),
+    "cited_patents": ("cited_patents", "citations", "references"),
+}
+
+TEXT_FIELDS = (
+    "title", "abstract", "application_date", "publication_date", "grant_date",
+    "status", "legal_status",
+)
+
+
+def _as_list(value) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        # 兼容以分号或逗号分隔的字符串
+        separator = ";" if ";" in value else ","
+        return [item.strip() for item in value.split(separator) if item.strip()]
+    return [str(item) for item in value]
+
+
+def normalize_patent(record: dict) -> dict:
+    """
+    统一专利记录的字段名和类型
+
+    Args:
+        record: 原始专利记录，必须包含 patent_id（或 id）
+
+    Returns:
+        dict: 规范化后的专利记录
+    """
+    patent_id = record.get("patent_id") or record.get("id")
+    if not patent_id:
+        raise ValueError("专利记录缺少 patent_id")
+    patent = {"patent_id": str(patent_id)}
+    for field in TEXT_FIELDS:
+        value = record.get(field)
+        patent[field] = "" if value is None else str(value)
+    for field, aliases in LIST_FIELDS.items():
+        value = next((record[alias] for alias in aliases if alias in record), None)
+        # 权利要求文本中含逗号，不能按分隔符拆分
+        patent[field] = [value] if field == "claims" and isinstance(value, str) else _as_list(value)
+    return patent
+
+
+def searchable_text(patent: dict) -> str:
+    """
+    生成用于全文检索的文本（标题、摘要和权利要求）
+
+    Args:
+        patent: 规范化后的专利记录
+
+    Returns:
+        str: 检索文本
+    """
+    parts = [patent["title"]] * TITLE_WEIGHT
+    parts.append(patent["abstract"])
+    parts.extend(patent["claims"])
+    return "\n".join(parts)
+
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    """
+    逐行读取JSONL专利数据
+
+    Args:
+        path: JSONL文件路径
+
+    Yields:
+        dict: 规范化后的专利记录
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield normalize_patent(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{path} 第{line_number}行无效: {e}")
+
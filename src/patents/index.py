@@ -0,0 +1,319 @@
+"""
+专利倒排索引
+
+词项的倒排表按词项顺序连续存放在NumPy数组中（文档号、词频），通过偏移表定位，
+保存为 .npy 文件后以内存映射方式加载，多个工作进程共享同一份页缓存。
+每条倒排记录的BM25得分贡献在构建时预先算好，查询时只需按文档号累加，再做top-k选择。
+"""
+
+import heapq
+import json
+import os
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .tokenizer import tokenize
+
+# 候选文档少于该数量时用堆选择top-k，更多时用 argpartition
+HEAP_SELECT_THRESHOLD = 4096
+
+# 命中的倒排记录数超过文档数的该比例时，改用按文档号直接寻址的稠密累加
+DENSE_ACCUMULATE_RATIO = 0.125
+
+_ARRAY_FILES = ("offsets", "doc_ids", "term_freqs", "impacts", "doc_lengths")
+
+
+def top_k(doc_ids: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """
+    选出得分最高的k个文档
+
+    Args:
+        doc_ids: 候选文档号
+        scores: 对应得分
+        k: 返回数量
+
+    Returns:
+        list: (文档号, 得分) 列表，按得分降序、文档号升序排列
+    """
+    if k <= 0 or len(doc_ids) == 0:
+        return []
+    if len(doc_ids) <= HEAP_SELECT_THRESHOLD:
+        best = heapq.nlargest(k, zip(scores.tolist(), (-doc_ids).tolist()))
+        return [(-negative_doc, score) for score, negative_doc in best]
+    if len(doc_ids) > k:
+        # 与第k名同分的文档按文档号取最小的若干个，保证结果与全排序一致
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)
+        tied = tied[np.argsort(doc_ids[tied], kind="stable")[:k - len(above)]]
+        selected = np.concatenate([above, tied])
+        doc_ids, scores = doc_ids[selected], scores[selected]
+    order = np.lexsort((doc_ids, -scores))
+    return [(int(doc_ids[i]), float(scores[i])) for i in order]
+
+
+def bm25_idf(doc_count: int, doc_frequencies: np.ndarray) -> np.ndarray:
+    """
+    计算BM25逆文档频率
+
+    Args:
+        doc_count: 文档总数
+        doc_frequencies: 各词项的文档频率
+
+    Returns:
+        ndarray: float32逆文档频率
+    """
+    return np.log(1.0 + (doc_count - doc_frequencies + 0.5) / (doc_frequencies + 0.5)).astype(np.float32)
+
+
+def bm25_weights(idf: np.ndarray, term_freqs: np.ndarray, doc_lengths: np.ndarray, average_length: float,
+                 k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """
+    按给定的语料统计计算倒排记录的BM25得分贡献
+
+    构建时预先计算得分贡献和分段索引查询时按全局统计计算都使用该函数，
+    统计相同时两者逐位一致。
+
+    Args:
+        idf: 各倒排记录所属词项的逆文档频率（或单个词项的标量）
+        term_freqs: 词频
+        doc_lengths: 各倒排记录所属文档的词项总数
+        average_length: 语料的平均文档长度
+        k1: BM25词频饱和参数
+        b: BM25长度归一化参数
+
+    Returns:
+        ndarray: float32得分贡献
+    """
+    length_norm = (k1 * (1 - b + b * doc_lengths / average_length)).astype(np.float32)
+    freqs = term_freqs.astype(np.float32)
+    return (idf * freqs * (k1 + 1) / (freqs + length_norm)).astype(np.float32)
+
+
+def bm25_impacts(doc_frequencies: np.ndarray, doc_ids: np.ndarray, term_freqs: np.ndarray,
+                 doc_lengths: np.ndarray, k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """
+    计算每条倒排记录的BM25得分贡献
+
+    Args:
+        doc_frequencies: 各词项的文档频率，与倒排表的词项顺序一致
+        doc_ids: 按词项连续存放的文档号
+        term_freqs: 与 doc_ids 对应的词频
+        doc_lengths: 各文档的词项总数
+        k1: BM25词频饱和参数
+        b: BM25长度归一化参数
+
+    Returns:
+        ndarray: 与 doc_ids 对应的float32得分贡献
+    """
+    doc_count = len(doc_lengths)
+    if doc_count == 0 or len(doc_ids) == 0:
+        return np.zeros(len(doc_ids), dtype=np.float32)
+    idf = bm25_idf(doc_count, doc_frequencies)
+    return bm25_weights(np.repeat(idf, doc_frequencies), term_freqs, doc_lengths[doc_ids],
+                        doc_lengths.mean(), k1, b)
+
+
+class InvertedIndex:
+    """
+    基于BM25的倒排索引
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], offsets: np.ndarray, doc_ids: np.ndarray,
+                 term_freqs: np.ndarray, impacts: np.ndarray, doc_lengths: np.ndarray,
+                 k1: float = 1.2, b: float = 0.75):
+        """
+        初始化索引
+
+        Args:
+            vocabulary: 词项到词项号的映射
+            offsets: 各词项倒排表在 doc_ids 中的起始偏移，长度为词项数+1
+            doc_ids: 按词项连续存放的文档号
+            term_freqs: 与 doc_ids 对应的词频
+            impacts: 与 doc_ids 对应的BM25得分贡献
+            doc_lengths: 各文档的词项总数
+            k1: BM25词频饱和参数
+            b: BM25长度归一化参数
+        """
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.impacts = impacts
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(doc_lengths)
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = 1.2, b: float = 0.75) -> "InvertedIndex":
+        """
+        从文档文本构建索引，文档号按输入顺序从0开始编号
+
+        Args:
+            texts: 文档文本序列
+            k1: BM25词频饱和参数
+            b: BM25长度归一化参数
+
+        Returns:
+            InvertedIndex: 索引
+        """
+        vocabulary: Dict[str, int] = {}
+        term_column = array("i")
+        doc_column = array("i")
+        freq_column = array("i")
+        lengths = array("i")
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, freq in counts.items():
+                term_id = vocabulary.get(term)
+                if term_id is None:
+                    term_id = vocabulary[term] = len(vocabulary)
+                term_column.append(term_id)
+                doc_column.append(doc_id)
+                freq_column.append(freq)
+
+        terms = np.frombuffer(term_column, dtype=np.int32)
+        # 稳定排序保证同一词项内文档号递增
+        order = np.argsort(terms, kind="stable")
+        doc_frequencies = np.bincount(terms, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(doc_frequencies, out=offsets[1:])
+        doc_ids = np.frombuffer(doc_column, dtype=np.int32)[order]
+        term_freqs = np.minimum(np.frombuffer(freq_column, dtype=np.int32)[order], 65535).astype(np.uint16)
+        doc_lengths = np.frombuffer(lengths, dtype=np.int32).copy()
+        impacts = bm25_impacts(doc_frequencies, doc_ids, term_freqs, doc_lengths, k1, b)
+        return cls(vocabulary, offsets, doc_ids, term_freqs, impacts, doc_lengths, k1, b)
+
+    def save(self, directory: str) -> None:
+        """
+        保存索引到目录
+
+        Args:
+            directory: 索引目录
+        """
+        os.makedirs(directory, exist_ok=True)
+        terms = [None] * len(self.vocabulary)
+        for term, term_id in self.vocabulary.items():
+            terms[term_id] = term
+        with open(os.path.join(directory, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(directory, "index_meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "doc_count": self.doc_count}, f)
+        for name in _ARRAY_FILES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "InvertedIndex":
+        """
+        从目录加载索引
+
+        Args:
+            directory: 索引目录
+            mmap: 是否以内存映射方式加载倒排数组
+
+        Returns:
+            InvertedIndex: 索引
+        """
+        with open(os.path.join(directory, "vocabulary.json"), "r", encoding="utf-8") as f:
+            vocabulary = {term: term_id for term_id, term in enumerate(json.load(f))}
+        with open(os.path.join(directory, "index_meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in _ARRAY_FILES
+        }
+        return cls(vocabulary, k1=meta["k1"], b=meta["b"], **arrays)
+
+    def document_frequency(self, term: str) -> int:
+        """获取包含词项的文档数"""
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return 0
+        return int(self.offsets[term_id + 1] - self.offsets[term_id])
+
+    def term_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取词项的倒排文档号和词频
+
+        Args:
+            term: 词项
+
+        Returns:
+            tuple: (递增的文档号数组, 对应的词频数组)
+        """
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint16)
+        start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+        return self.doc_ids[start:end], self.term_freqs[start:end]
+
+    def postings(self, term: str) -> np.ndarray:
+        """
+        获取词项的倒排文档号
+
+        Args:
+            term: 词项
+
+        Returns:
+            ndarray: 递增的文档号数组
+        """
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int32)
+        return self.doc_ids[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+    def score(self, tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算所有命中文档的BM25得分
+
+        Args:
+            tokens: 查询词项
+
+        Returns:
+            tuple: (文档号数组, 得分数组)
+        """
+        ranges = []
+        for term in set(tokens):
+            term_id = self.vocabulary.get(term)
+            if term_id is not None:
+                ranges.append((int(self.offsets[term_id]), int(self.offsets[term_id + 1])))
+
+        if not ranges:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            return np.asarray(self.doc_ids[start:end]), np.asarray(self.impacts[start:end])
+
+        if sum(end - start for start, end in ranges) < self.doc_count * DENSE_ACCUMULATE_RATIO:
+            # 命中较少时只在候选文档上合并得分
+            docs = np.concatenate([self.doc_ids[start:end] for start, end in ranges])
+            weights = np.concatenate([self.impacts[start:end] for start, end in ranges])
+            candidates, inverse = np.unique(docs, return_inverse=True)
+            return candidates, np.bincount(inverse, weights=weights).astype(np.float32)
+
+        # 同一词项的倒排内文档号不重复，可直接按文档号累加；
+        # 与上面的 bincount 一样以float64累加，得分与词项的累加顺序无关
+        dense = np.zeros(self.doc_count, dtype=np.float64)
+        for start, end in ranges:
+            dense[self.doc_ids[start:end]] += self.impacts[start:end]
+        candidates = np.flatnonzero(dense)
+        return candidates.astype(np.int32), dense[candidates].astype(np.float32)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        检索得分最高的文档
+
+        Args:
+            query: 查询文本
+            limit: 返回数量
+
+        Returns:
+            list: (文档号, 得分) 列表
+        """
+        doc_ids, scores = self.score(tokenize(query))
+        return top_k(doc_ids, scores, limit)
@@ -0,0 +1,233 @@
+"""
+IPC分类汇总
+
+按技术领域到IPC分类号前缀的映射，预先计算每个IPC分类号、每个IPC小类和每个技术领域的
+文档倒排表和文档数。倒排表内按申请年份从新到旧排列，领域查询只需取出倒排表的前若干条，
+不需要全文检索；各领域的专利数可直接用于前端的领域选择。
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .columns import PatentColumns
+
+IPC_META_FILE = "ipc_meta.json"
+
+# 技术领域到IPC分类号前缀的映射，未命中任何领域的专利归入 other
+TECHNOLOGY_FIELD_IPC = {
+    "it": ("G06", "G11", "G09", "G10L", "H04", "H03K", "H03M", "H05K"),
+    "biomed": ("A61", "A01N", "C07D", "C07K", "C12M", "C12N", "C12P", "C12Q", "G01N33"),
+    "new_material": ("B82", "C01", "C04B", "C08", "C09", "C22C", "C23C"),
+    "energy_saving": ("B01D53", "C02F", "C10L", "F03D", "F23", "F24S", "H01M", "H02J", "H02S", "Y02"),
+}
+OTHER_FIELD = "other"
+
+TECHNOLOGY_FIELD_LABELS = {
+    "it": "信息技术",
+    "biomed": "生物医药",
+    "new_material": "新材料",
+    "energy_saving": "节能环保",
+    OTHER_FIELD: "其他技术",
+}
+
+TECHNOLOGY_FIELDS = tuple(TECHNOLOGY_FIELD_IPC) + (OTHER_FIELD,)
+
+# IPC小类为分类号的前4位（如 G06N）
+SUBCLASS_LENGTH = 4
+
+_IPC_PREFIX_PATTERN = re.compile(r"^[A-HY]\d{2}[A-Z]?\d*(/\d*)?$")
+_GROUPS = ("code", "subclass", "field")
+
+
+def normalize_ipc(code: str) -> str:
+    """
+    规范化IPC分类号（去除空白并转为大写）
+
+    Args:
+        code: IPC分类号或前缀
+
+    Returns:
+        str: 规范化后的分类号
+    """
+    return "".join(code.split()).upper()
+
+
+def is_ipc_prefix(text: str) -> bool:
+    """判断文本是否为IPC分类号或其前缀（如 G06、G06N、G06N3/08）"""
+    return bool(_IPC_PREFIX_PATTERN.match(normalize_ipc(text)))
+
+
+def _group_postings(keys: np.ndarray, docs: np.ndarray, group_count: int,
+                    recency_rank: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """按分组键生成倒排表，组内按申请年份从新到旧排列并去重"""
+    order = np.lexsort((recency_rank[docs], keys))
+    keys, docs = keys[order], docs[order]
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = (keys[1:] != keys[:-1]) | (docs[1:] != docs[:-1])
+    keys, docs = keys[keep], docs[keep]
+    offsets = np.zeros(group_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=group_count), out=offsets[1:])
+    return offsets, docs.astype(np.int32)
+
+
+def write_ipc_rollup(columns: PatentColumns, directory: str) -> dict:
+    """
+    根据统计列预先计算IPC汇总
+
+    Args:
+        columns: 专利统计列
+        directory: 输出目录
+
+    Returns:
+        dict: 各技术领域的专利数
+    """
+    codes = [normalize_ipc(code) for code in columns.vocabularies["ipc_classification"]]
+    subclasses = sorted({code[:SUBCLASS_LENGTH] for code in codes})
+    subclass_ids = {subclass: index for index, subclass in enumerate(subclasses)}
+    subclass_of = np.asarray([subclass_ids[code[:SUBCLASS_LENGTH]] for code in codes], dtype=np.int32)
+
+    # 每个文档在“申请年份从新到旧”顺序中的名次
+    doc_count = columns.count
+    recency_order = np.lexsort((np.arange(doc_count), -columns.application_year.astype(np.int32)))
+    recency_rank = np.empty(doc_count, dtype=np.int32)
+    recency_rank[recency_order] = np.arange(doc_count, dtype=np.int32)
+
+    # 展开为（文档号, 分类号编号）对
+    code_offsets = np.asarray(columns.coded_offsets["ipc_classification"])
+    entry_codes = np.asarray(columns.coded_codes["ipc_classification"])
+    entry_docs = np.repeat(np.arange(doc_count, dtype=np.int32), np.diff(code_offsets))
+
+    field_keys, field_docs = [], []
+    for field_id, prefixes in enumerate(TECHNOLOGY_FIELD_IPC.values()):
+        in_field = np.asarray([code.startswith(prefixes) for code in codes], dtype=bool)
+        matched = in_field[entry_codes]
+        field_docs.append(entry_docs[matched])
+        field_keys.append(np.full(int(matched.sum()), field_id, dtype=np.int32))
+    classified = np.zeros(doc_count, dtype=bool)
+    for docs in field_docs:
+        classified[docs] = True
+    others = np.flatnonzero(~classified).astype(np.int32)
+    field_docs.append(others)
+    field_keys.append(np.full(len(others), len(TECHNOLOGY_FIELDS) - 1, dtype=np.int32))
+
+    groups = {
+        "code": _group_postings(entry_codes, entry_docs, len(codes), recency_rank),
+        "subclass": _group_postings(subclass_of[entry_codes], entry_docs, len(subclasses), recency_rank),
+        "field": _group_postings(np.concatenate(field_keys), np.concatenate(field_docs),
+                                 len(TECHNOLOGY_FIELDS), recency_rank),
+    }
+    for group, (offsets, docs) in groups.items():
+        np.save(os.path.join(directory, f"ipc_{group}_offsets.npy"), offsets)
+        np.save(os.path.join(directory, f"ipc_{group}_docs.npy"), docs)
+    np.save(os.path.join(directory, "ipc_recency_rank.npy"), recency_rank)
+
+    field_offsets = groups["field"][0]
+    field_counts = {field: int(field_offsets[i + 1] - field_offsets[i]) for i, field in enumerate(TECHNOLOGY_FIELDS)}
+    # 元数据最后写出，存在即表示汇总完整
+    with open(os.path.join(directory, IPC_META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"codes": codes, "subclasses": subclasses, "fields": list(TECHNOLOGY_FIELDS),
+                   "field_ipc": TECHNOLOGY_FIELD_IPC, "field_counts": field_counts}, f, ensure_ascii=False)
+    return field_counts
+
+
+class IpcRollup:
+    """
+    只读的IPC汇总，倒排表以内存映射方式加载
+    """
+
+    def __init__(self, directory: str):
+        """
+        加载IPC汇总
+
+        Args:
+            directory: 汇总所在目录
+        """
+        with open(os.path.join(directory, IPC_META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.codes: List[str] = meta["codes"]
+        self.subclasses: List[str] = meta["subclasses"]
+        self.fields: List[str] = meta["fields"]
+        self._keys = {
+            "code": {code: index for index, code in enumerate(self.codes)},
+            "subclass": {subclass: index for index, subclass in enumerate(self.subclasses)},
+            "field": {field: index for index, field in enumerate(self.fields)},
+        }
+        self._postings = {}
+        for group in _GROUPS:
+            self._postings[group] = (
+                np.load(os.path.join(directory, f"ipc_{group}_offsets.npy"), mmap_mode="r"),
+                np.load(os.path.join(directory, f"ipc_{group}_docs.npy"), mmap_mode="r"),
+            )
+        self._recency_rank = np.load(os.path.join(directory, "ipc_recency_rank.npy"), mmap_mode="r")
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """判断目录中是否已有完整的IPC汇总"""
+        return os.path.exists(os.path.join(directory, IPC_META_FILE))
+
+    def _group(self, group: str, key: str) -> np.ndarray:
+        index = self._keys[group].get(key)
+        if index is None:
+            return np.zeros(0, dtype=np.int32)
+        offsets, docs = self._postings[group]
+        return docs[offsets[index]:offsets[index + 1]]
+
+    def _counts(self, group: str) -> Dict[str, int]:
+        offsets = np.asarray(self._postings[group][0])
+        return dict(zip(self._keys[group], np.diff(offsets).tolist()))
+
+    def field_postings(self, field: str) -> np.ndarray:
+        """
+        获取技术领域的文档倒排表
+
+        Args:
+            field: 技术领域（it、biomed、new_material、energy_saving、other）
+
+        Returns:
+            ndarray: 按申请年份从新到旧排列的文档号
+        """
+        return self._group("field", field)
+
+    def prefix_postings(self, prefix: str) -> np.ndarray:
+        """
+        获取IPC分类号前缀的文档倒排表
+
+        Args:
+            prefix: IPC分类号或前缀（如 G06、G06N、G06N3/08）
+
+        Returns:
+            ndarray: 按申请年份从新到旧排列的文档号
+        """
+        prefix = normalize_ipc(prefix)
+        if len(prefix) == SUBCLASS_LENGTH:
+            return self._group("subclass", prefix)
+        if len(prefix) < SUBCLASS_LENGTH:
+            parts = [self._group("subclass", subclass) for subclass in self.subclasses if subclass.startswith(prefix)]
+        else:
+            parts = [self._group("code", code) for code in self.codes if code.startswith(prefix)]
+        if len(parts) <= 1:
+            return parts[0] if parts else np.zeros(0, dtype=np.int32)
+        docs = np.unique(np.concatenate(parts))
+        return docs[np.argsort(self._recency_rank[docs], kind="stable")]
+
+    def field_counts(self) -> Dict[str, int]:
+        """
+        获取各技术领域的专利数
+
+        Returns:
+            dict: 技术领域到专利数的映射
+        """
+        return self._counts("field")
+
+    def subclass_counts(self) -> Dict[str, int]:
+        """
+        获取各IPC小类的专利数
+
+        Returns:
+            dict: IPC小类到专利数的映射
+        """
+        return self._counts("subclass")
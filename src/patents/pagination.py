@@ -0,0 +1,120 @@
+"""
+检索结果分页
+
+检索结果按（得分降序, 文档号升序）排成全序，游标只记录上一页最后一条的得分和文档号。
+翻页时重新计算一次命中文档的得分，只在排在游标之后的文档中选出前若干条，
+每页的代价与命中数成正比，与已翻过的页数无关。流式遍历在同一份得分上按倍增的批量
+逐批选出结果，只取前几条时无需对全部命中排序；批量增长到上限后再对剩余命中一次性排序。
+"""
+
+import base64
+import json
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .index import top_k
+
+CURSOR_VERSION = 1
+
+# 流式遍历的首批数量，之后每批翻倍，超过上限时对剩余命中一次性排序
+STREAM_FIRST_BATCH = 16
+STREAM_MAX_BATCH = 4096
+
+
+def encode_cursor(query: str, score: float, doc_id: int, index_version: str) -> str:
+    """
+    生成不透明的分页游标
+
+    Args:
+        query: 查询文本
+        score: 上一条结果的得分
+        doc_id: 上一条结果的文档号
+        index_version: 索引版本，索引变化后旧游标失效
+
+    Returns:
+        str: URL安全的游标字符串
+    """
+    payload = {"v": CURSOR_VERSION, "q": query, "s": score, "d": doc_id, "i": index_version}
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    解析分页游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+
+    Returns:
+        dict: 包含 query、score、doc_id、index_version 的字典
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data.decode("utf-8"))
+        if payload["v"] != CURSOR_VERSION:
+            raise ValueError(f"不支持的游标版本: {payload['v']}")
+        return {"query": str(payload["q"]), "score": float(payload["s"]),
+                "doc_id": int(payload["d"]), "index_version": str(payload["i"])}
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"无效的分页游标: {e}")
+
+
+def _after(doc_ids: np.ndarray, scores: np.ndarray, score: float, doc_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    """筛选排在（score, doc_id）之后的文档"""
+    score = scores.dtype.type(score)
+    keep = (scores < score) | ((scores == score) & (doc_ids > doc_id))
+    return doc_ids[keep], scores[keep]
+
+
+def page_after(doc_ids: np.ndarray, scores: np.ndarray, limit: int,
+               after: Optional[Tuple[float, int]] = None) -> List[Tuple[int, float]]:
+    """
+    选出排在游标位置之后的一页结果
+
+    Args:
+        doc_ids: 命中文档号
+        scores: 对应得分
+        limit: 每页数量
+        after: 上一页最后一条的（得分, 文档号），None表示第一页
+
+    Returns:
+        list: (文档号, 得分) 列表，按得分降序、文档号升序排列
+    """
+    if after is not None:
+        doc_ids, scores = _after(doc_ids, scores, *after)
+    return top_k(doc_ids, scores, limit)
+
+
+def iter_ranked(doc_ids: np.ndarray, scores: np.ndarray,
+                after: Optional[Tuple[float, int]] = None) -> Iterator[Tuple[int, float]]:
+    """
+    按排名顺序逐条产出命中文档
+
+    Args:
+        doc_ids: 命中文档号
+        scores: 对应得分
+        after: 从该（得分, 文档号）之后开始，None表示从头开始
+
+    Yields:
+        tuple: (文档号, 得分)
+    """
+    batch = STREAM_FIRST_BATCH
+    while batch <= STREAM_MAX_BATCH:
+        if after is not None:
+            doc_ids, scores = _after(doc_ids, scores, *after)
+        page = top_k(doc_ids, scores, batch)
+        yield from page
+        if len(page) < batch:
+            return
+        after = (page[-1][1], page[-1][0])
+        batch *= 2
+
+    doc_ids, scores = _after(doc_ids, scores, *after)
+    order = np.lexsort((doc_ids, -scores))
+    for doc_id, score in zip(doc_ids[order].tolist(), scores[order].tolist()):
+        yield doc_id, score
@@ -0,0 +1,747 @@
+"""
+分段专利索引
+
+索引根目录下的每个段都是一个完整的索引目录（倒排索引、专利存储、统计列、引用边、IPC汇总和向量索引），
+由 manifest.json 清单列出当前有效的段。每日增量写成新段，被更新或撤回的专利在旧段中以
+删除标记（已删除文档号的 .npy 文件）屏蔽；清单先写临时文件再原子替换，查询方始终看到完整的
+某一代清单。段数变多后把所有段中未删除的专利合并为一个新段，合并期间旧段照常提供查询。
+
+BM25得分按全部段未删除文档的全局统计（文档数、文档频率、平均长度）计算，与合并后（即用同样的专利
+整体重建）的得分一致。向量检索的查询向量同样使用全局文档频率，但文档向量的idf在构建段时确定：
+增量段计入当时已有各段的文档频率（含已删除的文档），旧段保留各自构建时的统计，
+段间的相似度只有idf漂移带来的小偏差，合并后消除。
+
+没有清单的索引目录（单次构建的旧布局）视为只有根目录一个段。
+
+写操作（追加、删除、合并）对清单的读-改-写在索引根目录下的 manifest.lock 上加 flock，跨进程串行；
+合并在持锁之外构建新段，提交前重新检查清单代数，期间有其他写入时放弃本次合并。同一时刻只有一个进程
+合并（merge.lock）。不再被清单引用的段目录和删除标记先记入清单的 retired 列表，
+超过宽限期后才删除，其他进程和尚未释放的旧视图仍可打开其中的文件。命令行工具：
+    python -m src.patents.segments add data/patent_index delta.jsonl [--withdraw 专利号文件]
+    python -m src.patents.segments merge data/patent_index
+"""
+
+import argparse
+import bisect
+import contextlib
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 flock，写操作需由调用方串行执行
+    fcntl = None
+
+from .builder import build_index_from_patents
+from .citations import CitationEdges, CitationGraph, write_citation_edges
+from .columns import PatentColumns, write_columns
+from .corpus import iter_jsonl
+from .index import DENSE_ACCUMULATE_RATIO, InvertedIndex, bm25_idf, bm25_weights, top_k
+from .ipc import IpcRollup, write_ipc_rollup
+from .store import STORE_META_FILE, PatentStore
+from .trend import TrendEngine
+from .vectors import DEFAULT_NPROBE, DEFAULT_VECTOR_DIM, VectorIndex, smooth_idf, write_vector_index
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+LOCK_FILE = "manifest.lock"
+MERGE_LOCK_FILE = "merge.lock"
+
+# 旧布局中根目录本身即唯一的段
+ROOT_SEGMENT = "."
+SEGMENT_PREFIX = "seg_"
+# 合并时新段先构建在该前缀的临时目录中，提交时改名为正式段名
+MERGE_PREFIX = "merging_"
+
+# 不再被清单引用的段目录和删除标记保留的秒数
+RETIRE_GRACE_SECONDS = 600
+
+# 合并时每次批量读取的记录数
+_MERGE_BATCH = 4096
+
+# 统计列需要的专利字段
+COLUMN_FIELDS = ("application_date", "grant_date", "applicant", "inventor", "ipc_classification", "cited_patents")
+
+
+def read_manifest(root: str) -> dict:
+    """
+    读取段清单
+
+    Args:
+        root: 索引根目录
+
+    Returns:
+        dict: 清单，没有清单文件时返回只含根目录段的清单
+    """
+    path = os.path.join(root, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"不支持的段清单版本: {manifest.get('version')}")
+        return manifest
+    if not os.path.exists(os.path.join(root, STORE_META_FILE)):
+        raise FileNotFoundError(f"专利索引不存在: {root}")
+    with open(os.path.join(root, STORE_META_FILE), "r", encoding="utf-8") as f:
+        count = json.load(f)["count"]
+    return {"version": MANIFEST_VERSION, "generation": 0, "next_segment": 1,
+            "segments": [{"name": ROOT_SEGMENT, "docs": count, "deletes": None}]}
+
+
+@contextlib.contextmanager
+def _file_lock(root: str, name: str, blocking: bool = True) -> Iterator[bool]:
+    """
+    在索引根目录下的锁文件上加跨进程排他锁
+
+    Args:
+        root: 索引根目录
+        name: 锁文件名
+        blocking: 锁被占用时是否等待
+
+    Returns:
+        上下文管理器，产出是否拿到了锁（blocking为True时总是True）
+    """
+    with open(os.path.join(root, name), "a") as f:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _write_manifest(root: str, manifest: dict) -> None:
+    """原子地替换清单：写临时文件并落盘后再重命名"""
+    path = os.path.join(root, MANIFEST_FILE)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _referenced_paths(manifest: dict) -> set:
+    """清单引用的段目录和删除标记文件（相对索引根目录的路径）"""
+    paths = set()
+    for entry in manifest["segments"]:
+        if entry["name"] != ROOT_SEGMENT:
+            paths.add(entry["name"])
+        if entry["deletes"]:
+            paths.add(os.path.normpath(os.path.join(entry["name"], entry["deletes"])))
+    return paths
+
+
+def _publish(root: str, previous: dict, manifest: dict) -> None:
+    """
+    发布新一代清单，调用方须持有清单锁
+
+    上一代引用而新清单不再引用的段目录和删除标记记入 retired 列表，
+    超过 RETIRE_GRACE_SECONDS 的条目移出列表并删除。
+
+    Args:
+        root: 索引根目录
+        previous: 当前生效的清单
+        manifest: 新清单
+    """
+    now = time.time()
+    retired = {item["path"]: item["since"] for item in previous.get("retired", [])}
+    for path in _referenced_paths(previous) - _referenced_paths(manifest):
+        retired.setdefault(path, now)
+    manifest = dict(manifest, retired=[{"path": path, "since": since} for path, since in sorted(retired.items())
+                                       if now - since < RETIRE_GRACE_SECONDS])
+    _write_manifest(root, manifest)
+    _remove_unused(root, manifest)
+
+
+def _remove_unused(root: str, manifest: dict) -> None:
+    """删除既不被清单引用也不在宽限期内的段目录和删除标记文件（包括中途失败留下的段目录）"""
+    keep = _referenced_paths(manifest) | {item["path"] for item in manifest.get("retired", [])}
+    for name in os.listdir(root):
+        if name.startswith(SEGMENT_PREFIX) and name not in keep:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    # 旧布局的根目录段合并后不再出现在清单中，其删除标记同样需要清理
+    for name in {entry["name"] for entry in manifest["segments"]} | {ROOT_SEGMENT}:
+        directory = os.path.join(root, name)
+        for file_name in os.listdir(directory):
+            if file_name.startswith("deletes_") and os.path.normpath(os.path.join(name, file_name)) not in keep:
+                os.remove(os.path.join(directory, file_name))
+
+
+def _load_deletes(root: str, entry: dict) -> Optional[np.ndarray]:
+    if not entry["deletes"]:
+        return None
+    return np.load(os.path.join(root, entry["name"], entry["deletes"]))
+
+
+def _with_deletes(root: str, entry: dict, records: Iterable[int], generation: int) -> Tuple[dict, int]:
+    """把新的删除记录合入段的删除标记，有变化时写出新一代的标记文件，返回（段条目, 新增删除数）"""
+    existing = _load_deletes(root, entry)
+    if existing is None:
+        existing = np.zeros(0, dtype=np.int64)
+    merged = np.union1d(existing, np.fromiter(records, dtype=np.int64))
+    if len(merged) == len(existing):
+        return entry, 0
+    file_name = f"deletes_{generation:06d}.npy"
+    np.save(os.path.join(root, entry["name"], file_name), merged)
+    return dict(entry, deletes=file_name), len(merged) - len(existing)
+
+
+def ensure_segment(directory: str, vector_dim: int = DEFAULT_VECTOR_DIM) -> None:
+    """
+    补齐段目录中缺少的统计列、引用边、IPC汇总和向量索引，兼容早期构建的索引目录
+
+    Args:
+        directory: 段目录
+        vector_dim: 生成向量索引时的维度
+    """
+    if not PatentColumns.exists(directory):
+        logger.info("正在从专利存储生成统计列: %s", directory)
+        store = PatentStore(directory)
+        try:
+            write_columns((store.get(record, COLUMN_FIELDS) for record in range(len(store))), directory)
+        finally:
+            store.close()
+    if not CitationEdges.exists(directory):
+        logger.info("正在从专利存储生成引用边: %s", directory)
+        store = PatentStore(directory)
+        try:
+            write_citation_edges((store.get(record, ("cited_patents",)) for record in range(len(store))), directory)
+        finally:
+            store.close()
+    if not IpcRollup.exists(directory):
+        logger.info("正在生成IPC分类汇总: %s", directory)
+        write_ipc_rollup(PatentColumns(directory), directory)
+    if not VectorIndex.exists(directory):
+        logger.info("正在生成专利向量索引: %s", directory)
+        write_vector_index(InvertedIndex.load(directory), directory, vector_dim)
+
+
+def apply_delta(root: str, patents: Iterable[dict] = (), withdrawn: Sequence[str] = ()) -> dict:
+    """
+    写入一批增量：新增或更新的专利写成一个新段，旧段中同号的专利和撤回的专利加删除标记
+
+    Args:
+        root: 索引根目录
+        patents: 规范化专利记录，同号专利以后出现的为准
+        withdrawn: 撤回的专利号，同时出现在patents中时以撤回为准
+
+    Returns:
+        dict: 增量统计（代数、新段名、新增专利数、删除专利数、段数、耗时）
+    """
+    started = time.perf_counter()
+    with _file_lock(root, LOCK_FILE):
+        manifest = read_manifest(root)
+        generation = manifest["generation"] + 1
+        segments = []
+        removed = set(withdrawn)
+        added = 0
+        name = None
+
+        patents = iter(patents)
+        first = next(patents, None)
+        if first is not None:
+            name = f"{SEGMENT_PREFIX}{manifest['next_segment']:06d}"
+            # 新段的向量idf计入已有各段的文档频率，与旧段的相似度可以比较
+            background = [InvertedIndex.load(os.path.join(root, entry["name"])) for entry in manifest["segments"]]
+            added = build_index_from_patents(itertools.chain([first], patents), os.path.join(root, name),
+                                             background)["patents"]
+            store = PatentStore(os.path.join(root, name))
+            try:
+                patent_ids = [store.read_field(record, "patent_id") for record in range(store.count)]
+                # 段内重复的专利号只保留最后一条；同时出现在撤回列表中的专利以撤回为准
+                hidden = [record for record, (patent_id, record_of)
+                          in enumerate(zip(patent_ids, store.lookup_many(patent_ids)))
+                          if record_of != record or patent_id in removed]
+            finally:
+                store.close()
+            removed.update(patent_ids)
+            new_entry, _ = _with_deletes(root, {"name": name, "docs": added, "deletes": None}, hidden, generation)
+
+        deleted = 0
+        for entry in manifest["segments"]:
+            store = PatentStore(os.path.join(root, entry["name"]))
+            try:
+                records = [record for record in store.lookup_many(sorted(removed)) if record is not None]
+            finally:
+                store.close()
+            updated, count = _with_deletes(root, entry, records, generation)
+            deleted += count
+            segments.append(updated)
+        if name is not None:
+            segments.append(new_entry)
+
+        _publish(root, manifest, dict(manifest, generation=generation, segments=segments,
+                                      next_segment=manifest["next_segment"] + (1 if name else 0)))
+    return {"generation": generation, "segment": name, "added": added, "deleted": deleted,
+            "segments": len(segments), "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _live_patents(root: str, manifest: dict) -> Iterator[dict]:
+    """按全局文档号顺序产出所有段中未删除的专利"""
+    for entry in manifest["segments"]:
+        deletes = _load_deletes(root, entry)
+        store = PatentStore(os.path.join(root, entry["name"]))
+        try:
+            live = np.ones(store.count, dtype=bool)
+            if deletes is not None:
+                live[deletes] = False
+            records = np.flatnonzero(live).tolist()
+            for start in range(0, len(records), _MERGE_BATCH):
+                yield from store.get_many(records[start:start + _MERGE_BATCH])
+        finally:
+            store.close()
+
+
+def merge_segments(root: str) -> Optional[dict]:
+    """
+    把所有段中未删除的专利合并为一个新段并原子切换清单
+
+    新段在持有清单锁之外构建，提交前重新读取清单，代数已变化（期间有增量写入或其他合并）时
+    放弃本次合并；另一进程正在合并时直接返回。
+
+    Args:
+        root: 索引根目录
+
+    Returns:
+        dict: 合并统计（代数、新段名、专利数、耗时），无需合并、另一进程正在合并或合并被放弃时返回None
+    """
+    started = time.perf_counter()
+    with _file_lock(root, MERGE_LOCK_FILE, blocking=False) as acquired:
+        if not acquired:
+            logger.info("其他进程正在合并专利索引段: %s", root)
+            return None
+        # 持有合并锁时残留的临时目录都来自中途失败的合并
+        for name in os.listdir(root):
+            if name.startswith(MERGE_PREFIX):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        manifest = read_manifest(root)
+        if len(manifest["segments"]) <= 1 and not any(entry["deletes"] for entry in manifest["segments"]):
+            return None
+        temp_dir = os.path.join(root, f"{MERGE_PREFIX}{manifest['generation']:06d}")
+        try:
+            stats = build_index_from_patents(_live_patents(root, manifest), temp_dir)
+            with _file_lock(root, LOCK_FILE):
+                current = read_manifest(root)
+                if current["generation"] != manifest["generation"]:
+                    logger.warning("合并期间段清单已由第 %s 代更新到第 %s 代，放弃本次合并",
+                                   manifest["generation"], current["generation"])
+                    return None
+                name = f"{SEGMENT_PREFIX}{current['next_segment']:06d}"
+                os.rename(temp_dir, os.path.join(root, name))
+                merged = dict(current, generation=current["generation"] + 1, next_segment=current["next_segment"] + 1,
+                              segments=[{"name": name, "docs": stats["patents"], "deletes": None}])
+                _publish(root, current, merged)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return {"generation": merged["generation"], "segment": name, "patents": stats["patents"],
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+class Segment:
+    """
+    清单中的一个段及其删除标记
+    """
+
+    def __init__(self, root: str, entry: dict, base: int, nprobe: int):
+        """
+        打开段
+
+        Args:
+            root: 索引根目录
+            entry: 清单中的段条目
+            base: 段内文档号0对应的全局文档号
+            nprobe: 向量检索扫描的簇数
+        """
+        directory = os.path.join(root, entry["name"])
+        self.name = entry["name"]
+        self.base = base
+        self.index = InvertedIndex.load(directory)
+        self.store = PatentStore(directory)
+        self.columns = PatentColumns(directory)
+        self.ipc = IpcRollup(directory)
+        self.citations = CitationEdges(directory)
+        self.vectors = VectorIndex(directory, self.index, nprobe)
+        self.count = self.store.count
+        self.deleted = None
+        deletes = _load_deletes(root, entry)
+        if deletes is not None and len(deletes):
+            self.deleted = np.zeros(self.count, dtype=bool)
+            self.deleted[deletes] = True
+        self.live_count = self.count - (int(self.deleted.sum()) if self.deleted is not None else 0)
+
+    def live(self, docs: np.ndarray) -> np.ndarray:
+        """去掉已删除的段内文档号"""
+        return docs if self.deleted is None else docs[~self.deleted[docs]]
+
+    def is_live(self, record: Optional[int]) -> bool:
+        return record is not None and (self.deleted is None or not self.deleted[record])
+
+
+class _SegmentedColumns:
+    """
+    多个段的统计列，定长列拼接为全局数组，字典编码字段映射到合并后的词典
+    """
+
+    def __init__(self, segments: List[Segment]):
+        self._segments = segments
+        self._bases = np.asarray([segment.base for segment in segments], dtype=np.int64)
+        self.count = sum(segment.count for segment in segments)
+        self.application_year = np.concatenate([segment.columns.application_year for segment in segments])
+        self.grant_year = np.concatenate([segment.columns.grant_year for segment in segments])
+        self.cited_count = np.concatenate([segment.columns.cited_count for segment in segments])
+        self.vocabularies = {}
+        self._remaps = {}
+        for field in segments[0].columns.vocabularies:
+            merged: Dict[str, int] = {}
+            remaps = []
+            for segment in segments:
+                values = segment.columns.vocabularies[field]
+                remaps.append(np.asarray([merged.setdefault(value, len(merged)) for value in values], dtype=np.int64))
+            self.vocabularies[field] = list(merged)
+            self._remaps[field] = remaps
+
+    def count_codes(self, field: str, doc_ids: np.ndarray) -> np.ndarray:
+        """统计选中文档（全局文档号）中各编码值出现的文档数"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        owners = np.searchsorted(self._bases, doc_ids, side="right") - 1
+        counts = np.zeros(len(self.vocabularies[field]), dtype=np.int64)
+        for position, segment in enumerate(self._segments):
+            local = doc_ids[owners == position] - segment.base
+            if len(local):
+                local_counts = segment.columns.count_codes(field, local)
+                counts += np.bincount(self._remaps[field][position], weights=local_counts,
+                                      minlength=len(counts)).astype(np.int64)
+        return counts
+
+
+class PatentIndexView:
+    """
+    某一代清单对应的只读索引视图
+
+    各段的文档号按清单顺序依次编为全局文档号；检索、详情、统计、向量检索和引用图都在全局文档号上进行，
+    已删除的文档不会出现在任何结果中。BM25得分和查询向量按全部段未删除文档的全局统计计算。
+    """
+
+    def __init__(self, root: str, nprobe: int = DEFAULT_NPROBE, vector_dim: int = DEFAULT_VECTOR_DIM):
+        """
+        打开索引视图
+
+        Args:
+            root: 索引根目录
+            nprobe: 向量检索扫描的簇数
+            vector_dim: 旧索引目录缺少向量索引时生成的维度
+        """
+        manifest = read_manifest(root)
+        self.root = root
+        self.generation = manifest["generation"]
+        self.segments: List[Segment] = []
+        base = 0
+        for entry in manifest["segments"]:
+            ensure_segment(os.path.join(root, entry["name"]), vector_dim)
+            segment = Segment(root, entry, base, nprobe)
+            self.segments.append(segment)
+            base += segment.count
+        self.doc_count = base
+        self.live_count = sum(segment.live_count for segment in self.segments)
+        live_length = 0
+        for segment in self.segments:
+            lengths = segment.index.doc_lengths
+            live_length += int(lengths.sum(dtype=np.int64))
+            if segment.deleted is not None:
+                live_length -= int(lengths[segment.deleted].sum(dtype=np.int64))
+        self._average_length = live_length / self.live_count if self.live_count else 0.0
+        self._bases = [segment.base for segment in self.segments]
+        self._simple = len(self.segments) == 1 and self.segments[0].deleted is None
+        self.columns = self.segments[0].columns if len(self.segments) == 1 else _SegmentedColumns(self.segments)
+        self.trend = TrendEngine(self.columns)
+        self._field_counts = None
+        self._citations = None
+        self._citations_lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """视图版本，清单每次切换都会变化"""
+        return f"{self.generation}-{self.doc_count}"
+
+    def _segment_of(self, doc_id: int) -> Segment:
+        return self.segments[bisect.bisect_right(self._bases, doc_id) - 1]
+
+    def score(self, tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算所有未删除命中文档的BM25得分
+
+        Args:
+            tokens: 查询词项
+
+        Returns:
+            tuple: (全局文档号数组, 得分数组)
+        """
+        if self._simple:
+            return self.segments[0].index.score(tokens)
+        # 各段预先计算的得分贡献使用段内统计，这里按全局统计由词频重新计算
+        index = self.segments[0].index
+        doc_parts, weight_parts = [], []
+        for postings in self._live_postings(set(tokens)).values():
+            frequency = sum(len(docs) for _, docs, _ in postings)
+            if not frequency:
+                continue
+            idf = bm25_idf(self.live_count, np.asarray([frequency]))
+            for segment, docs, freqs in postings:
+                weight_parts.append(bm25_weights(idf, freqs, segment.index.doc_lengths[docs], self._average_length,
+                                                 index.k1, index.b))
+                doc_parts.append(docs.astype(np.int64) + segment.base)
+        if not doc_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        docs, weights = np.concatenate(doc_parts), np.concatenate(weight_parts)
+        # 与单段索引相同，以float64累加后转为float32，得分与段的划分无关
+        if len(docs) < self.doc_count * DENSE_ACCUMULATE_RATIO:
+            candidates, inverse = np.unique(docs, return_inverse=True)
+            return candidates, np.bincount(inverse, weights=weights).astype(np.float32)
+        dense = np.bincount(docs, weights=weights, minlength=self.doc_count)
+        candidates = np.flatnonzero(dense)
+        return candidates, dense[candidates].astype(np.float32)
+
+    def _live_postings(self, terms: Iterable[str]) -> Dict[str, List[Tuple[Segment, np.ndarray, np.ndarray]]]:
+        """
+        收集词项在各段中未删除文档的倒排记录
+
+        Args:
+            terms: 词项（不重复）
+
+        Returns:
+            dict: 词项到 (段, 段内文档号, 词频) 列表的映射
+        """
+        postings = {}
+        for term in terms:
+            parts = []
+            for segment in self.segments:
+                docs, freqs = segment.index.term_postings(term)
+                if segment.deleted is not None and len(docs):
+                    live = ~segment.deleted[docs]
+                    docs, freqs = docs[live], freqs[live]
+                if len(docs):
+                    parts.append((segment, docs, freqs))
+            postings[term] = parts
+        return postings
+
+    def get(self, doc_id: int, fields: Optional[Sequence[str]] = None) -> dict:
+        """按全局文档号读取专利"""
+        segment = self._segment_of(doc_id)
+        return segment.store.get(doc_id - segment.base, fields)
+
+    def get_many(self, doc_ids: Sequence[int], fields: Optional[Sequence[str]] = None) -> List[dict]:
+        """
+        按全局文档号批量读取专利
+
+        Args:
+            doc_ids: 全局文档号列表
+            fields: 需要读取的字段，默认读取全部字段
+
+        Returns:
+            list: 与输入顺序一致的专利记录列表
+        """
+        if self._simple:
+            return self.segments[0].store.get_many(doc_ids, fields)
+        grouped: Dict[int, List[int]] = {}
+        for position, doc_id in enumerate(doc_ids):
+            grouped.setdefault(bisect.bisect_right(self._bases, doc_id) - 1, []).append(position)
+        results: List[Optional[dict]] = [None] * len(doc_ids)
+        for index, positions in grouped.items():
+            segment = self.segments[index]
+            patents = segment.store.get_many([doc_ids[position] - segment.base for position in positions], fields)
+            for position, patent in zip(positions, patents):
+                results[position] = patent
+        return results
+
+    def lookup(self, patent_id: str) -> Optional[int]:
+        """
+        按专利号查找全局文档号，从最新的段开始查找
+
+        Args:
+            patent_id: 专利号
+
+        Returns:
+            int: 全局文档号，不存在或已删除时返回None
+        """
+        for segment in reversed(self.segments):
+            record = segment.store.lookup(patent_id)
+            if segment.is_live(record):
+                return segment.base + record
+        return None
+
+    def lookup_many(self, patent_ids: Sequence[str]) -> List[Optional[int]]:
+        """批量按专利号查找全局文档号，与输入顺序一致"""
+        return [self.lookup(patent_id) for patent_id in patent_ids]
+
+    def _recent(self, postings: Callable[[IpcRollup], np.ndarray], limit: int) -> np.ndarray:
+        """合并各段按申请年份从新到旧排列的倒排表，取前limit个未删除的文档"""
+        if self._simple:
+            return np.asarray(postings(self.segments[0].ipc)[:limit])
+        parts = [segment.live(np.asarray(postings(segment.ipc)))[:limit].astype(np.int64) + segment.base
+                 for segment in self.segments]
+        docs = np.concatenate(parts)
+        order = np.lexsort((docs, -self.columns.application_year[docs].astype(np.int32)))
+        return docs[order[:limit]]
+
+    def field_postings(self, field: str, limit: int) -> np.ndarray:
+        """
+        获取技术领域最新的若干篇专利
+
+        Args:
+            field: 技术领域
+            limit: 返回数量
+
+        Returns:
+            ndarray: 按申请年份从新到旧排列的全局文档号
+        """
+        return self._recent(lambda ipc: ipc.field_postings(field), limit)
+
+    def prefix_postings(self, prefix: str, limit: int) -> np.ndarray:
+        """
+        获取IPC分类号前缀最新的若干篇专利
+
+        Args:
+            prefix: IPC分类号或前缀
+            limit: 返回数量
+
+        Returns:
+            ndarray: 按申请年份从新到旧排列的全局文档号
+        """
+        return self._recent(lambda ipc: ipc.prefix_postings(prefix), limit)
+
+    def field_counts(self) -> Dict[str, int]:
+        """
+        获取各技术领域未删除的专利数
+
+        Returns:
+            dict: 技术领域到专利数的映射
+        """
+        if self._field_counts is None:
+            counts: Dict[str, int] = {}
+            for segment in self.segments:
+                for field, count in segment.ipc.field_counts().items():
+                    if segment.deleted is not None:
+                        count = len(segment.live(np.asarray(segment.ipc.field_postings(field))))
+                    counts[field] = counts.get(field, 0) + count
+            self._field_counts = counts
+        return self._field_counts
+
+    def similar(self, tokens: Sequence[str], limit: int) -> List[Tuple[int, float]]:
+        """
+        检索与查询最相似的未删除文档
+
+        Args:
+            tokens: 查询词项
+            limit: 返回数量
+
+        Returns:
+            list: (全局文档号, 余弦相似度) 列表，按相似度降序排列
+        """
+        if self._simple:
+            return self.segments[0].vectors.search(tokens, limit)
+        idf = {}
+        for term, postings in self._live_postings(set(tokens)).items():
+            frequency = sum(len(docs) for _, docs, _ in postings)
+            if frequency:
+                idf[term] = float(smooth_idf(np.asarray(frequency), self.live_count))
+        doc_parts, score_parts = [], []
+        for segment in self.segments:
+            for doc_id, score in segment.vectors.search(tokens, limit, deleted=segment.deleted, idf=idf):
+                doc_parts.append(segment.base + doc_id)
+                score_parts.append(score)
+        return top_k(np.asarray(doc_parts, dtype=np.int64), np.asarray(score_parts, dtype=np.float32), limit)
+
+    @property
+    def citations(self) -> CitationGraph:
+        """
+        全部段未删除专利之间的引用图，首次访问时构建，之后随视图复用
+
+        Returns:
+            CitationGraph: 以全局文档号为节点的引用图
+        """
+        if self._citations is None:
+            with self._citations_lock:
+                if self._citations is None:
+                    self._citations = self._build_citations()
+        return self._citations
+
+    def _build_citations(self) -> CitationGraph:
+        """把各段按专利号哈希记录的引用解析为全局文档号"""
+        started = time.perf_counter()
+        # 未删除专利的（专利号哈希, 全局文档号），同号专利在旧段中已被删除，每个专利号至多一条
+        hash_parts, doc_parts, live_parts = [], [], []
+        for segment in self.segments:
+            hashes, records = segment.store.id_table()
+            if segment.deleted is not None:
+                keep = ~segment.deleted[records]
+                hashes, records = hashes[keep], records[keep]
+            hash_parts.append(hashes)
+            doc_parts.append(records + segment.base)
+            live_parts.append(np.ones(segment.count, dtype=bool) if segment.deleted is None else ~segment.deleted)
+        hashes = np.concatenate(hash_parts)
+        order = np.argsort(hashes)
+        hashes, docs = hashes[order], np.concatenate(doc_parts)[order]
+
+        source_parts, target_parts = [], []
+        for segment in self.segments:
+            sources = segment.citations.sources()
+            targets = np.asarray(segment.citations.targets)
+            if segment.deleted is not None:
+                keep = ~segment.deleted[sources]
+                sources, targets = sources[keep], targets[keep]
+            positions = np.minimum(np.searchsorted(hashes, targets), max(len(hashes) - 1, 0))
+            found = hashes[positions] == targets if len(hashes) else np.zeros(len(targets), dtype=bool)
+            source_parts.append(sources[found] + segment.base)
+            target_parts.append(docs[positions[found]])
+        live = None if all(segment.deleted is None for segment in self.segments) else np.concatenate(live_parts)
+        graph = CitationGraph(np.concatenate(source_parts), np.concatenate(target_parts), self.doc_count, live)
+        logger.info("引用图构建完成，引用关系: %s，耗时: %.2fs", graph.edge_count, time.perf_counter() - started)
+        return graph
+
+    def close(self) -> None:
+        """关闭各段的专利存储"""
+        for segment in self.segments:
+            segment.store.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="本地专利索引的增量写入与段合并")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="写入一批增量专利")
+    add.add_argument("root", help="索引根目录")
+    add.add_argument("jsonl_path", nargs="?", help="新增或更新的专利（JSONL，每行一条）")
+    add.add_argument("--withdraw", help="撤回的专利号文件，每行一个专利号")
+    merge = commands.add_parser("merge", help="合并全部段")
+    merge.add_argument("root", help="索引根目录")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        withdrawn = []
+        if args.withdraw:
+            with open(args.withdraw, "r", encoding="utf-8") as f:
+                withdrawn = [line.strip() for line in f if line.strip()]
+        patents = iter_jsonl(args.jsonl_path) if args.jsonl_path else ()
+        print(json.dumps(apply_delta(args.root, patents, withdrawn), ensure_ascii=False))
+    else:
+        print(json.dumps(merge_segments(args.root), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
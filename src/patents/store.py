@@ -0,0 +1,364 @@
+"""
+内存映射的列式专利存储
+
+每个字段一列：定长的偏移表（uint64，记录数+1）加上按记录顺序拼接的UTF-8字符串堆，
+列表字段以单元分隔符连接存放。专利号通过开放寻址哈希表定位到记录号，
+详情查询只需几次数组访问，不必把语料加载为Python对象；
+所有文件以内存映射方式打开，多个工作进程共享同一份页缓存。
+
+构建工具：
+    python -m src.patents.store patents.jsonl data/patent_store
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .corpus import LIST_FIELDS, TEXT_FIELDS, iter_jsonl
+
+STORE_FORMAT_VERSION = 1
+STORE_META_FILE = "store_meta.json"
+
+# 列表字段各元素之间的分隔符（ASCII单元分隔符）
+LIST_SEPARATOR = "\x1f"
+
+STORE_FIELDS = ("patent_id",) + TEXT_FIELDS + tuple(LIST_FIELDS)
+
+_EMPTY_SLOT = -1
+
+# 偏移表为小端uint64数组；哈希表每个槽位为（专利号哈希, 记录号）
+_OFFSET_PAIR = struct.Struct("<QQ")
+_SLOT = struct.Struct("<Qq")
+
+
+def hash_patent_id(patent_id: str) -> int:
+    """
+    计算专利号的64位哈希（跨进程稳定）
+
+    Args:
+        patent_id: 专利号
+
+    Returns:
+        int: 哈希值
+    """
+    return int.from_bytes(hashlib.blake2b(patent_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class PatentStoreWriter:
+    """
+    专利存储写入器，按记录顺序追加专利，结束时写出偏移表和专利号哈希表
+    """
+
+    def __init__(self, directory: str):
+        """
+        初始化写入器
+
+        Args:
+            directory: 存储目录
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._heaps = {field: open(os.path.join(directory, f"{field}.heap"), "wb") for field in STORE_FIELDS}
+        self._offsets = {field: array("Q", [0]) for field in STORE_FIELDS}
+        self._hashes = array("Q")
+
+    def add(self, patent: dict) -> int:
+        """
+        追加一条规范化专利记录
+
+        Args:
+            patent: 规范化后的专利记录
+
+        Returns:
+            int: 记录号
+        """
+        for field in STORE_FIELDS:
+            value = patent.get(field)
+            if isinstance(value, list):
+                value = LIST_SEPARATOR.join(value)
+            data = (value or "").encode("utf-8")
+            self._heaps[field].write(data)
+            offsets = self._offsets[field]
+            offsets.append(offsets[-1] + len(data))
+        self._hashes.append(hash_patent_id(patent["patent_id"]))
+        return len(self._hashes) - 1
+
+    def close(self) -> int:
+        """
+        写出偏移表、哈希表和元数据
+
+        Returns:
+            int: 记录数
+        """
+        for field in STORE_FIELDS:
+            self._heaps[field].close()
+            with open(os.path.join(self.directory, f"{field}.offsets"), "wb") as f:
+                f.write(np.asarray(self._offsets[field], dtype="<u8").tobytes())
+
+        count = len(self._hashes)
+        # 装载因子不超过0.5，线性探测的平均探测次数接近1
+        capacity = 1 << max(4, (2 * count - 1).bit_length())
+        slots = [_EMPTY_SLOT] * capacity
+        slot_hashes = [0] * capacity
+        mask = capacity - 1
+        for record, value in enumerate(self._hashes):
+            slot = value & mask
+            # 专利号重复时后出现的记录覆盖先前的记录
+            while slots[slot] != _EMPTY_SLOT and not (
+                    slot_hashes[slot] == value and self._same_id(slots[slot], record)):
+                slot = (slot + 1) & mask
+            slots[slot] = record
+            slot_hashes[slot] = value
+        table = np.empty(capacity, dtype=[("hash", "<u8"), ("record", "<i8")])
+        table["hash"] = slot_hashes
+        table["record"] = slots
+        with open(os.path.join(self.directory, "id_index.bin"), "wb") as f:
+            f.write(table.tobytes())
+
+        # 元数据最后写出，存在即表示存储完整
+        with open(os.path.join(self.directory, STORE_META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": STORE_FORMAT_VERSION, "count": count, "fields": list(STORE_FIELDS)}, f)
+        return count
+
+    def _same_id(self, first: int, second: int) -> bool:
+        offsets = self._offsets["patent_id"]
+        with open(os.path.join(self.directory, "patent_id.heap"), "rb") as f:
+            def read(record):
+                f.seek(offsets[record])
+                return f.read(offsets[record + 1] - offsets[record])
+            return read(first) == read(second)
+
+
+class PatentStore:
+    """
+    只读的内存映射专利存储
+    """
+
+    def __init__(self, directory: str):
+        """
+        打开专利存储
+
+        Args:
+            directory: 存储目录
+        """
+        with open(os.path.join(directory, STORE_META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"不支持的专利存储版本: {meta.get('version')}")
+        self.directory = directory
+        self.count = meta["count"]
+        self.fields = tuple(meta["fields"])
+        self._maps = []
+        self._offsets = {}
+        self._heaps = {}
+        for field in self.fields:
+            self._offsets[field] = self._map(f"{field}.offsets")
+            self._heaps[field] = self._map(f"{field}.heap")
+        self._id_index = self._map("id_index.bin")
+        self._mask = len(self._id_index) // _SLOT.size - 1
+
+    def _map(self, name: str):
+        with open(os.path.join(self.directory, name), "rb") as f:
+            # 空文件无法映射，按空字节串处理
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def __len__(self) -> int:
+        return self.count
+
+    def read_field(self, record: int, field: str):
+        """
+        读取一条记录的单个字段
+
+        Args:
+            record: 记录号
+            field: 字段名
+
+        Returns:
+            str 或 list: 字段值，列表字段返回字符串列表
+        """
+        start, end = _OFFSET_PAIR.unpack_from(self._offsets[field], record * 8)
+        value = self._heaps[field][start:end].decode("utf-8")
+        if field in LIST_FIELDS:
+            return value.split(LIST_SEPARATOR) if value else []
+        return value
+
+    def get(self, record: int, fields: Optional[Sequence[str]] = None) -> dict:
+        """
+        读取一条记录
+
+        Args:
+            record: 记录号
+            fields: 需要读取的字段，默认读取全部字段
+
+        Returns:
+            dict: 专利记录
+        """
+        if not 0 <= record < self.count:
+            raise IndexError(f"记录号超出范围: {record}")
+        return {field: self.read_field(record, field) for field in (fields or self.fields)}
+
+    def lookup(self, patent_id: str) -> Optional[int]:
+        """
+        按专利号查找记录号
+
+        Args:
+            patent_id: 专利号
+
+        Returns:
+            int: 记录号，不存在时返回None
+        """
+        value = hash_patent_id(patent_id)
+        slot = value & self._mask
+        while True:
+            slot_hash, record = _SLOT.unpack_from(self._id_index, slot * _SLOT.size)
+            if record == _EMPTY_SLOT:
+                return None
+            if slot_hash == value and self.read_field(record, "patent_id") == patent_id:
+                return record
+            slot = (slot + 1) & self._mask
+
+    def get_by_id(self, patent_id: str, fields: Optional[Sequence[str]] = None) -> Optional[dict]:
+        """
+        按专利号读取记录
+
+        Args:
+            patent_id: 专利号
+            fields: 需要读取的字段，默认读取全部字段
+
+        Returns:
+            dict: 专利记录，不存在时返回None
+        """
+        record = self.lookup(patent_id)
+        return None if record is None else self.get(record, fields)
+
+    def lookup_many(self, patent_ids: Sequence[str]) -> List[Optional[int]]:
+        """
+        批量按专利号查找记录号
+
+        Args:
+            patent_ids: 专利号列表
+
+        Returns:
+            list: 与输入顺序一致的记录号列表，不存在的专利号对应None
+        """
+        return [self.lookup(patent_id) for patent_id in patent_ids]
+
+    def get_many(self, records: Sequence[int], fields: Optional[Sequence[str]] = None) -> List[dict]:
+        """
+        批量读取记录
+
+        按字段逐列读取，每列内按记录号（即堆中偏移）递增的顺序访问，
+        读取是顺序的，相邻记录落在同一页上时只触发一次缺页。
+
+        Args:
+            records: 记录号列表，可以重复
+            fields: 需要读取的字段，默认读取全部字段
+
+        Returns:
+            list: 与输入顺序一致的专利记录列表
+        """
+        unique = sorted(set(records))
+        if unique and not (0 <= unique[0] and unique[-1] < self.count):
+            raise IndexError(f"记录号超出范围: {unique[0] if unique[0] < 0 else unique[-1]}")
+        patents = {record: {} for record in unique}
+        positions = np.asarray(unique, dtype=np.int64)
+        for field in (fields or self.fields):
+            # 一次取出全部选中记录的起止偏移
+            offsets = self.offsets(field)
+            heap = self._heaps[field]
+            is_list = field in LIST_FIELDS
+            for record, start, end in zip(unique, offsets[positions].tolist(), offsets[positions + 1].tolist()):
+                value = heap[start:end].decode("utf-8")
+                if is_list:
+                    value = value.split(LIST_SEPARATOR) if value else []
+                patents[record][field] = value
+        # 重复的记录号各自返回独立的字典
+        return [dict(patents[record]) for record in records]
+
+    def offsets(self, field: str) -> np.ndarray:
+        """
+        获取字段偏移表的只读数组视图，用于批量读取
+
+        Args:
+            field: 字段名
+
+        Returns:
+            ndarray: uint64偏移表，长度为记录数+1
+        """
+        return np.frombuffer(self._offsets[field], dtype="<u8")
+
+    def id_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取专利号哈希表中已占用的槽位，用于批量解析专利号
+
+        Returns:
+            tuple: (专利号哈希数组, 记录号数组)，同号专利只含最后出现的记录
+        """
+        table = np.frombuffer(self._id_index, dtype=[("hash", "<u8"), ("record", "<i8")])
+        used = table["record"] != _EMPTY_SLOT
+        return table["hash"][used], table["record"][used]
+
+    def close(self) -> None:
+        """关闭存储"""
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+        self._offsets = {}
+        self._heaps = {}
+
+
+def write_store(patents: Iterable[dict], directory: str) -> int:
+    """
+    将规范化专利记录写入存储
+
+    Args:
+        patents: 规范化专利记录序列
+        directory: 存储目录
+
+    Returns:
+        int: 记录数
+    """
+    writer = PatentStoreWriter(directory)
+    for patent in patents:
+        writer.add(patent)
+    return writer.close()
+
+
+def build_store(jsonl_path: str, out_dir: str) -> dict:
+    """
+    从JSONL专利数据构建存储
+
+    Args:
+        jsonl_path: JSONL专利数据路径
+        out_dir: 输出目录
+
+    Returns:
+        dict: 构建统计（专利数、耗时）
+    """
+    started = time.perf_counter()
+    count = write_store(iter_jsonl(jsonl_path), out_dir)
+    return {"patents": count, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="将JSONL专利数据转换为内存映射的列式专利存储")
+    parser.add_argument("jsonl_path", help="JSONL专利数据路径，每行一条专利")
+    parser.add_argument("out_dir", help="存储输出目录")
+    args = parser.parse_args(argv)
+    print(json.dumps(build_store(args.jsonl_path, args.out_dir), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+专利文本分词
+
+文本先做NFKC规范化（全角字母数字转为半角），中文按连续汉字切分为二元字符组（单个汉字保留为一元），
+英文和数字按单词切分并转为小写。
+二元切分不依赖词典，对专业术语和新词的召回稳定，索引和查询使用同一套规则。
+"""
+
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    将文本切分为索引词项
+
+    Args:
+        text: 文本
+
+    Returns:
+        list: 词项列表（保留重复，用于统计词频）
+    """
+    if not text:
+        return []
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if run[0] < "㐀" or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+
+def normalize_query(text: str) -> str:
+    """
+    规范化查询文本，用作查询结果缓存的键
+
+    做NFKC规范化（全角字母数字和空格转为半角）、转小写并合并连续空白，
+    规范化前后的文本分词结果相同，检索结果也相同。
+
+    Args:
+        text: 查询文本
+
+    Returns:
+        str: 规范化后的查询文本
+    """
+    return " ".join(unicodedata.normalize("NFKC", text or "").lower().split())
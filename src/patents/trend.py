@@ -0,0 +1,171 @@
+"""
+专利趋势分析
+
+在专利统计列上用向量化分组计算逐年申请量、授权量和引用量、增长率，
+以及主要申请人、发明人和技术分布，返回与 analyze_patent_trend 一致的结构；
+提供各文档的被引次数时，同时统计逐年被引量和被引最多的专利。
+"""
+
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from .columns import UNKNOWN_YEAR, PatentColumns
+from .index import top_k
+
+# IPC分类号取前4位（小类）统计技术分布
+IPC_SUBCLASS_LENGTH = 4
+
+
+def growth_rate(first: int, last: int, periods: int) -> str:
+    """
+    计算年均复合增长率
+
+    Args:
+        first: 首年数值
+        last: 末年数值
+        periods: 间隔年数
+
+    Returns:
+        str: 百分比字符串，首年为0时返回"0%"
+    """
+    if periods <= 0 or first <= 0:
+        return "0%"
+    return f"{((last / first) ** (1 / periods) - 1) * 100:.0f}%"
+
+
+def _ranking(vocabulary: List[str], counts: np.ndarray, k: int) -> list:
+    candidates = np.flatnonzero(counts)
+    return [{"name": vocabulary[code], "count": int(count)}
+            for code, count in top_k(candidates, counts[candidates], k)]
+
+
+class TrendEngine:
+    """
+    专利趋势分析引擎
+    """
+
+    def __init__(self, columns: PatentColumns):
+        """
+        初始化趋势分析引擎
+
+        Args:
+            columns: 专利统计列
+        """
+        self.columns = columns
+        # IPC分类号到小类编号的映射，用于按小类汇总
+        subclasses = {}
+        self._ipc_subclass_names = []
+        mapping = []
+        for code in columns.vocabularies["ipc_classification"]:
+            subclass = code[:IPC_SUBCLASS_LENGTH].upper()
+            if subclass not in subclasses:
+                subclasses[subclass] = len(self._ipc_subclass_names)
+                self._ipc_subclass_names.append(subclass)
+            mapping.append(subclasses[subclass])
+        self._ipc_subclass_of = np.asarray(mapping, dtype=np.int32)
+
+    def analyze(self, doc_ids: np.ndarray, keywords: str, years: int = 5, top: int = 5,
+                last_year: Optional[int] = None, cited_by: Optional[np.ndarray] = None) -> dict:
+        """
+        分析命中专利的趋势
+
+        Args:
+            doc_ids: 命中的文档号
+            keywords: 关键词（原样写入结果）
+            years: 分析年限
+            top: 主要申请人、发明人的返回数量
+            last_year: 分析的最后一年，默认取命中专利中最晚的申请年份
+            cited_by: 全部文档的被引次数（按文档号下标），None表示不统计被引
+
+        Returns:
+            dict: 专利趋势分析结果，统计被引时top_cited_patents中的专利以doc_id表示
+
+        Raises:
+            ValueError: 分析年限小于1
+        """
+        if years < 1:
+            raise ValueError(f"分析年限必须至少为1年: {years}")
+        columns = self.columns
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        application_year = columns.application_year[doc_ids]
+
+        if last_year is None:
+            known_years = application_year[application_year != UNKNOWN_YEAR]
+            last_year = int(known_years.max()) if len(known_years) else time.localtime().tm_year
+        base_year = last_year - years + 1
+
+        # 按年份分组计数：年份减去起始年作为下标，窗口外的专利被过滤掉
+        in_window = (application_year >= base_year) & (application_year <= last_year)
+        window_ids = doc_ids[in_window]
+        offsets = application_year[in_window].astype(np.int64) - base_year
+        applications = np.bincount(offsets, minlength=years)
+        # 引用数按该年申请专利引用的文献数统计
+        citations = np.bincount(offsets, weights=columns.cited_count[window_ids], minlength=years)
+        grant_year = columns.grant_year[doc_ids]
+        granted = (grant_year >= base_year) & (grant_year <= last_year)
+        grants = np.bincount(grant_year[granted].astype(np.int64) - base_year, minlength=years)
+
+        year_data = [
+            {"year": base_year + i, "applications": int(applications[i]),
+             "grants": int(grants[i]), "citations": int(citations[i])}
+            for i in range(years)
+        ]
+        impact = {}
+        if cited_by is not None:
+            # 被引量按该年申请专利被语料中其他专利引用的次数统计
+            received = cited_by[window_ids]
+            yearly_cited_by = np.bincount(offsets, weights=received, minlength=years)
+            for i, item in enumerate(year_data):
+                item["cited_by"] = int(yearly_cited_by[i])
+            cited = np.flatnonzero(received)
+            impact = {
+                "total_cited_by": int(received.sum()),
+                "top_cited_patents": [{"doc_id": int(doc_id), "citation_count": int(count)}
+                                      for doc_id, count in top_k(window_ids[cited], received[cited], top)],
+            }
+
+        vocabularies = columns.vocabularies
+        key_applicants = _ranking(vocabularies["applicant"], columns.count_codes("applicant", window_ids), top)
+        key_inventors = _ranking(vocabularies["inventor"], columns.count_codes("inventor", window_ids), top)
+
+        ipc_counts = columns.count_codes("ipc_classification", window_ids)
+        subclass_counts = np.bincount(self._ipc_subclass_of, weights=ipc_counts,
+                                      minlength=len(self._ipc_subclass_names)).astype(np.int64)
+        total_subclasses = int(subclass_counts.sum())
+        technological_focus = [
+            {"field": item["name"], "percentage": round(item["count"] * 100 / total_subclasses)}
+            for item in _ranking(self._ipc_subclass_names, subclass_counts, 4)
+        ]
+
+        total_applications = int(applications.sum())
+        rates = {
+            "applications": growth_rate(year_data[0]["applications"], year_data[-1]["applications"], years - 1),
+            "grants": growth_rate(year_data[0]["grants"], year_data[-1]["grants"], years - 1),
+            "citations": growth_rate(year_data[0]["citations"], year_data[-1]["citations"], years - 1),
+        }
+        return {
+            "keywords": keywords,
+            "analysis_period": f"{base_year}-{last_year}",
+            "yearly_data": year_data,
+            "total_applications": total_applications,
+            "total_grants": int(grants.sum()),
+            "total_citations": int(citations.sum()),
+            "growth_rate": rates,
+            "key_applicants": key_applicants,
+            "key_inventors": key_inventors,
+            "technological_focus": technological_focus,
+            **impact,
+            "matched_patents": int(len(doc_ids)),
+            "conclusion": self._conclusion(base_year, last_year, total_applications, rates, key_applicants),
+        }
+
+    @staticmethod
+    def _conclusion(base_year: int, last_year: int, total: int, rates: dict, applicants: list) -> str:
+        if total == 0:
+            return f"{base_year}-{last_year}年未检索到相关专利申请。"
+        text = f"{base_year}-{last_year}年共有相关专利申请{total}件，申请量年均增长率为{rates['applications']}"
+        if applicants:
+            text += "，主要申请人为" + "、".join(item["name"] for item in applicants[:3])
+        return text + "。"
@@ -17,6 +17,8 @@ from .doubao_ai_service_impl import (
     DoubaoAnalysisService
 )
 
+from .local_patent_service_impl import LocalPatentQueryService
+
 
 def get_document_recognition_service(config: dict = None) -> DocumentRecognitionService:
     """
@@ -38,11 +40,17 @@ def get_patent_query_service(config: dict = None) -> PatentQueryService:
     获取专利查询服务实例
     
     Args:
-        config: 豆包API配置参数（可选）
+        config: 豆包API配置参数（可选），patent_query.backend 为 "local" 时
+            使用 patent_query 中的配置创建本地专利查询服务
         
     Returns:
         PatentQueryService: 专利查询服务实例
     """
+    patent_config = (config or {}).get("patent_query") or {}
+    if patent_config.get("backend") == "local":
+        # 使用本地专利索引
+        return LocalPatentQueryService(patent_config)
+    
     # 使用豆包API服务
     service = DoubaoPatentQueryService(config)
     return service
@@ -77,6 +85,7 @@ __all__ = [
     'DoubaoDocumentRecognitionService',
     'DoubaoPatentQueryService',
     'DoubaoAnalysisService',
+    'LocalPatentQueryService',
     
     # 工厂函数
     'get_document_recognition_service',
@@ -131,6 +131,20 @@ class PatentQueryService(AIServiceBase):
         """
         pass
     
+    @abstractmethod
+    def get_patent_details_bulk(self, patent_ids: list) -> dict:
+        """
+        批量获取专利详细信息
+        
+        Args:
+            patent_ids: 专利ID列表
+            
+        Returns:
+            dict: patents为与输入顺序一致的专利详细信息列表（不含未找到的专利），
+                  missing为未找到的专利ID列表
+        """
+        pass
+    
     @abstractmethod
     def analyze_patent_trend(self, keywords: str, years: int = 5) -> dict:
         """
@@ -144,6 +158,20 @@ class PatentQueryService(AIServiceBase):
             dict: 专利趋势分析结果
         """
         pass
+    
+    @abstractmethod
+    def search_similar(self, text: str, limit: int = 10) -> list:
+        """
+        检索与给定文本相似的专利
+        
+        Args:
+            text: 科研成果或技术方案的描述文本
+            limit: 返回结果数量限制
+            
+        Returns:
+            list: 按相似度降序排列的专利信息列表，包含similarity_score
+        """
+        pass
 
 
 class AnalysisService(AIServiceBase):
@@ -176,6 +176,16 @@ class MockPatentQueryService(PatentQueryService):
         
         return mock_results
     
+    def search_similar(self, text: str, limit: int = 10) -> list:
+        """
+        模拟检索相似专利
+        """
+        if not self._initialized:
+            raise RuntimeError("服务未初始化")
+        
+        # 模拟结果已包含相似度
+        return self.query_by_keyword(text[:20], limit)
+    
     def query_by_technology_field(self, field: str, limit: int = 10) -> list:
         """
         模拟按技术领域查询专利
@@ -227,6 +237,18 @@ class MockPatentQueryService(PatentQueryService):
             ]
         }
     
+    def get_patent_details_bulk(self, patent_ids: list) -> dict:
+        """
+        模拟批量获取专利详细信息
+        """
+        if not self._initialized:
+            raise RuntimeError("服务未初始化")
+        
+        return {
+            "patents": [self.get_patent_details(patent_id) for patent_id in patent_ids],
+            "missing": []
+        }
+    
     def analyze_patent_trend(self, keywords: str, years: int = 5) -> dict:
         """
         模拟分析专利趋势
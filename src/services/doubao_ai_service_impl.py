@@ -1,7 +1,9 @@
+import asyncio
 import json
 import requests
 import os
 import re
+import time
 from typing import Dict, List, Any, Optional
 from .ai_service_base import (
     DocumentRecognitionService, 
@@ -9,9 +11,30 @@ from .ai_service_base import (
     AnalysisService
 )
 from src.utils import get_logger, log_info, log_error, AIServiceError
+from src.utils.tracing import get_tracer
+from src.utils.metrics import get_registry
+from src.utils.usage import get_usage_tracker, current_usage_labels, usage_context
+from .prompt_budget import PromptBudget, estimate_tokens
+from .prompt_templates import DEFAULT_SYSTEM_PROMPT, get_prompt_registry
+from .llm_batcher import DEFAULT_BATCHING_SETTINGS, MicroBatcher
 
 logger = get_logger(__name__)
 
+# 模型调用指标
+llm_requests_total = get_registry().counter(
+    "llm_requests_total", "模型API调用次数", ("service", "status")
+)
+llm_request_duration_seconds = get_registry().histogram(
+    "llm_request_duration_seconds", "模型API调用耗时（秒）", ("service",)
+)
+llm_tokens = get_registry().histogram(
+    "llm_tokens", "单次模型调用的token数", ("service", "kind"),
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+
+# 模拟模式下没有指定回答时返回的通用回答
+SIMULATED_REPLY = "基于提供的数据，该科研成果具有较高的转化潜力。建议采取分阶段转化策略，重点关注知识产权保护和商业模式创新。"
+
 class DoubaoBaseService:
     """
     豆包API服务基础类
@@ -23,6 +46,12 @@ class DoubaoBaseService:
         self._api_key = None
         self._base_url = "https://api.doubao.com/chat/completions"
         self._model = "ERNIE-Bot-4"
+        self._prompt_budget = PromptBudget()
+        self._system_prompt = DEFAULT_SYSTEM_PROMPT
+        self._simulate = False
+        self._batching = dict(DEFAULT_BATCHING_SETTINGS)
+        self._batcher = None
+        self.tracer = get_tracer()
         
         # 如果提供了配置，立即初始化
         if config:
@@ -33,21 +62,26 @@ class DoubaoBaseService:
         初始化豆包API服务
         
         Args:
-            config: 服务配置，必须包含api_key
+            config: 服务配置，必须包含api_key；simulate为True时不请求上游，返回模拟回答，
+                    用量按估算的token数照常记录
         """
         try:
             self._config = config
             self._api_key = config.get("api_key")
             self._model = config.get("model", "ERNIE-Bot-4")
+            self._prompt_budget = PromptBudget.from_config(config.get("prompt_budget"))
+            self._system_prompt = config.get("system_prompt", DEFAULT_SYSTEM_PROMPT)
+            self._simulate = config.get("simulate", False)
+            self._batching = {**DEFAULT_BATCHING_SETTINGS, **(config.get("batching") or {})}
             
             if not self._api_key:
                 raise ValueError("豆包API密钥未提供")
             
             self._initialized = True
-            log_info(f"豆包API服务已初始化，使用模型: {self._model}")
+            log_info("豆包API服务已初始化，使用模型: %s", self._model)
             return True
         except Exception as e:
-            log_error(f"豆包API服务初始化失败: {str(e)}")
+            log_error("豆包API服务初始化失败: %s", e)
             return False
     
     def shutdown(self) -> bool:
@@ -55,6 +89,9 @@ class DoubaoBaseService:
         关闭服务
         """
         self._initialized = False
+        if self._batcher is not None:
+            self._batcher.shutdown()
+            self._batcher = None
         log_info("豆包API服务已关闭")
         return True
     
@@ -65,13 +102,55 @@ class DoubaoBaseService:
         """
         return self._initialized
     
-    def _call_api(self, prompt: str, max_tokens: int = 2048) -> str:
+    def set_tracer(self, tracer) -> None:
+        """
+        设置追踪器（默认使用全局追踪器）
+        
+        Args:
+            tracer: Tracer实例
+        """
+        self.tracer = tracer
+    
+    def render_prompt(self, name: str, key: Optional[str] = None, **values):
+        """
+        从模板注册表选择模板版本并渲染提示词
+        
+        Args:
+            name: 模板名称
+            key: A/B分流键（如会话ID）
+            **values: 模板字段值
+            
+        Returns:
+            tuple: (模板, 渲染后的提示词)
+        """
+        template = get_prompt_registry().select(name, key)
+        return template, template.render(**values)
+    
+    def prompt_token_report(self, name: str, sample_values: dict) -> dict:
+        """
+        按配置的系统消息统计模板各版本在样例数据上的token数
+        
+        Args:
+            name: 模板名称
+            sample_values: 样例字段值
+            
+        Returns:
+            dict: 版本号到 {prefix_tokens, total_tokens} 的映射
+        """
+        return get_prompt_registry().token_report(name, sample_values, self._system_prompt)
+    
+    def _call_api(self, prompt: str, max_tokens: Optional[int] = None, system: Optional[str] = None,
+                  simulated_reply: Optional[str] = None, usage_shares: Optional[list] = None) -> str:
         """
         调用豆包API
         
         Args:
             prompt: 提示文本
-            max_tokens: 最大生成 tokens 数
+            max_tokens: 最大生成 tokens 数，None时按当前分析阶段从提示词预算中选择
+            system: 系统消息，None时使用配置中的 system_prompt
+            simulated_reply: 模拟模式下返回的回答，None时使用通用的模拟回答
+            usage_shares: 合并调用时为 [(任务上下文, 权重), ...]，用量按权重拆分记入各任务；
+                None时记入当前上下文
             
         Returns:
             str: API 返回的文本内容
@@ -79,6 +158,111 @@ class DoubaoBaseService:
         if not self._initialized:
             raise AIServiceError("豆包API服务未初始化", "DoubaoBaseService")
         
+        if max_tokens is None:
+            max_tokens = self._prompt_budget.max_tokens_for(current_usage_labels()["stage"])
+        
+        service = type(self).__name__
+        start = time.perf_counter()
+        usage = {}
+        status = "error"
+        try:
+            with self.tracer.span("llm.call", service=service, model=self._model,
+                                  max_tokens=max_tokens, prompt_chars=len(prompt)) as span:
+                if self._simulate:
+                    content, usage = self._simulated_completion(prompt, system or self._system_prompt, simulated_reply)
+                else:
+                    content, usage = self._request_completion(prompt, max_tokens, system or self._system_prompt, span)
+            status = "ok"
+            return content
+        finally:
+            latency = time.perf_counter() - start
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+            llm_request_duration_seconds.observe(latency, service)
+            llm_requests_total.inc(service, status)
+            if usage:
+                llm_tokens.observe(prompt_tokens, service, "prompt")
+                llm_tokens.observe(completion_tokens, service, "completion")
+            if usage_shares is None:
+                get_usage_tracker().record(
+                    self._model, prompt_tokens, completion_tokens, latency,
+                    error=status == "error", service=service
+                )
+            else:
+                get_usage_tracker().record_shared(
+                    usage_shares, self._model, prompt_tokens, completion_tokens, latency,
+                    error=status == "error", service=service
+                )
+    
+    def call_api_many(self, prompts: List[str], max_tokens: Optional[int] = None) -> list:
+        """
+        批量调用豆包API
+        
+        配置中启用 batching 时通过微批处理器合并短任务并发提交，否则逐条调用。
+        每条任务的失败互不影响。
+        
+        Args:
+            prompts: 提示词列表
+            max_tokens: 每条任务的最大生成 tokens 数
+            
+        Returns:
+            list: 与输入顺序一致，成功的位置为回答文本，失败的位置为异常对象
+        """
+        if not self._initialized:
+            raise AIServiceError("豆包API服务未初始化", "DoubaoBaseService")
+        
+        # 模拟模式没有上游调用可以合并
+        if self._batching["enabled"] and not self._simulate:
+            if self._batcher is None:
+                self._batcher = MicroBatcher(
+                    self._call_api,
+                    window=self._batching["window"],
+                    max_batch_size=self._batching["max_batch_size"],
+                    max_item_tokens=self._batching["max_item_tokens"],
+                    max_concurrency=self._batching["max_concurrency"],
+                    default_max_tokens=self._prompt_budget.max_tokens_for("batch_item"),
+                    max_batch_tokens=self._batching["max_batch_tokens"]
+                )
+            return self._batcher.map(prompts, max_tokens)
+        
+        results = []
+        for prompt in prompts:
+            try:
+                results.append(self._call_api(prompt, max_tokens))
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    @staticmethod
+    def _simulated_completion(prompt: str, system: str, reply: Optional[str]) -> tuple:
+        """
+        模拟补全：不请求上游，usage 按系统消息、提示词和回答估算
+        
+        Args:
+            prompt: 提示文本
+            system: 系统消息
+            reply: 模拟回答，None时使用通用的模拟回答
+            
+        Returns:
+            tuple: (模拟回答, 估算的 usage 字段)
+        """
+        reply = reply or SIMULATED_REPLY
+        return reply, {"prompt_tokens": estimate_tokens(system) + estimate_tokens(prompt),
+                       "completion_tokens": estimate_tokens(reply)}
+    
+    def _request_completion(self, prompt: str, max_tokens: int, system: str, span) -> tuple:
+        """
+        发送补全请求并解析返回文本
+        
+        Args:
+            prompt: 提示文本
+            max_tokens: 最大生成 tokens 数
+            system: 系统消息
+            span: 当前调用的追踪span
+            
+        Returns:
+            tuple: (API 返回的文本内容, 响应中的 usage 字段)
+        """
         try:
             headers = {
                 "Content-Type": "application/json",
@@ -88,7 +272,7 @@ class DoubaoBaseService:
             payload = {
                 "model": self._model,
                 "messages": [
-                    {"role": "system", "content": "你是一个科研成果转化分析助手。"},
+                    {"role": "system", "content": system},
                     {"role": "user", "content": prompt}
                 ],
                 "max_tokens": max_tokens,
@@ -101,19 +285,22 @@ class DoubaoBaseService:
                 json=payload
             )
             
+            span.set_attribute("status_code", response.status_code)
             response.raise_for_status()
             data = response.json()
             
+            usage = data.get("usage") or {}
+            
             if "choices" in data and len(data["choices"]) > 0:
-                return data["choices"][0]["message"]["content"]
+                return data["choices"][0]["message"]["content"], usage
             else:
                 raise AIServiceError("API响应格式错误", "DoubaoBaseService")
                 
         except requests.exceptions.RequestException as e:
-            log_error(f"API请求失败: {str(e)}")
+            log_error("API请求失败: %s", e)
             raise AIServiceError(f"API请求失败: {str(e)}", "DoubaoBaseService")
         except Exception as e:
-            log_error(f"API调用过程中发生错误: {str(e)}")
+            log_error("API调用过程中发生错误: %s", e)
             raise AIServiceError(f"API调用错误: {str(e)}", "DoubaoBaseService")
 
 class DoubaoDocumentRecognitionService(DoubaoBaseService, DocumentRecognitionService):
@@ -137,7 +324,7 @@ class DoubaoDocumentRecognitionService(DoubaoBaseService, DocumentRecognitionSer
         """
         try:
             # 模拟文档识别，实际项目中应调用OCR服务
-            log_info(f"识别文档: {file_path}")
+            log_info("识别文档: %s", file_path)
             
             # 模拟响应
             return {
@@ -155,7 +342,7 @@ class DoubaoDocumentRecognitionService(DoubaoBaseService, DocumentRecognitionSer
                 }
             }
         except Exception as e:
-            log_error(f"文档识别失败: {str(e)}")
+            log_error("文档识别失败: %s", e)
             raise AIServiceError(f"文档识别失败: {str(e)}", "DoubaoDocumentRecognitionService")
     
     def extract_tables(self, file_path: str) -> list:
@@ -169,7 +356,7 @@ class DoubaoDocumentRecognitionService(DoubaoBaseService, DocumentRecognitionSer
             list: 表格数据列表
         """
         try:
-            log_info(f"提取表格: {file_path}")
+            log_info("提取表格: %s", file_path)
             # 模拟表格提取
             return [
                 {
@@ -189,7 +376,7 @@ class DoubaoDocumentRecognitionService(DoubaoBaseService, DocumentRecognitionSer
                 }
             ]
         except Exception as e:
-            log_error(f"表格提取失败: {str(e)}")
+            log_error("表格提取失败: %s", e)
             raise AIServiceError(f"表格提取失败: {str(e)}", "DoubaoDocumentRecognitionService")
     
     def extract_keywords(self, file_path: str) -> list:
@@ -203,7 +390,7 @@ class DoubaoDocumentRecognitionService(DoubaoBaseService, DocumentRecognitionSer
             list: 关键词列表
         """
         try:
-            log_info(f"提取关键词: {file_path}")
+            log_info("提取关键词: %s", file_path)
             # 模拟关键词提取
             return [
                 {"keyword": "科研成果", "score": 0.95},
@@ -213,7 +400,7 @@ class DoubaoDocumentRecognitionService(DoubaoBaseService, DocumentRecognitionSer
                 {"keyword": "知识产权", "score": 0.82}
             ]
         except Exception as e:
-            log_error(f"关键词提取失败: {str(e)}")
+            log_error("关键词提取失败: %s", e)
             raise AIServiceError(f"关键词提取失败: {str(e)}", "DoubaoDocumentRecognitionService")
 
 class DoubaoPatentQueryService(DoubaoBaseService, PatentQueryService):
@@ -237,7 +424,7 @@ class DoubaoPatentQueryService(DoubaoBaseService, PatentQueryService):
             list: 专利信息列表
         """
         try:
-            log_info(f"关键词专利查询: {keywords}, 限制: {limit}")
+            log_info("关键词专利查询: %s, 限制: %s", keywords, limit)
             # 模拟专利查询
             return [
                 {
@@ -256,9 +443,28 @@ class DoubaoPatentQueryService(DoubaoBaseService, PatentQueryService):
                 }
             ]
         except Exception as e:
-            log_error(f"专利查询失败: {str(e)}")
+            log_error("专利查询失败: %s", e)
             raise AIServiceError(f"专利查询失败: {str(e)}", "DoubaoPatentQueryService")
     
+    def search_similar(self, text: str, limit: int = 10) -> list:
+        """
+        检索相似专利
+        
+        Args:
+            text: 科研成果或技术方案的描述文本
+            limit: 返回结果数量限制
+            
+        Returns:
+            list: 专利信息列表
+        """
+        try:
+            log_info("相似专利检索, 文本长度: %s, 限制: %s", len(text), limit)
+            # 复用关键词查询的模拟逻辑
+            return self.query_by_keyword(text, limit)
+        except Exception as e:
+            log_error("相似专利检索失败: %s", e)
+            raise AIServiceError(f"相似专利检索失败: {str(e)}", "DoubaoPatentQueryService")
+    
     def query_by_technology_field(self, field: str, limit: int = 10) -> list:
         """
         通过技术领域查询专利
@@ -271,13 +477,39 @@ class DoubaoPatentQueryService(DoubaoBaseService, PatentQueryService):
             list: 专利信息列表
         """
         try:
-            log_info(f"技术领域专利查询: {field}, 限制: {limit}")
+            log_info("技术领域专利查询: %s, 限制: %s", field, limit)
             # 复用关键词查询的模拟逻辑
             return self.query_by_keyword(field, limit)
         except Exception as e:
-            log_error(f"技术领域专利查询失败: {str(e)}")
+            log_error("技术领域专利查询失败: %s", e)
             raise AIServiceError(f"技术领域专利查询失败: {str(e)}", "DoubaoPatentQueryService")
     
+    @staticmethod
+    def _patent_detail(patent_id: str) -> dict:
+        # 模拟专利详情
+        return {
+            "patent_id": patent_id,
+            "title": "一种科研成果转化分析方法及其系统",
+            "abstract": "本发明涉及一种科研成果转化分析方法及其系统，通过多层次评估模型...",
+            "applicant": ["某大学", "某研究院"],
+            "inventors": ["张三", "李四", "王五"],
+            "application_number": "202110012345.6",
+            "application_date": "2021-01-05",
+            "publication_number": patent_id,
+            "publication_date": "2022-01-15",
+            "grant_date": "2023-03-20",
+            "ipc_classification": "G06Q10/06",
+            "legal_status": "有效",
+            "priority_info": [
+                {"country": "CN", "number": "202010123456.7", "date": "2020-12-01"}
+            ],
+            "cited_by": 15,
+            "claims": [
+                "1. 一种科研成果转化分析方法，其特征在于...",
+                "2. 根据权利要求1所述的方法，其特征在于..."
+            ]
+        }
+    
     def get_patent_details(self, patent_id: str) -> dict:
         """
         获取专利详情
@@ -289,33 +521,35 @@ class DoubaoPatentQueryService(DoubaoBaseService, PatentQueryService):
             dict: 专利详细信息
         """
         try:
-            log_info(f"获取专利详情: {patent_id}")
-            # 模拟专利详情
+            log_info("获取专利详情: %s", patent_id)
+            return self._patent_detail(patent_id)
+        except Exception as e:
+            log_error("获取专利详情失败: %s", e)
+            raise AIServiceError(f"获取专利详情失败: {str(e)}", "DoubaoPatentQueryService")
+    
+    def get_patent_details_bulk(self, patent_ids: list) -> dict:
+        """
+        批量获取专利详情
+        
+        所有专利号合并为一次上游请求，不再逐条调用 get_patent_details。
+        
+        Args:
+            patent_ids: 专利号列表
+            
+        Returns:
+            dict: patents为与输入顺序一致的专利详细信息列表，missing为未找到的专利号列表
+        """
+        try:
+            log_info("批量获取专利详情: %s 条", len(patent_ids))
+            # 模拟一次批量查询的响应：专利号到详情的映射
+            found = {patent_id: self._patent_detail(patent_id) for patent_id in dict.fromkeys(patent_ids)}
             return {
-                "patent_id": patent_id,
-                "title": "一种科研成果转化分析方法及其系统",
-                "abstract": "本发明涉及一种科研成果转化分析方法及其系统，通过多层次评估模型...",
-                "applicant": ["某大学", "某研究院"],
-                "inventors": ["张三", "李四", "王五"],
-                "application_number": "202110012345.6",
-                "application_date": "2021-01-05",
-                "publication_number": patent_id,
-                "publication_date": "2022-01-15",
-                "grant_date": "2023-03-20",
-                "ipc_classification": "G06Q10/06",
-                "legal_status": "有效",
-                "priority_info": [
-                    {"country": "CN", "number": "202010123456.7", "date": "2020-12-01"}
-                ],
-                "cited_by": 15,
-                "claims": [
-                    "1. 一种科研成果转化分析方法，其特征在于...",
-                    "2. 根据权利要求1所述的方法，其特征在于..."
-                ]
+                "patents": [found[patent_id] for patent_id in patent_ids if patent_id in found],
+                "missing": [patent_id for patent_id in patent_ids if patent_id not in found]
             }
         except Exception as e:
-            log_error(f"获取专利详情失败: {str(e)}")
-            raise AIServiceError(f"获取专利详情失败: {str(e)}", "DoubaoPatentQueryService")
+            log_error("批量获取专利详情失败: %s", e)
+            raise AIServiceError(f"批量获取专利详情失败: {str(e)}", "DoubaoPatentQueryService")
     
     def analyze_patent_trend(self, keywords: str, years: int = 5) -> dict:
         """
@@ -329,7 +563,7 @@ class DoubaoPatentQueryService(DoubaoBaseService, PatentQueryService):
             dict: 专利趋势分析结果
         """
         try:
-            log_info(f"专利趋势分析: {keywords}, 年限: {years}")
+            log_info("专利趋势分析: %s, 年限: %s", keywords, years)
             
             # 生成模拟数据
             base_year = 2023 - years + 1
@@ -379,7 +613,7 @@ class DoubaoPatentQueryService(DoubaoBaseService, PatentQueryService):
                 "conclusion": "该领域专利申请呈稳定增长趋势，主要集中在数据分析和人工智能技术方向，高校和研究机构是主要申请人。"
             }
         except Exception as e:
-            log_error(f"专利趋势分析失败: {str(e)}")
+            log_error("专利趋势分析失败: %s", e)
             raise AIServiceError(f"专利趋势分析失败: {str(e)}", "DoubaoPatentQueryService")
 
 class DoubaoAnalysisService(DoubaoBaseService, AnalysisService):
@@ -403,7 +637,7 @@ class DoubaoAnalysisService(DoubaoBaseService, AnalysisService):
             dict: 分析结果
         """
         try:
-            log_info(f"生成分析: {prompt[:50]}...")
+            log_info("生成分析: %.50s...", prompt)
             
             # 模拟分析结果
             return {
@@ -430,7 +664,7 @@ class DoubaoAnalysisService(DoubaoBaseService, AnalysisService):
                 }
             }
         except Exception as e:
-            log_error(f"生成分析失败: {str(e)}")
+            log_error("生成分析失败: %s", e)
             raise AIServiceError(f"生成分析失败: {str(e)}", "DoubaoAnalysisService")
     
     def generate_report(self, template: str, data: dict) -> str:
@@ -450,52 +684,91 @@ class DoubaoAnalysisService(DoubaoBaseService, AnalysisService):
             # 模拟报告生成
             return "# 科研成果转化分析报告\n\n## 1. 项目概述\n本报告对[项目名称]的转化潜力进行了全面分析...\n\n## 2. 技术评估\n技术创新性：高\n技术成熟度：中\n技术壁垒：高\n\n## 3. 市场分析\n市场规模：约50亿元\n增长率：20%/年\n目标客户：企业、科研机构\n\n## 4. 转化策略\n推荐转化路径：技术许可+合资公司\n预计投资回收期：3-4年\n\n## 5. 结论与建议\n该科研成果具有较高的转化价值，建议尽快启动商业化进程。"
         except Exception as e:
-            log_error(f"生成报告失败: {str(e)}")
+            log_error("生成报告失败: %s", e)
             raise AIServiceError(f"生成报告失败: {str(e)}", "DoubaoAnalysisService")
     
     def analyze_achievement(self, achievement_data: dict) -> dict:
         """
         分析科研成果
         
+        与 analyze_achievements 使用相同的提示词和模型调用，结果结构一致。
+        
         Args:
             achievement_data: 科研成果数据
             
         Returns:
-            dict: 分析结果
+            dict: {"analysis": 文本}
+            
+        Raises:
+            AIServiceError: 分析失败
         """
         try:
             log_info("分析科研成果")
-            
-            # 构建分析提示
-            prompt = f"请分析以下科研成果的转化潜力：\n{json.dumps(achievement_data, ensure_ascii=False)}"
-            
-            # 调用通用分析方法
-            return self.generate_analysis(prompt, achievement_data)
+            prompt = self._build_achievement_prompt(achievement_data)
+            with usage_context(stage="analysis"):
+                return {"analysis": self._call_api(prompt)}
         except Exception as e:
-            log_error(f"分析科研成果失败: {str(e)}")
+            log_error("分析科研成果失败: %s", e)
             raise AIServiceError(f"分析科研成果失败: {str(e)}", "DoubaoAnalysisService")
     
+    def analyze_achievements(self, achievements: List[dict]) -> List[dict]:
+        """
+        批量分析科研成果（用于离线评分等批量任务）
+        
+        Args:
+            achievements: 科研成果数据列表
+            
+        Returns:
+            list: 与输入顺序一致的结果，成功时与 analyze_achievement 相同，为 {"analysis": 文本}，
+                失败时为 {"error": 错误信息}
+        """
+        log_info("批量分析科研成果: %s 条", len(achievements))
+        prompts = [self._build_achievement_prompt(data) for data in achievements]
+        with usage_context(stage="analysis"):
+            answers = self.call_api_many(prompts)
+        results = []
+        for answer in answers:
+            if isinstance(answer, Exception):
+                results.append({"error": str(answer)})
+            else:
+                results.append({"analysis": answer})
+        return results
+    
+    def _build_achievement_prompt(self, achievement_data: dict) -> str:
+        """
+        构建科研成果分析提示词，超长字段按预算压缩，避免超出上下文并拖慢响应
+        
+        Args:
+            achievement_data: 科研成果数据
+            
+        Returns:
+            str: 提示词
+        """
+        fields, report = self._prompt_budget.fit_fields(achievement_data)
+        if report["truncated_fields"]:
+            log_info("提示词超出预算，压缩字段 %s: %s -> %s tokens",
+                     report["truncated_fields"], report["original_tokens"], report["final_tokens"])
+        field_lines = "\n".join(f"{name}: {text}" for name, text in fields.items())
+        _, prompt = self.render_prompt("achievement", fields=field_lines)
+        return prompt
+    
     # API服务需要的异步分析方法
     async def analyze_market(self, prompt: str) -> str:
         """分析市场情况（用于API服务）"""
         log_info("API调用：市场分析")
-        # 实际应用中这里应该调用豆包API
-        return "基于对该领域的深入分析，我们预测该技术在未来3-5年内将有显著的市场增长。当前市场规模约50亿元，预计年增长率达20%。主要应用场景包括企业智能化转型、科研机构数据分析等。市场竞争格局相对分散，尚未形成垄断，为新技术提供了良好的切入机会。建议重点关注垂直行业应用，建立示范案例。"
+        return await asyncio.to_thread(self._call_api, prompt, simulated_reply="基于对该领域的深入分析，我们预测该技术在未来3-5年内将有显著的市场增长。当前市场规模约50亿元，预计年增长率达20%。主要应用场景包括企业智能化转型、科研机构数据分析等。市场竞争格局相对分散，尚未形成垄断，为新技术提供了良好的切入机会。建议重点关注垂直行业应用，建立示范案例。")
     
     async def analyze_patent(self, prompt: str) -> str:
         """分析专利情况（用于API服务）"""
         log_info("API调用：专利分析")
-        # 实际应用中这里应该调用豆包API
-        return "专利分析显示，该领域近三年专利申请量呈上升趋势，但核心技术专利仍有布局空间。建议围绕以下方向申请专利：1)核心算法优化；2)应用场景创新；3)系统架构设计。预计完成专利布局需要6-9个月时间，预算约10-15万元。同时，建议进行FTO(Freedom to Operate)分析，评估潜在侵权风险。"
+        return await asyncio.to_thread(self._call_api, prompt, simulated_reply="专利分析显示，该领域近三年专利申请量呈上升趋势，但核心技术专利仍有布局空间。建议围绕以下方向申请专利：1)核心算法优化；2)应用场景创新；3)系统架构设计。预计完成专利布局需要6-9个月时间，预算约10-15万元。同时，建议进行FTO(Freedom to Operate)分析，评估潜在侵权风险。")
     
     async def generate_strategy(self, prompt: str) -> str:
         """生成转化策略（用于API服务）"""
         log_info("API调用：生成转化策略")
-        # 实际应用中这里应该调用豆包API
-        return "推荐转化路径：第一阶段（0-6个月）进行技术优化和市场验证，完成2-3个试点项目；第二阶段（6-12个月）寻求战略合作伙伴，签订技术许可协议；第三阶段（12-24个月）规模化推广，建立行业标准。建议组建专业的商业团队，包括技术推广、商务谈判和知识产权管理人才。同时，积极对接政府科技成果转化项目，获取政策和资金支持。"
+        return await asyncio.to_thread(self._call_api, prompt, simulated_reply="推荐转化路径：第一阶段（0-6个月）进行技术优化和市场验证，完成2-3个试点项目；第二阶段（6-12个月）寻求战略合作伙伴，签订技术许可协议；第三阶段（12-24个月）规模化推广，建立行业标准。建议组建专业的商业团队，包括技术推广、商务谈判和知识产权管理人才。同时，积极对接政府科技成果转化项目，获取政策和资金支持。")
     
     async def generate_summary(self, prompt: str) -> str:
         """生成总结（用于API服务）"""
         log_info("API调用：生成总结")
-        # 实际应用中这里应该调用豆包API
-        return "综合评估结果显示，该科研成果具有较高的转化价值和市场潜力。技术创新性突出，应用场景明确，适合通过技术许可或合资公司方式实现转化。预计投资回收期为3-4年，5年内可实现5000万元以上的经济效益。建议团队加强商业模式设计，完善知识产权保护，并积极寻求产业资本合作，加速技术产业化进程。"
\ No newline at end of file
+        return await asyncio.to_thread(self._call_api, prompt, simulated_reply="综合评估结果显示，该科研成果具有较高的转化价值和市场潜力。技术创新性突出，应用场景明确，适合通过技术许可或合资公司方式实现转化。预计投资回收期为3-4年，5年内可实现5000万元以上的经济效益。建议团队加强商业模式设计，完善知识产权保护，并积极寻求产业资本合作，加速技术产业化进程。")
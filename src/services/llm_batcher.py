@@ -0,0 +1,253 @@
+"""
+模型调用微批处理
+
+批量任务（如离线评分）逐条调用模型时，每条都要付出一次完整的请求开销。
+微批处理器在很短的时间窗口内收集请求，把多条较短的任务合并为一个结构化
+提示词提交，再按编号拆分回答；较长的任务仍单独提交。多个批次可并发执行。
+合并调用的生成长度之和不超过 max_batch_tokens，其用量按各任务提示词的估算
+token数拆分记入各自的上下文。合并调用失败或某条任务的回答缺失时，只对受影响
+的任务单独重试，互不影响。
+"""
+
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .prompt_budget import estimate_tokens
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+# 默认微批配置，可通过服务配置中的 batching 项覆盖
+DEFAULT_BATCHING_SETTINGS = {
+    "enabled": False,
+    "window": 0.02,
+    "max_batch_size": 8,
+    "max_item_tokens": 600,
+    "max_concurrency": 4,
+    "max_batch_tokens": 4096,
+}
+
+BATCH_INSTRUCTION = (
+    "以下是{count}个相互独立的任务，请逐一作答。"
+    "每个回答必须以单独一行的“### 任务编号”开头（如“### 1”），不要合并或省略任何任务。\n"
+)
+
+_ANSWER_HEADER = re.compile(r"^[ \t]*###[ \t]*(?:任务)?[ \t]*(\d+)[ \t]*$", re.MULTILINE)
+
+
+def build_batch_prompt(prompts: List[str]) -> str:
+    """
+    将多条提示词合并为一个结构化提示词
+
+    Args:
+        prompts: 提示词列表
+
+    Returns:
+        str: 合并后的提示词
+    """
+    sections = [f"### {index}\n{prompt}" for index, prompt in enumerate(prompts, 1)]
+    return BATCH_INSTRUCTION.format(count=len(prompts)) + "\n\n".join(sections)
+
+
+def split_batch_response(text: str, count: int) -> Dict[int, str]:
+    """
+    按“### 编号”标题拆分合并调用的回答
+
+    Args:
+        text: 模型回答
+        count: 任务数
+
+    Returns:
+        dict: 从0开始的任务下标到回答文本的映射，缺失的任务不在结果中
+    """
+    answers = {}
+    matches = list(_ANSWER_HEADER.finditer(text))
+    for position, match in enumerate(matches):
+        index = int(match.group(1)) - 1
+        end = matches[position + 1].start() if position + 1 < len(matches) else len(text)
+        answer = text[match.end():end].strip()
+        if 0 <= index < count and answer and index not in answers:
+            answers[index] = answer
+    return answers
+
+
+class _BatchItem:
+    __slots__ = ("prompt", "max_tokens", "future", "context")
+
+    def __init__(self, prompt: str, max_tokens: Optional[int]):
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.future: Future = Future()
+        # 保留提交方的上下文（用量归属、追踪等）
+        self.context = contextvars.copy_context()
+
+
+class MicroBatcher:
+    """
+    微批处理器
+    """
+
+    def __init__(self, call: Callable[..., str], window: float = 0.02,
+                 max_batch_size: int = 8, max_item_tokens: int = 600, max_concurrency: int = 4,
+                 default_max_tokens: int = 1024, max_batch_tokens: int = 4096):
+        """
+        初始化微批处理器
+
+        Args:
+            call: 实际的模型调用函数，参数为 (prompt, max_tokens)；合并调用时另传入
+                usage_shares，即 [(任务上下文, 权重), ...]，由其按权重拆分记录用量
+            window: 收集请求的时间窗口（秒）
+            max_batch_size: 每批最多合并的任务数
+            max_item_tokens: 可参与合并的单条提示词token上限，更长的任务单独提交
+            max_concurrency: 同时执行的批次数
+            default_max_tokens: 任务未指定 max_tokens 时按此估算合并调用的生成长度
+            max_batch_tokens: 合并调用的生成长度上限（模型或配置允许的 max_tokens），
+                同一批任务的生成长度之和不超过该值
+        """
+        self._call = call
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.max_item_tokens = max_item_tokens
+        self.default_max_tokens = default_max_tokens
+        self.max_batch_tokens = max_batch_tokens
+        self._pending: List[_BatchItem] = []
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-batch")
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, name="llm-batch-collector", daemon=True)
+        self._collector.start()
+        self.stats = {"items": 0, "batches": 0, "batched_items": 0, "single_calls": 0, "fallbacks": 0}
+        self._stats_lock = threading.Lock()
+
+    def submit(self, prompt: str, max_tokens: Optional[int] = None) -> Future:
+        """
+        提交一条请求
+
+        Args:
+            prompt: 提示词
+            max_tokens: 最大生成 tokens 数
+
+        Returns:
+            Future: 结果为模型回答文本，调用失败时为异常
+
+        Raises:
+            RuntimeError: 处理器已关闭
+        """
+        item = _BatchItem(prompt, max_tokens)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("微批处理器已关闭")
+            self._count(items=1)
+            if estimate_tokens(prompt) > self.max_item_tokens:
+                # 在锁内提交，保证 shutdown 关闭线程池之前已登记
+                self._executor.submit(self._run_single, item)
+            else:
+                self._pending.append(item)
+                self._condition.notify()
+        return item.future
+
+    def map(self, prompts: List[str], max_tokens: Optional[int] = None) -> List:
+        """
+        批量提交并等待全部结果
+
+        Args:
+            prompts: 提示词列表
+            max_tokens: 每条任务的最大生成 tokens 数
+
+        Returns:
+            list: 与输入顺序一致，成功的位置为回答文本，失败的位置为异常对象
+        """
+        futures = [self.submit(prompt, max_tokens) for prompt in prompts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _collect(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._pending:
+                    return
+                # 第一条请求到达后再等待一个窗口，收集同批的其他请求
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_batch()
+            self._executor.submit(self._run_batch, batch)
+
+    def _item_tokens(self, item: _BatchItem) -> int:
+        return item.max_tokens or self.default_max_tokens
+
+    def _take_batch(self) -> List[_BatchItem]:
+        # 按顺序取任务，直到达到批大小或生成长度之和将超过上限（至少取一条）
+        size, total = 0, 0
+        for item in self._pending[:self.max_batch_size]:
+            total += self._item_tokens(item)
+            if size and total > self.max_batch_tokens:
+                break
+            size += 1
+        batch = self._pending[:size]
+        del self._pending[:size]
+        return batch
+
+    def _count(self, **increments) -> None:
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _run_single(self, item: _BatchItem) -> None:
+        self._count(single_calls=1)
+        try:
+            item.future.set_result(item.context.run(self._call, item.prompt, item.max_tokens))
+        except Exception as e:
+            item.future.set_exception(e)
+
+    def _run_batch(self, batch: List[_BatchItem]) -> None:
+        if len(batch) == 1:
+            self._run_single(batch[0])
+            return
+
+        self._count(batches=1, batched_items=len(batch))
+        max_tokens = min(sum(self._item_tokens(item) for item in batch), self.max_batch_tokens)
+        prompt = build_batch_prompt([item.prompt for item in batch])
+        usage_shares = [(item.context, estimate_tokens(item.prompt)) for item in batch]
+        try:
+            # 在首条任务上下文的副本中调用（沿用其追踪信息），各任务的上下文仅用于记录用量
+            text = batch[0].context.copy().run(self._call, prompt, max_tokens, usage_shares=usage_shares)
+            answers = split_batch_response(text, len(batch))
+        except Exception as e:
+            logger.warning("合并调用失败，改为逐条调用: %s", e)
+            answers = {}
+
+        # 回答缺失的任务单独重试，只影响该任务自身
+        for index, item in enumerate(batch):
+            if index in answers:
+                item.future.set_result(answers[index])
+            else:
+                self._count(fallbacks=1)
+                self._run_single(item)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        关闭处理器，已提交的请求会继续完成
+
+        Args:
+            wait: 是否等待执行中的批次结束
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._collector.join()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,520 @@
+import os
+import threading
+import time
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from .ai_service_base import PatentQueryService
+from src.utils import get_logger, log_info, log_error, PatentQueryError, ServiceNotInitializedError
+from src.utils.metrics import record_cache_access
+from src.patents import build_index, iter_jsonl, tokenize, top_k
+from src.patents.cache import DEFAULT_CACHE_SIZE, QueryResultCache
+from src.patents.ipc import TECHNOLOGY_FIELDS, is_ipc_prefix, normalize_ipc
+from src.patents.pagination import decode_cursor, encode_cursor, iter_ranked, page_after
+from src.patents.segments import MANIFEST_FILE, PatentIndexView, apply_delta, merge_segments, read_manifest
+from src.patents.store import STORE_META_FILE
+from src.patents.tokenizer import normalize_query
+from src.patents.vectors import DEFAULT_NPROBE, DEFAULT_VECTOR_DIM
+
+logger = get_logger(__name__)
+
+# 检索结果中返回的专利字段
+RESULT_FIELDS = (
+    "patent_id", "title", "abstract", "application_date", "publication_date",
+    "applicant", "inventor", "ipc_classification", "status",
+)
+
+# 引用关系中列出的专利字段
+CITATION_FIELDS = ("patent_id", "title", "application_date", "applicant")
+
+# 段数超过该值时后台合并
+DEFAULT_MAX_SEGMENTS = 4
+
+
+class LocalPatentQueryService(PatentQueryService):
+    """
+    本地专利查询服务实现
+
+    基于本地专利语料的倒排索引检索，按BM25相关度排序；专利详情和趋势分析附带语料引用图上的
+    被引次数和影响力。索引可按段增量更新：
+    每次更新或合并后切换到新的索引视图，进行中的查询继续使用旧视图完成。
+    """
+
+    def __init__(self, config=None):
+        self._initialized = False
+        self._config = {}
+        self._view = None
+        self._cache = None
+        # 增量写入和合并串行执行
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._maintenance = None
+
+        # 如果提供了配置，立即初始化
+        if config:
+            self.initialize(config)
+
+    def initialize(self, config: dict) -> bool:
+        """
+        初始化本地专利查询服务
+
+        Args:
+            config: 服务配置，必须包含index_dir；索引不存在且提供了corpus（JSONL路径）时先构建索引；
+                    merge_interval（秒）大于0时启动后台线程，定期加载外部写入的新清单并在段数超过
+                    max_segments时合并；query_cache_size为查询结果缓存的条数，0表示不缓存
+        """
+        try:
+            self._config = config
+            index_dir = config.get("index_dir")
+            if not index_dir:
+                raise ValueError("专利索引目录未提供")
+
+            if not (os.path.exists(os.path.join(index_dir, MANIFEST_FILE))
+                    or os.path.exists(os.path.join(index_dir, STORE_META_FILE))):
+                corpus = config.get("corpus")
+                if not corpus:
+                    raise ValueError(f"专利索引不存在: {index_dir}")
+                log_info("正在从 %s 构建专利索引...", corpus)
+                log_info("专利索引构建完成: %s", build_index(corpus, index_dir))
+
+            self._view = self._open_view()
+            cache_size = config.get("query_cache_size", DEFAULT_CACHE_SIZE)
+            self._cache = QueryResultCache(cache_size) if cache_size > 0 else None
+            self._initialized = True
+
+            interval = config.get("merge_interval", 0)
+            if interval > 0:
+                self._stop_event.clear()
+                self._maintenance = threading.Thread(target=self._maintain, args=(interval,),
+                                                     name="patent-index-maintenance", daemon=True)
+                self._maintenance.start()
+            log_info("本地专利查询服务已初始化，专利数: %s，段数: %s",
+                     self._view.live_count, len(self._view.segments))
+            return True
+        except Exception as e:
+            log_error("本地专利查询服务初始化失败: %s", e)
+            return False
+
+    def shutdown(self) -> bool:
+        """
+        关闭服务
+        """
+        self._initialized = False
+        self._stop_event.set()
+        if self._maintenance is not None:
+            self._maintenance.join()
+            self._maintenance = None
+        if self._view is not None:
+            self._view.close()
+            self._view = None
+        log_info("本地专利查询服务已关闭")
+        return True
+
+    def _open_view(self) -> PatentIndexView:
+        """打开最新清单的索引视图，切换前先构建引用图并计算影响力得分，详情查询不在请求中承担这部分开销"""
+        view = PatentIndexView(self._config["index_dir"],
+                               self._config.get("vector_nprobe", DEFAULT_NPROBE),
+                               self._config.get("vector_dim", DEFAULT_VECTOR_DIM))
+        view.citations.influence()
+        return view
+
+    def _reload(self) -> None:
+        """切换到最新清单的索引视图；旧视图不主动关闭，进行中的查询仍可用它完成"""
+        self._view = self._open_view()
+        log_info("专利索引已切换到第 %s 代，专利数: %s，段数: %s",
+                 self._view.generation, self._view.live_count, len(self._view.segments))
+
+    def _maintain(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                with self._write_lock:
+                    # 其他进程（如命令行工具）写入了新清单
+                    if read_manifest(self._config["index_dir"])["generation"] != self._view.generation:
+                        self._reload()
+                if len(self._view.segments) > self._config.get("max_segments", DEFAULT_MAX_SEGMENTS):
+                    self.merge_segments()
+            except Exception as e:
+                log_error("专利索引后台维护失败: %s", e)
+
+    def ingest_delta(self, jsonl_path: Optional[str] = None, withdrawn_ids: Sequence[str] = ()) -> dict:
+        """
+        写入一批增量专利
+
+        新增或更新的专利写成一个新段，旧段中的同号专利和撤回的专利加删除标记，
+        清单原子切换后服务改用新视图，无需重建整个索引。
+
+        Args:
+            jsonl_path: 新增或更新的专利（JSONL，每行一条），None表示只撤回
+            withdrawn_ids: 撤回的专利号列表
+
+        Returns:
+            dict: 增量统计（代数、新段名、新增专利数、删除专利数、段数、耗时）
+        """
+        self._check_initialized()
+        try:
+            with self._write_lock:
+                stats = apply_delta(self._config["index_dir"], iter_jsonl(jsonl_path) if jsonl_path else (),
+                                    withdrawn_ids)
+                self._reload()
+            log_info("专利增量写入完成: %s", stats)
+            return stats
+        except Exception as e:
+            log_error("专利增量写入失败: %s", e)
+            raise PatentQueryError(f"专利增量写入失败: {str(e)}",
+                                   {"jsonl_path": jsonl_path, "withdrawn": len(withdrawn_ids)})
+
+    def merge_segments(self) -> Optional[dict]:
+        """
+        合并索引的全部段
+
+        合并在当前线程中进行，期间查询照常使用旧视图；合并完成后切换到只有一个段的新视图。
+        另一进程正在合并，或合并期间其他进程写入了新清单时放弃本次合并，由后台维护下次重试。
+
+        Returns:
+            dict: 合并统计，无需合并或合并被放弃时返回None
+        """
+        self._check_initialized()
+        try:
+            with self._write_lock:
+                stats = merge_segments(self._config["index_dir"])
+                if stats is not None:
+                    self._reload()
+            if stats is not None:
+                log_info("专利索引段合并完成: %s", stats)
+            return stats
+        except Exception as e:
+            log_error("专利索引段合并失败: %s", e)
+            raise PatentQueryError(f"专利索引段合并失败: {str(e)}", {"index_dir": self._config.get("index_dir")})
+
+    @property
+    def is_initialized(self) -> bool:
+        """
+        服务是否已初始化
+        """
+        return self._initialized
+
+    def _check_initialized(self):
+        if not self._initialized:
+            raise ServiceNotInitializedError("LocalPatentQueryService")
+
+    def _cached(self, view: PatentIndexView, key: tuple, compute):
+        """经查询结果缓存取结果，缓存按视图版本失效"""
+        if self._cache is None:
+            return compute()
+        value, hit = self._cache.get_or_compute(key, view.version, compute)
+        record_cache_access("patent_query", hit)
+        return value
+
+    def query_by_keyword(self, keywords: str, limit: int = 10) -> list:
+        """
+        通过关键词查询专利
+
+        结果按规范化的关键词和limit缓存，索引切换后自动失效。
+
+        Args:
+            keywords: 关键词
+            limit: 返回结果数量限制
+
+        Returns:
+            list: 按相关度降序排列的专利信息列表，score为BM25得分
+        """
+        self._check_initialized()
+        try:
+            started = time.perf_counter()
+            view = self._view
+
+            def compute():
+                results = []
+                for doc_id, score in top_k(*view.score(tokenize(keywords)), limit):
+                    result = view.get(doc_id, RESULT_FIELDS)
+                    result["score"] = round(score, 4)
+                    results.append(result)
+                return results
+
+            results = self._cached(view, ("keyword", normalize_query(keywords), limit), compute)
+            logger.debug("关键词专利查询: %s, 结果数: %s, 耗时: %.2fms",
+                         keywords, len(results), (time.perf_counter() - started) * 1000)
+            return results
+        except Exception as e:
+            log_error("专利查询失败: %s", e)
+            raise PatentQueryError(f"专利查询失败: {str(e)}", {"keywords": keywords, "limit": limit})
+
+    def _resolve_cursor(self, view: PatentIndexView, keywords: Optional[str], cursor: Optional[str]):
+        """解析游标，返回（查询文本, 游标位置）"""
+        if not cursor:
+            return keywords or "", None
+        params = {"keywords": keywords, "cursor": cursor}
+        try:
+            state = decode_cursor(cursor)
+        except ValueError as e:
+            raise PatentQueryError(str(e), params, "INVALID_CURSOR")
+        if keywords and keywords != state["query"]:
+            raise PatentQueryError("分页游标与查询关键词不匹配", params, "INVALID_CURSOR")
+        if state["index_version"] != view.version:
+            raise PatentQueryError("专利索引已更新，分页游标已失效", params, "INVALID_CURSOR")
+        return state["query"], (state["score"], state["doc_id"])
+
+    @staticmethod
+    def _ranked_result(view: PatentIndexView, keywords: str, doc_id: int, score: float) -> dict:
+        result = view.get(doc_id, RESULT_FIELDS)
+        result["score"] = round(score, 4)
+        result["cursor"] = encode_cursor(keywords, score, doc_id, view.version)
+        return result
+
+    def query_by_keyword_page(self, keywords: Optional[str] = None, limit: int = 10,
+                              cursor: Optional[str] = None) -> dict:
+        """
+        分页查询关键词命中的专利
+
+        游标记录上一页最后一条结果的排名位置，翻页时只在其后的命中文档中选出前limit条，
+        每页的代价不随页码增长。
+
+        Args:
+            keywords: 关键词，提供游标时可省略
+            limit: 每页数量
+            cursor: 上一页返回的next_cursor，None表示第一页
+
+        Returns:
+            dict: results为本页专利信息列表（每条附带可从该条之后继续的cursor），
+                  next_cursor为下一页游标，没有更多结果时为None
+        """
+        self._check_initialized()
+        view = self._view
+        keywords, after = self._resolve_cursor(view, keywords, cursor)
+        try:
+            doc_ids, scores = view.score(tokenize(keywords))
+            page = page_after(doc_ids, scores, limit, after)
+            results = [self._ranked_result(view, keywords, doc_id, score) for doc_id, score in page]
+            next_cursor = results[-1]["cursor"] if results and len(results) == limit else None
+            return {"results": results, "next_cursor": next_cursor}
+        except Exception as e:
+            log_error("专利分页查询失败: %s", e)
+            raise PatentQueryError(f"专利分页查询失败: {str(e)}", {"keywords": keywords, "limit": limit})
+
+    def iter_keyword_results(self, keywords: Optional[str] = None, cursor: Optional[str] = None) -> Iterator[dict]:
+        """
+        按相关度顺序逐条产出关键词命中的专利
+
+        命中文档的得分只计算一次，之后按倍增的批量逐批选出，调用方可随时停止读取。
+        游标在调用时即校验，无效时立即抛出异常。
+
+        Args:
+            keywords: 关键词，提供游标时可省略
+            cursor: 从该游标位置之后开始，None表示从头开始
+
+        Returns:
+            Iterator[dict]: 专利信息生成器，每条附带可从该条之后继续的cursor
+        """
+        self._check_initialized()
+        view = self._view
+        keywords, after = self._resolve_cursor(view, keywords, cursor)
+        doc_ids, scores = view.score(tokenize(keywords))
+        return (self._ranked_result(view, keywords, doc_id, score)
+                for doc_id, score in iter_ranked(doc_ids, scores, after))
+
+    def search_similar(self, text: str, limit: int = 10) -> list:
+        """
+        检索与给定文本相似的专利
+
+        文本按哈希TF-IDF向量表示，在IVF向量索引中近似检索余弦相似度最高的专利。
+
+        Args:
+            text: 科研成果或技术方案的描述文本
+            limit: 返回结果数量限制
+
+        Returns:
+            list: 按相似度降序排列的专利信息列表，similarity_score为余弦相似度
+        """
+        self._check_initialized()
+        try:
+            started = time.perf_counter()
+            view = self._view
+            results = []
+            for doc_id, score in view.similar(tokenize(text), limit):
+                result = view.get(doc_id, RESULT_FIELDS)
+                result["similarity_score"] = round(score, 4)
+                results.append(result)
+            logger.debug("相似专利检索, 结果数: %s, 耗时: %.2fms",
+                         len(results), (time.perf_counter() - started) * 1000)
+            return results
+        except Exception as e:
+            log_error("相似专利检索失败: %s", e)
+            raise PatentQueryError(f"相似专利检索失败: {str(e)}", {"text": text[:100], "limit": limit})
+
+    def query_by_technology_field(self, field: str, limit: int = 10) -> list:
+        """
+        通过技术领域查询专利
+
+        技术领域（it、biomed、new_material、energy_saving、other）和IPC分类号前缀（如 G06N）
+        直接查预先计算的IPC倒排表，按申请年份从新到旧返回；其他文本按关键词检索。结果经查询结果缓存。
+
+        Args:
+            field: 技术领域或IPC分类号前缀
+            limit: 返回结果数量限制
+
+        Returns:
+            list: 专利信息列表
+        """
+        self._check_initialized()
+        view = self._view
+        limit = max(limit, 0)
+        if field in TECHNOLOGY_FIELDS:
+            key, postings = ("field", field, limit), view.field_postings
+        elif is_ipc_prefix(field):
+            key, postings = ("ipc", normalize_ipc(field), limit), view.prefix_postings
+        else:
+            return self.query_by_keyword(field, limit)
+        return self._cached(view, key, lambda: view.get_many(postings(field, limit).tolist(), RESULT_FIELDS))
+
+    def technology_field_counts(self) -> dict:
+        """
+        获取各技术领域的专利数
+
+        Returns:
+            dict: 技术领域到专利数的映射
+        """
+        self._check_initialized()
+        return self._view.field_counts()
+
+    def get_patent_details(self, patent_id: str) -> dict:
+        """
+        获取专利详情
+
+        Args:
+            patent_id: 专利号
+
+        Returns:
+            dict: 专利详细信息，cited_by为被引次数，influence为引用图上的影响力得分
+        """
+        self._check_initialized()
+        view = self._view
+        doc_id = view.lookup(patent_id)
+        if doc_id is None:
+            raise PatentQueryError(f"专利不存在: {patent_id}", {"patent_id": patent_id}, "PATENT_NOT_FOUND")
+        try:
+            return self._with_impact(view, [doc_id], [view.get(doc_id)])[0]
+        except Exception as e:
+            log_error("获取专利详情失败: %s", e)
+            raise PatentQueryError(f"获取专利详情失败: {str(e)}", {"patent_id": patent_id})
+
+    def get_patent_details_bulk(self, patent_ids: list) -> dict:
+        """
+        批量获取专利详情
+
+        先查出全部文档号，再按文档号顺序逐列读取各段的专利存储，结果仍按输入顺序返回。
+
+        Args:
+            patent_ids: 专利号列表
+
+        Returns:
+            dict: patents为与输入顺序一致的专利详细信息列表（不含未找到的专利，附带cited_by和influence），
+                  missing为未找到的专利号列表
+        """
+        self._check_initialized()
+        try:
+            view = self._view
+            records = view.lookup_many(patent_ids)
+            found = [record for record in records if record is not None]
+            return {
+                "patents": self._with_impact(view, found, view.get_many(found)),
+                "missing": [patent_id for patent_id, record in zip(patent_ids, records) if record is None],
+            }
+        except Exception as e:
+            log_error("批量获取专利详情失败: %s", e)
+            raise PatentQueryError(f"批量获取专利详情失败: {str(e)}", {"patent_ids": len(patent_ids)})
+
+    @staticmethod
+    def _with_impact(view: PatentIndexView, doc_ids: Sequence[int], patents: list) -> list:
+        """为专利信息附上被引次数和影响力得分"""
+        graph = view.citations
+        influence = graph.influence()
+        for doc_id, patent in zip(doc_ids, patents):
+            patent["cited_by"] = int(graph.cited_by_counts[doc_id])
+            patent["influence"] = round(float(influence[doc_id]), 4)
+        return patents
+
+    def _most_influential(self, view: PatentIndexView, doc_ids, limit: int) -> list:
+        """按影响力得分从高到低列出若干篇专利"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        ranked = [doc_id for doc_id, _ in top_k(doc_ids, view.citations.influence()[doc_ids], limit)]
+        return self._with_impact(view, ranked, view.get_many(ranked, CITATION_FIELDS))
+
+    def get_patent_citations(self, patent_id: str, limit: int = 20) -> dict:
+        """
+        获取专利的引用关系和影响力
+
+        引用图在打开索引视图时由各段的引用边构建，影响力为引用图上的PageRank得分（语料平均为1）。
+
+        Args:
+            patent_id: 专利号
+            limit: 引用和被引专利各自的最大返回数量，按影响力从高到低选取
+
+        Returns:
+            dict: cites/cited_by为语料内的引用数和被引数，cited_by_year为逐年被引次数，
+                  cited_patents/citing_patents为该专利引用的专利和引用该专利的专利
+        """
+        self._check_initialized()
+        view = self._view
+        doc_id = view.lookup(patent_id)
+        if doc_id is None:
+            raise PatentQueryError(f"专利不存在: {patent_id}", {"patent_id": patent_id}, "PATENT_NOT_FOUND")
+        try:
+            graph = view.citations
+            cited, citing = graph.cited(doc_id), graph.cited_by(doc_id)
+            return {
+                "patent_id": patent_id,
+                "cites": int(len(cited)),
+                "cited_by": int(len(citing)),
+                "influence": round(float(graph.influence()[doc_id]), 4),
+                "cited_by_year": graph.cited_by_year(doc_id, view.columns.application_year),
+                "cited_patents": self._most_influential(view, cited, limit),
+                "citing_patents": self._most_influential(view, citing, limit),
+            }
+        except Exception as e:
+            log_error("获取专利引用关系失败: %s", e)
+            raise PatentQueryError(f"获取专利引用关系失败: {str(e)}", {"patent_id": patent_id, "limit": limit})
+
+    def analyze_patent_trend(self, keywords: str, years: int = 5) -> dict:
+        """
+        分析专利趋势
+
+        统计所有命中专利（不限于前若干条）在最近若干年内的申请、授权和引用情况，
+        被引量和被引最多的专利来自语料的引用图。结果按规范化的关键词和年限缓存。
+
+        Args:
+            keywords: 关键词
+            years: 分析年限
+
+        Returns:
+            dict: 专利趋势分析结果
+        """
+        self._check_initialized()
+        if years < 1:
+            raise PatentQueryError(f"分析年限必须至少为1年: {years}", {"keywords": keywords, "years": years},
+                                   "INVALID_YEARS")
+        try:
+            view = self._view
+
+            def compute():
+                graph = view.citations
+                result = view.trend.analyze(view.score(tokenize(keywords))[0], keywords, years,
+                                            cited_by=graph.cited_by_counts)
+                top_cited = result["top_cited_patents"]
+                influence = graph.influence()
+                patents = view.get_many([item["doc_id"] for item in top_cited], ("patent_id", "title"))
+                result["top_cited_patents"] = [
+                    dict(patent, citation_count=item["citation_count"],
+                         influence=round(float(influence[item["doc_id"]]), 4))
+                    for item, patent in zip(top_cited, patents)
+                ]
+                return result
+
+            result = self._cached(view, ("trend", normalize_query(keywords), years), compute)
+            # 规范化后相同的关键词共用缓存结果，返回调用方的原始关键词
+            result["keywords"] = keywords
+            return result
+        except Exception as e:
+            log_error("专利趋势分析失败: %s", e)
+            raise PatentQueryError(f"专利趋势分析失败: {str(e)}", {"keywords": keywords, "years": years})
+
@@ -0,0 +1,231 @@
+"""
+提示词长度预算
+
+估算文本的token数，在字段之间分配输入token预算，对超出预算的字段
+按句子边界压缩或截断，并为各分析阶段选择生成长度上限（max_tokens）。
+"""
+
+import json
+import re
+from typing import Dict, Optional, Tuple
+
+# 中文等非ASCII字符约1个token，ASCII文本约4个字符1个token
+NON_ASCII_TOKENS_PER_CHAR = 1.0
+ASCII_CHARS_PER_TOKEN = 4.0
+
+# 各阶段默认的生成长度上限
+DEFAULT_STAGE_MAX_TOKENS = {
+    "market": 1024,
+    "patent": 1024,
+    "strategy": 1536,
+    "summary": 768,
+    "chat": 512,
+    "analysis": 1536,
+    # 合并调用中每条任务的生成长度
+    "batch_item": 512,
+    "default": 2048,
+}
+
+# 各字段的默认预算权重，权重越大在预算紧张时保留得越多
+DEFAULT_FIELD_WEIGHTS = {
+    "title": 3.0,
+    "field": 2.0,
+    "keywords": 2.0,
+    "description": 1.5,
+}
+
+TRUNCATION_MARKER = "……（内容过长已截断）"
+
+_SENTENCE_END = re.compile(r"(?<=[。！？；!?;\n])")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    使用字符类别近似，无需加载分词器，耗时与一次编码相当。
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: 估算的token数
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    non_ascii_chars = len(text) - ascii_chars
+    return int(non_ascii_chars * NON_ASCII_TOKENS_PER_CHAR + ascii_chars / ASCII_CHARS_PER_TOKEN + 0.5)
+
+
+def _cut_to_tokens(text: str, budget: int) -> str:
+    """按字符二分查找不超过预算的最长前缀"""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def condense_text(text: str, budget: int) -> str:
+    """
+    将文本压缩到token预算内
+
+    优先按句子边界保留开头的完整句子，并保留最后一句（通常是结论）；
+    单句就超出预算时直接截断。
+
+    Args:
+        text: 原始文本
+        budget: token预算
+
+    Returns:
+        str: 压缩后的文本，未超出预算时原样返回
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    marker_tokens = estimate_tokens(TRUNCATION_MARKER)
+    available = budget - marker_tokens
+    if available <= 0:
+        return _cut_to_tokens(text, budget)
+
+    sentences = [sentence for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+    last = sentences[-1] if len(sentences) > 1 else ""
+    last_tokens = estimate_tokens(last)
+    if last_tokens > available // 3:
+        last, last_tokens = "", 0
+
+    kept, used = [], 0
+    for sentence in sentences[:-1] if last else sentences:
+        tokens = estimate_tokens(sentence)
+        if used + tokens > available - last_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+
+    if not kept:
+        return _cut_to_tokens(text, available) + TRUNCATION_MARKER
+    return "".join(kept) + TRUNCATION_MARKER + last
+
+
+def _field_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+        return "、".join(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+class PromptBudget:
+    """
+    提示词预算
+
+    按字段权重分配输入token预算：未超出均分额度的字段完整保留，
+    其余额度按权重分给较长的字段，再对这些字段逐个压缩。
+    """
+
+    def __init__(self, max_input_tokens: int = 3000, field_weights: Optional[Dict[str, float]] = None,
+                 min_field_tokens: int = 32, stage_max_tokens: Optional[Dict[str, int]] = None):
+        """
+        初始化提示词预算
+
+        Args:
+            max_input_tokens: 字段内容的总输入token预算
+            field_weights: 字段预算权重，未列出的字段权重为1
+            min_field_tokens: 每个字段至少保留的token数
+            stage_max_tokens: 各阶段的生成长度上限，覆盖默认值
+        """
+        self.max_input_tokens = max_input_tokens
+        self.field_weights = {**DEFAULT_FIELD_WEIGHTS, **(field_weights or {})}
+        self.min_field_tokens = min_field_tokens
+        self.stage_max_tokens = {**DEFAULT_STAGE_MAX_TOKENS, **(stage_max_tokens or {})}
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> "PromptBudget":
+        """
+        根据配置创建预算
+
+        Args:
+            config: 配置字典，键与构造参数相同
+
+        Returns:
+            PromptBudget: 预算实例
+        """
+        return cls(**(config or {}))
+
+    def max_tokens_for(self, stage: Optional[str]) -> int:
+        """
+        获取阶段的生成长度上限
+
+        Args:
+            stage: 阶段名称
+
+        Returns:
+            int: max_tokens
+        """
+        return self.stage_max_tokens.get(stage or "default", self.stage_max_tokens["default"])
+
+    def allocate(self, token_counts: Dict[str, int]) -> Dict[str, int]:
+        """
+        为各字段分配token预算
+
+        Args:
+            token_counts: 字段名到当前token数的映射
+
+        Returns:
+            dict: 字段名到分配预算的映射
+        """
+        allocation = {}
+        remaining = dict(token_counts)
+        budget = self.max_input_tokens
+        # 反复把预算按权重分给剩余字段，能完整放下的字段先定下来
+        while remaining:
+            total_weight = sum(self.field_weights.get(name, 1.0) for name in remaining)
+            fitting = {
+                name: tokens for name, tokens in remaining.items()
+                if tokens <= budget * self.field_weights.get(name, 1.0) / total_weight
+            }
+            if not fitting:
+                for name in remaining:
+                    share = int(budget * self.field_weights.get(name, 1.0) / total_weight)
+                    allocation[name] = max(share, self.min_field_tokens)
+                break
+            for name, tokens in fitting.items():
+                allocation[name] = tokens
+                budget -= tokens
+                del remaining[name]
+        return allocation
+
+    def fit_fields(self, fields: dict) -> Tuple[Dict[str, str], dict]:
+        """
+        将字段内容压缩到预算内
+
+        Args:
+            fields: 字段名到字段值的映射，非字符串值会先转换为文本
+
+        Returns:
+            tuple: (字段名到文本的映射, 预算报告)
+        """
+        texts = {name: _field_text(value) for name, value in fields.items()}
+        counts = {name: estimate_tokens(text) for name, text in texts.items()}
+        original_tokens = sum(counts.values())
+        if original_tokens <= self.max_input_tokens:
+            return texts, {
+                "original_tokens": original_tokens,
+                "final_tokens": original_tokens,
+                "truncated_fields": [],
+            }
+
+        allocation = self.allocate(counts)
+        truncated = []
+        for name, text in texts.items():
+            if counts[name] > allocation[name]:
+                texts[name] = condense_text(text, allocation[name])
+                truncated.append(name)
+        return texts, {
+            "original_tokens": original_tokens,
+            "final_tokens": sum(estimate_tokens(text) for text in texts.values()),
+            "truncated_fields": truncated,
+        }
@@ -0,0 +1,265 @@
+"""
+提示词模板注册表
+
+所有模板集中定义并在注册时预编译。模板按"系统消息 + 固定指令 + 可变字段"
+的顺序组织，同一模板的不同请求共享完全相同的前缀，便于上游模型服务复用前缀缓存。
+系统消息由服务配置的 system_prompt 统一提供，模板只定义用户消息。
+模板带版本号，可按权重对同一模板的多个版本做A/B分流，并统计各版本的token数。
+"""
+
+import hashlib
+from operator import itemgetter
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+from .prompt_budget import estimate_tokens
+
+DEFAULT_SYSTEM_PROMPT = "你是一个科研成果转化分析助手。"
+
+
+class PromptTemplate:
+    """
+    预编译的提示词模板
+    """
+
+    def __init__(self, name: str, version: str, template: str):
+        """
+        初始化并编译模板
+
+        Args:
+            name: 模板名称
+            version: 版本号
+            template: 用户消息模板，使用 {字段名} 占位；固定指令应写在所有占位符之前
+        """
+        self.name = name
+        self.version = version
+        self.template = template
+        parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field_name) for literal, field_name, _, _ in Formatter().parse(template)
+        ]
+        self.fields = tuple(field for _, field in parts if field is not None)
+        # 编译为 % 格式串，渲染时只需一次C层格式化
+        self._format = "".join(
+            literal.replace("%", "%%") + ("%s" if field is not None else "") for literal, field in parts
+        )
+        if len(self.fields) == 1:
+            self._getter = lambda values, field=self.fields[0]: (values[field],)
+        elif self.fields:
+            self._getter = itemgetter(*self.fields)
+        else:
+            self._getter = lambda values: ()
+        # 第一个占位符之前的文本对所有请求都相同
+        self.prefix = parts[0][0] if parts else ""
+
+    @property
+    def key(self) -> str:
+        """模板标识，形如 market@v1"""
+        return f"{self.name}@{self.version}"
+
+    def render(self, **values) -> str:
+        """
+        渲染用户消息
+
+        Args:
+            **values: 模板字段值
+
+        Returns:
+            str: 渲染后的文本
+        """
+        try:
+            return self._format % self._getter(values)
+        except KeyError as e:
+            raise ValueError(f"模板 {self.key} 缺少字段: {e.args[0]}")
+
+    def prefix_tokens(self, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> int:
+        """
+        估算可复用前缀（系统消息 + 固定指令）的token数
+
+        Args:
+            system_prompt: 调用时使用的系统消息，应与服务配置的 system_prompt 一致
+
+        Returns:
+            int: token数
+        """
+        return estimate_tokens(system_prompt) + estimate_tokens(self.prefix)
+
+
+class PromptRegistry:
+    """
+    提示词模板注册表
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, Dict[str, PromptTemplate]] = {}
+        self._default_versions: Dict[str, str] = {}
+        self._variants: Dict[str, Dict[str, float]] = {}
+
+    def register(self, template: PromptTemplate, default: bool = False) -> PromptTemplate:
+        """
+        注册模板
+
+        Args:
+            template: 模板
+            default: 是否设为该名称的默认版本，第一个注册的版本自动成为默认版本
+
+        Returns:
+            PromptTemplate: 已注册的模板
+        """
+        versions = self._templates.setdefault(template.name, {})
+        versions[template.version] = template
+        if default or template.name not in self._default_versions:
+            self._default_versions[template.name] = template.version
+        return template
+
+    def get(self, name: str, version: Optional[str] = None) -> PromptTemplate:
+        """
+        获取模板
+
+        Args:
+            name: 模板名称
+            version: 版本号，None时返回默认版本
+
+        Returns:
+            PromptTemplate: 模板
+        """
+        versions = self._templates.get(name)
+        if not versions:
+            raise KeyError(f"未注册的提示词模板: {name}")
+        version = version or self._default_versions[name]
+        if version not in versions:
+            raise KeyError(f"提示词模板 {name} 不存在版本: {version}")
+        return versions[version]
+
+    def versions(self, name: str) -> List[str]:
+        """获取模板的所有版本号"""
+        return list(self._templates.get(name, {}))
+
+    def names(self) -> List[str]:
+        """获取所有模板名称"""
+        return list(self._templates)
+
+    def set_variants(self, name: str, weights: Optional[Dict[str, float]]) -> None:
+        """
+        设置A/B分流权重
+
+        Args:
+            name: 模板名称
+            weights: 版本号到权重的映射，None或空字典表示取消分流
+        """
+        if not weights:
+            self._variants.pop(name, None)
+            return
+        for version in weights:
+            self.get(name, version)
+        self._variants[name] = dict(weights)
+
+    def select(self, name: str, key: Optional[str] = None) -> PromptTemplate:
+        """
+        选择模板版本
+
+        配置了分流权重时按 key 的哈希值稳定地分配版本，同一 key（如会话ID）
+        始终得到同一版本；未配置分流或未提供 key 时返回默认版本。
+
+        Args:
+            name: 模板名称
+            key: 分流键
+
+        Returns:
+            PromptTemplate: 选中的模板
+        """
+        weights = self._variants.get(name)
+        if not weights or key is None:
+            return self.get(name)
+        total = sum(weights.values())
+        digest = hashlib.md5(f"{name}:{key}".encode("utf-8")).digest()
+        point = int.from_bytes(digest[:8], "big") / 2 ** 64 * total
+        for version, weight in weights.items():
+            point -= weight
+            if point < 0:
+                return self.get(name, version)
+        return self.get(name, version)
+
+    def token_report(self, name: str, sample_values: dict,
+                     system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> Dict[str, dict]:
+        """
+        统计模板各版本在样例数据上的token数，用于比较不同版本
+
+        Args:
+            name: 模板名称
+            sample_values: 样例字段值
+            system_prompt: 调用时使用的系统消息，应与服务配置的 system_prompt 一致
+
+        Returns:
+            dict: 版本号到 {prefix_tokens, total_tokens} 的映射
+        """
+        report = {}
+        for version, template in self._templates.get(name, {}).items():
+            report[version] = {
+                "prefix_tokens": template.prefix_tokens(system_prompt),
+                "total_tokens": estimate_tokens(system_prompt) + estimate_tokens(template.render(**sample_values)),
+            }
+        return report
+
+
+_registry = PromptRegistry()
+
+# 分析阶段模板：固定指令在前，成果相关字段统一按 title、field、... 的顺序放在末尾
+_registry.register(PromptTemplate(
+    "market", "v1",
+    "请分析以下科研成果的市场潜力，包括市场规模、竞争格局和商业化前景。\n"
+    "成果名称：{title}\n技术领域：{field}\n关键词：{keywords}"
+))
+# 精简指令版本，用于A/B比较token数与回答质量
+_registry.register(PromptTemplate(
+    "market", "v2",
+    "评估市场潜力（规模、竞争、商业化）。\n"
+    "成果名称：{title}\n技术领域：{field}\n关键词：{keywords}"
+))
+_registry.register(PromptTemplate(
+    "patent", "v1",
+    "请分析以下科研成果所在领域的专利情况，给出专利布局建议和知识产权风险评估。\n"
+    "成果名称：{title}\n技术领域：{field}\n专利状态：{patent_status}"
+))
+_registry.register(PromptTemplate(
+    "strategy", "v1",
+    "请为以下科研成果制定转化策略，结合技术成熟度和预期转化方式给出分阶段路径。\n"
+    "成果名称：{title}\n技术成熟度：{maturity}\n预期转化方式：{expected_outcome}"
+))
+_registry.register(PromptTemplate(
+    "summary", "v1",
+    "请总结以下科研成果的转化分析，涵盖市场前景、专利情况和转化策略。\n"
+    "成果名称：{title}"
+))
+_registry.register(PromptTemplate(
+    "achievement", "v1",
+    "请分析以下科研成果的转化潜力：\n{fields}"
+))
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """
+    获取全局提示词模板注册表
+
+    Returns:
+        PromptRegistry: 注册表实例
+    """
+    return _registry
+
+
+def configure_prompt_templates(variants: Optional[Dict[str, Dict[str, float]]] = None,
+                               defaults: Optional[Dict[str, str]] = None) -> PromptRegistry:
+    """
+    配置模板版本
+
+    Args:
+        variants: 模板名称到A/B分流权重的映射
+        defaults: 模板名称到默认版本号的映射
+
+    Returns:
+        PromptRegistry: 全局注册表
+    """
+    for name, version in (defaults or {}).items():
+        _registry.register(_registry.get(name, version), default=True)
+    for name, weights in (variants or {}).items():
+        _registry.set_variants(name, weights)
+    return _registry
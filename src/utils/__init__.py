@@ -5,6 +5,7 @@
 from .logger import (
     Logger,
     get_logger,
+    configure_logging,
     log_info,
     log_debug,
     log_warning,
@@ -30,6 +31,7 @@ __all__ = [
     # 日志相关
     'Logger',
     'get_logger',
+    'configure_logging',
     'log_info',
     'log_debug',
     'log_warning',
@@ -1,7 +1,218 @@
+import atexit
+import copy
+import itertools
 import logging
+import logging.handlers
 import os
-import datetime
-from typing import Optional
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .serialization import dumps_str
+
+
+# 默认日志名称
+DEFAULT_LOGGER_NAME = "scientific_achievement_agent"
+
+# 日志输出配置，可通过 configure_logging 修改
+_logging_settings = {
+    'log_dir': "logs",
+    # 轮转方式：size 按文件大小轮转，time 按时间轮转
+    'rotation': "size",
+    'max_bytes': 10 * 1024 * 1024,
+    'backup_count': 5,
+    'when': "midnight",
+    # 输出格式：text 为普通文本，json 为每行一个JSON对象
+    'format': "text",
+}
+
+# 文本格式
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    结构化日志格式化器，每条日志输出为一行JSON
+    
+    通过 extra={"fields": {...}} 传入的字段会合并到输出中。
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return dumps_str(entry)
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    不在调用方线程格式化消息的队列处理器
+    
+    标准 QueueHandler 会在入队前完成 % 格式化，这里保留原始参数，
+    由后台线程中的处理器格式化。
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    令牌桶限流过滤器，按消息模板分别限流
+    
+    热点路径上的同一条日志每秒最多输出 rate 条，允许 burst 条突发。
+    """
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.suppressed = 0
+        self._buckets: Dict[object, list] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.msg)
+            if bucket is None:
+                bucket = self._buckets[record.msg] = [float(self.burst), now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            self.suppressed += 1
+            return False
+
+
+class SamplingFilter(logging.Filter):
+    """
+    采样过滤器，低于WARNING级别的日志每 N 条保留 1 条
+    
+    使用计数而非随机数，开销固定且结果可复现；WARNING及以上级别不采样。
+    """
+    
+    def __init__(self, rate: float):
+        super().__init__()
+        if not 0 < rate <= 1:
+            raise ValueError(f"采样率必须在(0, 1]范围内: {rate}")
+        self.interval = max(1, round(1 / rate))
+        self._counter = itertools.count()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        return next(self._counter) % self.interval == 0
+
+
+class _LogSink:
+    """
+    共享的日志输出端
+
+    日志记录通过 QueueHandler 放入队列，由 QueueListener 在后台线程中
+    写入控制台和轮转日志文件，调用方不再执行同步磁盘I/O。
+    """
+    
+    def __init__(self, log_file: str, console_output: bool = True):
+        """
+        初始化日志输出端
+        
+        Args:
+            log_file: 日志文件路径
+            console_output: 是否输出到控制台
+        """
+        log_file_dir = os.path.dirname(log_file)
+        if log_file_dir:
+            os.makedirs(log_file_dir, exist_ok=True)
+        
+        if _logging_settings['format'] == "json":
+            formatter = JSONFormatter(datefmt=DATE_FORMAT)
+        else:
+            formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+        
+        handlers = []
+        if console_output:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+        
+        if _logging_settings['rotation'] == "time":
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                log_file,
+                when=_logging_settings['when'],
+                backupCount=_logging_settings['backup_count'],
+                encoding='utf-8'
+            )
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=_logging_settings['max_bytes'],
+                backupCount=_logging_settings['backup_count'],
+                encoding='utf-8'
+            )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+        
+        self.log_file = log_file
+        self.handlers = handlers
+        self.queue_handler = _LazyQueueHandler(queue.SimpleQueue())
+        self.listener = logging.handlers.QueueListener(
+            self.queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        self.listener.start()
+    
+    def stop(self) -> None:
+        """
+        停止后台线程并关闭处理器，队列中剩余的日志会先写完
+        """
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+# 按 (日志文件, 是否输出到控制台) 缓存的输出端
+_sinks: Dict[Tuple[str, bool], _LogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def _get_sink(log_file: str, console_output: bool) -> _LogSink:
+    """
+    获取共享的日志输出端，相同文件只打开一次
+    """
+    key = (os.path.abspath(log_file), console_output)
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None:
+            sink = _LogSink(log_file, console_output)
+            _sinks[key] = sink
+        return sink
+
+
+def _default_log_file(log_dir: str) -> str:
+    return os.path.join(log_dir, f"{DEFAULT_LOGGER_NAME}.log")
+
+
+@atexit.register
+def shutdown_logging() -> None:
+    """
+    停止所有日志输出端，确保退出前日志全部写入
+    """
+    with _sinks_lock:
+        for sink in _sinks.values():
+            sink.stop()
+        _sinks.clear()
 
 
 class Logger:
@@ -18,106 +229,101 @@ class Logger:
         'critical': logging.CRITICAL
     }
     
-    def __init__(self, name: str = "scientific_achievement_agent", 
+    def __init__(self, name: str = DEFAULT_LOGGER_NAME, 
                  log_file: Optional[str] = None,
                  level: str = "info",
                  console_output: bool = True,
-                 log_dir: str = "logs"):
+                 log_dir: Optional[str] = None):
         """
         初始化日志管理器
         
         Args:
             name: 日志名称
-            log_file: 日志文件路径，None表示自动生成
+            log_file: 日志文件路径，None表示使用共享的默认日志文件
             level: 日志级别
             console_output: 是否输出到控制台
-            log_dir: 日志目录
+            log_dir: 日志目录，None表示使用全局配置
         """
         self.logger = logging.getLogger(name)
         self.logger.setLevel(self.LOG_LEVELS.get(level.lower(), logging.INFO))
         self.logger.propagate = False  # 避免重复日志
         
-        # 清空已有的处理器
+        # 清空已有的处理器和过滤器
         for handler in self.logger.handlers[:]:
             self.logger.removeHandler(handler)
+        for log_filter in self.logger.filters[:]:
+            self.logger.removeFilter(log_filter)
+        self._rate_limit_filter: Optional[RateLimitFilter] = None
+        self._sampling_filter: Optional[SamplingFilter] = None
         
-        # 格式化器
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        # 控制台处理器
-        if console_output:
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
-        
-        # 文件处理器
+        # 所有写入同一文件的日志共享一个后台输出端
+        self._console_output = console_output
+        self._uses_default_file = log_file is None
+        log_dir = log_dir or _logging_settings['log_dir']
         if log_file is None:
-            # 自动生成日志文件名
-            os.makedirs(log_dir, exist_ok=True)
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            log_file = os.path.join(log_dir, f"{name}_{timestamp}.log")
-        else:
-            # 确保日志目录存在
-            log_file_dir = os.path.dirname(log_file)
-            if log_file_dir:
-                os.makedirs(log_file_dir, exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+            log_file = _default_log_file(log_dir)
+        sink = _get_sink(log_file, console_output)
+        self.logger.addHandler(sink.queue_handler)
         
         self.log_file = log_file
         self.log_dir = log_dir
     
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args, **kwargs) -> None:
         """
         记录调试日志
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在日志实际输出时才格式化
+            **kwargs: 传给标准logging的参数，如 extra
         """
-        self.logger.debug(message)
+        self.logger.debug(message, *args, **kwargs)
     
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args, **kwargs) -> None:
         """
         记录信息日志
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在日志实际输出时才格式化
+            **kwargs: 传给标准logging的参数，如 extra
         """
-        self.logger.info(message)
+        self.logger.info(message, *args, **kwargs)
     
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args, **kwargs) -> None:
         """
         记录警告日志
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在日志实际输出时才格式化
+            **kwargs: 传给标准logging的参数，如 extra
         """
-        self.logger.warning(message)
+        self.logger.warning(message, *args, **kwargs)
     
-    def error(self, message: str, exc_info: bool = False) -> None:
+    def error(self, message: str, *args, exc_info: bool = False, **kwargs) -> None:
         """
         记录错误日志
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在日志实际输出时才格式化
             exc_info: 是否包含异常信息
+            **kwargs: 传给标准logging的参数，如 extra
         """
-        self.logger.error(message, exc_info=exc_info)
+        self.logger.error(message, *args, exc_info=exc_info, **kwargs)
     
-    def critical(self, message: str, exc_info: bool = False) -> None:
+    def critical(self, message: str, *args, exc_info: bool = False, **kwargs) -> None:
         """
         记录严重错误日志
         
         Args:
-            message: 日志消息
+            message: 日志消息，可包含 % 占位符
+            *args: 占位符参数，仅在日志实际输出时才格式化
             exc_info: 是否包含异常信息
+            **kwargs: 传给标准logging的参数，如 extra
         """
-        self.logger.critical(message, exc_info=exc_info)
+        self.logger.critical(message, *args, exc_info=exc_info, **kwargs)
     
     def set_level(self, level: str) -> None:
         """
@@ -128,6 +334,47 @@ class Logger:
         """
         self.logger.setLevel(self.LOG_LEVELS.get(level.lower(), logging.INFO))
     
+    def is_enabled_for(self, level: str) -> bool:
+        """
+        判断指定级别的日志是否会被记录，用于跳过昂贵的日志参数计算
+        
+        Args:
+            level: 日志级别
+            
+        Returns:
+            bool: 是否启用
+        """
+        return self.logger.isEnabledFor(self.LOG_LEVELS.get(level.lower(), logging.INFO))
+    
+    def set_rate_limit(self, rate: Optional[float], burst: Optional[int] = None) -> None:
+        """
+        设置限流，同一消息模板每秒最多输出 rate 条
+        
+        Args:
+            rate: 每秒条数，None表示取消限流
+            burst: 允许的突发条数
+        """
+        if self._rate_limit_filter is not None:
+            self.logger.removeFilter(self._rate_limit_filter)
+            self._rate_limit_filter = None
+        if rate is not None:
+            self._rate_limit_filter = RateLimitFilter(rate, burst)
+            self.logger.addFilter(self._rate_limit_filter)
+    
+    def set_sample_rate(self, rate: Optional[float]) -> None:
+        """
+        设置采样率，低于WARNING级别的日志按比例保留
+        
+        Args:
+            rate: 采样率(0, 1]，None表示取消采样
+        """
+        if self._sampling_filter is not None:
+            self.logger.removeFilter(self._sampling_filter)
+            self._sampling_filter = None
+        if rate is not None:
+            self._sampling_filter = SamplingFilter(rate)
+            self.logger.addFilter(self._sampling_filter)
+    
     def get_log_file(self) -> str:
         """
         获取日志文件路径
@@ -138,8 +385,13 @@ class Logger:
         return self.log_file
 
 
+# 已创建的日志实例，同名日志只创建一次
+_loggers: Dict[str, Logger] = {}
+_loggers_lock = threading.Lock()
+
 # 创建全局日志实例
 global_logger = Logger()
+_loggers[DEFAULT_LOGGER_NAME] = global_logger
 
 
 def get_logger(name: Optional[str] = None) -> Logger:
@@ -154,40 +406,113 @@ def get_logger(name: Optional[str] = None) -> Logger:
     """
     if name is None:
         return global_logger
-    else:
-        return Logger(name)
+    logger = _loggers.get(name)
+    if logger is None:
+        with _loggers_lock:
+            logger = _loggers.get(name)
+            if logger is None:
+                logger = Logger(name)
+                _loggers[name] = logger
+    return logger
 
 
-def debug(message: str) -> None:
+def configure_logging(log_dir: Optional[str] = None,
+                      rotation: Optional[str] = None,
+                      max_bytes: Optional[int] = None,
+                      backup_count: Optional[int] = None,
+                      when: Optional[str] = None,
+                      level: Optional[str] = None,
+                      log_format: Optional[str] = None,
+                      rate_limits: Optional[Dict[str, dict]] = None,
+                      sampling: Optional[Dict[str, float]] = None) -> None:
+    """
+    修改日志输出配置，并将已创建的日志实例切换到新的输出端
+    
+    Args:
+        log_dir: 日志目录
+        rotation: 轮转方式，"size" 按大小或 "time" 按时间
+        max_bytes: 按大小轮转时单个文件的最大字节数
+        backup_count: 保留的历史文件数量
+        when: 按时间轮转时的轮转周期，如 "midnight"、"H"
+        level: 所有日志实例的日志级别
+        log_format: 输出格式，"text" 或 "json"
+        rate_limits: 按日志名称设置限流，如 {"src.api.server": {"rate": 10, "burst": 20}}
+        sampling: 按日志名称设置采样率，如 {"src.api.server": 0.1}
+    """
+    if rotation is not None and rotation not in ("size", "time"):
+        raise ValueError(f"不支持的日志轮转方式: {rotation}")
+    if log_format is not None and log_format not in ("text", "json"):
+        raise ValueError(f"不支持的日志格式: {log_format}")
+    
+    updates = {
+        'log_dir': log_dir,
+        'rotation': rotation,
+        'max_bytes': max_bytes,
+        'backup_count': backup_count,
+        'when': when,
+        'format': log_format,
+    }
+    _logging_settings.update({key: value for key, value in updates.items() if value is not None})
+    
+    with _loggers_lock:
+        with _sinks_lock:
+            old_handlers = {sink.queue_handler for sink in _sinks.values()}
+        shutdown_logging()
+        for logger in _loggers.values():
+            for handler in logger.logger.handlers[:]:
+                if handler in old_handlers:
+                    logger.logger.removeHandler(handler)
+            if logger._uses_default_file:
+                logger.log_dir = _logging_settings['log_dir']
+                logger.log_file = _default_log_file(logger.log_dir)
+            logger.logger.addHandler(_get_sink(logger.log_file, logger._console_output).queue_handler)
+            if level is not None:
+                logger.set_level(level)
+    
+    for name, limit in (rate_limits or {}).items():
+        get_logger(name).set_rate_limit(limit.get('rate'), limit.get('burst'))
+    for name, rate in (sampling or {}).items():
+        get_logger(name).set_sample_rate(rate)
+
+
+def debug(message: str, *args, **kwargs) -> None:
     """
     全局调试日志函数
     """
-    global_logger.debug(message)
+    global_logger.debug(message, *args, **kwargs)
 
 
-def info(message: str) -> None:
+def info(message: str, *args, **kwargs) -> None:
     """
     全局信息日志函数
     """
-    global_logger.info(message)
+    global_logger.info(message, *args, **kwargs)
 
 
-def warning(message: str) -> None:
+def warning(message: str, *args, **kwargs) -> None:
     """
     全局警告日志函数
     """
-    global_logger.warning(message)
+    global_logger.warning(message, *args, **kwargs)
 
 
-def error(message: str, exc_info: bool = False) -> None:
+def error(message: str, *args, exc_info: bool = False, **kwargs) -> None:
     """
     全局错误日志函数
     """
-    global_logger.error(message, exc_info=exc_info)
+    global_logger.error(message, *args, exc_info=exc_info, **kwargs)
 
 
-def critical(message: str, exc_info: bool = False) -> None:
+def critical(message: str, *args, exc_info: bool = False, **kwargs) -> None:
     """
     全局严重错误日志函数
     """
-    global_logger.critical(message, exc_info=exc_info)
\ No newline at end of file
+    global_logger.critical(message, *args, exc_info=exc_info, **kwargs)
+
+
+# 兼容 src.utils 包导出的函数名
+log_debug = debug
+log_info = info
+log_warning = warning
+log_error = error
+log_critical = critical
@@ -0,0 +1,291 @@
+"""
+进程内指标注册表
+
+提供计数器、仪表盘和直方图三种指标，按标签值聚合在内存中，
+抓取时渲染为Prometheus文本格式。记录操作只涉及一次加锁和字典更新，
+可以放在请求热路径上。
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# 默认直方图桶上界（秒），覆盖毫秒级接口到数十秒的模型调用
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+class Metric:
+    """
+    指标基类
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str = "", labelnames: Sequence[str] = ()):
+        """
+        初始化指标
+
+        Args:
+            name: 指标名称
+            documentation: 指标说明
+            labelnames: 标签名称
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        self._function: Optional[Callable] = None
+
+    def set_function(self, function: Optional[Callable]) -> None:
+        """
+        设置抓取时调用的取值函数，用于导出由其他对象维护的统计值
+
+        Args:
+            function: 无标签时返回数值；有标签时返回 {标签值元组: 数值} 字典
+        """
+        self._function = function
+
+    def _samples(self):
+        """返回 (名称后缀, 标签文本, 值) 列表"""
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                # 取值失败时不输出样本，避免影响整个抓取
+                return []
+            if not self.labelnames:
+                return [("", "", result)]
+            items = sorted(result.items(), key=lambda item: tuple(map(str, item[0])))
+        else:
+            with self._lock:
+                items = sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+        return [("", _format_labels(self.labelnames, labels), value) for labels, value in items]
+
+    def render(self) -> str:
+        """
+        渲染为Prometheus文本格式
+
+        Returns:
+            str: 指标文本
+        """
+        lines = []
+        if self.documentation:
+            lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.type_name}")
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        """清空所有已记录的值"""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """
+    单调递增计数器
+    """
+
+    type_name = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        """
+        计数加一（或加指定值）
+
+        Args:
+            *labelvalues: 按标签名称顺序给出的标签值
+            amount: 增加的数量
+        """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues) -> float:
+        """获取指定标签的当前值"""
+        return self._values.get(labelvalues, 0)
+
+
+class Gauge(Metric):
+    """
+    可增可减的仪表盘
+    """
+
+    type_name = "gauge"
+
+    def set(self, value: float, *labelvalues) -> None:
+        """设置当前值"""
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        """增加当前值"""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1) -> None:
+        """减少当前值"""
+        self.inc(*labelvalues, amount=-amount)
+
+    def get(self, *labelvalues) -> float:
+        """获取指定标签的当前值"""
+        return self._values.get(labelvalues, 0)
+
+
+class Histogram(Metric):
+    """
+    分桶直方图，记录时只累加命中的单个桶，渲染时再计算累计值
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str = "", labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues) -> None:
+        """
+        记录一个观测值
+
+        Args:
+            value: 观测值
+            *labelvalues: 按标签名称顺序给出的标签值
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                # [各桶计数..., +Inf桶计数, 总和]
+                series = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def get_count(self, *labelvalues) -> int:
+        """获取指定标签的观测次数"""
+        series = self._values.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(
+                ((labels, list(series)) for labels, series in self._values.items()),
+                key=lambda item: tuple(map(str, item[0]))
+            )
+        samples = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                samples.append(("_bucket", _format_labels(self.labelnames, labels, le), cumulative))
+            label_text = _format_labels(self.labelnames, labels)
+            samples.append(("_count", label_text, cumulative))
+            samples.append(("_sum", label_text, series[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    指标注册表，同名指标只创建一次
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为 {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, documentation: str = "", labelnames: Sequence[str] = ()) -> Counter:
+        """获取或创建计数器"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str = "", labelnames: Sequence[str] = ()) -> Gauge:
+        """获取或创建仪表盘"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str = "", labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """获取或创建直方图"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        """按名称获取指标"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        渲染所有指标
+
+        Returns:
+            str: Prometheus文本格式的指标
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """
+    获取全局指标注册表
+
+    Returns:
+        MetricsRegistry: 注册表实例
+    """
+    return _registry
+
+
+# 缓存命中统计：按缓存名称记录命中/未命中次数，并导出命中率
+_cache_requests = _registry.counter(
+    "cache_requests_total", "缓存查询次数", ("cache", "result")
+)
+_cache_hit_ratio = _registry.gauge("cache_hit_ratio", "缓存命中率", ("cache",))
+
+
+def _compute_cache_hit_ratios() -> dict:
+    totals: Dict[str, list] = {}
+    for (cache, result), count in list(_cache_requests._values.items()):
+        entry = totals.setdefault(cache, [0, 0])
+        entry[0 if result == "hit" else 1] += count
+    return {(cache,): hits / (hits + misses) for cache, (hits, misses) in totals.items() if hits + misses}
+
+
+_cache_hit_ratio.set_function(_compute_cache_hit_ratios)
+
+
+def record_cache_access(cache: str, hit: bool) -> None:
+    """
+    记录一次缓存访问
+
+    Args:
+        cache: 缓存名称
+        hit: 是否命中
+    """
+    _cache_requests.inc(cache, "hit" if hit else "miss")
@@ -0,0 +1,165 @@
+"""
+JSON序列化层
+
+为HTTP响应和WebSocket帧提供统一的JSON编码入口。
+安装了 orjson 时优先使用 orjson，否则回退到标准库 json。
+"""
+
+import datetime
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """
+    处理标准编码器无法直接序列化的对象
+
+    Args:
+        obj: 待序列化对象
+
+    Returns:
+        可被JSON编码的对象
+    """
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    raise TypeError(f"类型 {type(obj).__name__} 无法序列化为JSON")
+
+
+class JSONSerializer:
+    """
+    JSON序列化器基类
+    """
+
+    name = "base"
+
+    def dumps(self, obj: Any) -> bytes:
+        """
+        将对象编码为UTF-8 JSON字节串
+
+        Args:
+            obj: 待序列化对象
+
+        Returns:
+            bytes: 编码后的字节串
+        """
+        raise NotImplementedError("子类必须实现dumps方法")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        解析JSON文本
+
+        Args:
+            data: JSON文本或字节串
+
+        Returns:
+            解析后的对象
+        """
+        raise NotImplementedError("子类必须实现loads方法")
+
+
+class StdlibJSONSerializer(JSONSerializer):
+    """
+    基于标准库 json 的序列化器
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        # 中文内容不做转义，可显著减小报告类响应体积
+        return json.dumps(
+            obj, ensure_ascii=False, separators=(",", ":"), default=_default
+        ).encode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    基于 orjson 的序列化器
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("未安装 orjson")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+
+# 可用序列化器
+SERIALIZERS = {
+    StdlibJSONSerializer.name: StdlibJSONSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+}
+
+_serializer: Optional[JSONSerializer] = None
+
+
+def get_serializer() -> JSONSerializer:
+    """
+    获取当前使用的序列化器，首次调用时自动选择
+
+    Returns:
+        JSONSerializer: 序列化器实例
+    """
+    global _serializer
+    if _serializer is None:
+        _serializer = OrjsonSerializer() if orjson is not None else StdlibJSONSerializer()
+    return _serializer
+
+
+def set_serializer(serializer: Union[str, JSONSerializer]) -> JSONSerializer:
+    """
+    设置全局序列化器
+
+    Args:
+        serializer: 序列化器名称（"json" 或 "orjson"）或实例
+
+    Returns:
+        JSONSerializer: 生效的序列化器实例
+    """
+    global _serializer
+    if isinstance(serializer, str):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"不支持的序列化器: {serializer}")
+        serializer = SERIALIZERS[serializer]()
+    _serializer = serializer
+    return _serializer
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    使用当前序列化器编码对象为字节串
+    """
+    return get_serializer().dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    """
+    使用当前序列化器编码对象为字符串（用于WebSocket文本帧）
+    """
+    return get_serializer().dumps(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    使用当前序列化器解析JSON
+    """
+    return get_serializer().loads(data)
@@ -0,0 +1,391 @@
+"""
+轻量级链路追踪
+
+记录工作流节点执行、条件评估、消息渲染和AI服务调用的耗时（span），
+保存在固定大小的环形缓冲区中，并可同时输出到多个导出器。
+未启用时 span() 返回共享的空实现，几乎没有额外开销。
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .serialization import dumps
+
+
+class Span:
+    """
+    一次被追踪操作的记录
+    """
+
+    __slots__ = ("name", "attributes", "start_time", "duration", "error")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value) -> None:
+        """
+        设置span属性
+
+        Args:
+            key: 属性名
+            value: 属性值
+        """
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        """
+        转换为字典
+
+        Returns:
+            dict: span数据
+        """
+        return {
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NullSpan:
+    """
+    追踪未启用时使用的空span，所有操作均为空操作
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    """
+    正在计时的span上下文
+    """
+
+    __slots__ = ("_tracer", "_span", "_start")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self._tracer = tracer
+        self._span = span
+        self._start = 0.0
+
+    def __enter__(self) -> Span:
+        self._start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._span.duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self._span.error = f"{exc_type.__name__}: {exc_value}"
+        self._tracer._record(self._span)
+        return False
+
+
+class SpanExporter:
+    """
+    span导出器基类
+    """
+
+    def export(self, span: Span) -> None:
+        """
+        导出一个已结束的span
+
+        Args:
+            span: span记录
+        """
+        raise NotImplementedError("子类必须实现export方法")
+
+    def shutdown(self) -> None:
+        """释放导出器资源"""
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    内存导出器，主要用于测试
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def get_spans(self, name: Optional[str] = None) -> List[Span]:
+        """
+        获取已导出的span
+
+        Args:
+            name: 仅返回指定名称的span，None表示全部
+
+        Returns:
+            list: span列表
+        """
+        with self._lock:
+            if name is None:
+                return list(self.spans)
+            return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        """清空已导出的span"""
+        with self._lock:
+            self.spans.clear()
+
+
+class JSONLFileSpanExporter(SpanExporter):
+    """
+    JSONL文件导出器，每个span写入一行JSON
+
+    写入经过文件缓冲，每累计 flush_every 个span或距上次刷新超过 flush_interval 秒
+    时刷新一批，关闭时刷新剩余内容。
+    """
+
+    def __init__(self, file_path: str, flush_every: int = 64, flush_interval: float = 1.0):
+        """
+        初始化JSONL文件导出器
+
+        Args:
+            file_path: 导出文件路径
+            flush_every: 每批刷新的span数
+            flush_interval: 两次刷新的最长间隔（秒）
+        """
+        file_dir = os.path.dirname(file_path)
+        if file_dir:
+            os.makedirs(file_dir, exist_ok=True)
+        self.file_path = file_path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._file = open(file_path, "ab")
+        self._lock = threading.Lock()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def export(self, span: Span) -> None:
+        line = dumps(span.to_dict()) + b"\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """将缓冲内容写入磁盘"""
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._file.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked()
+                self._file.close()
+
+
+class PrometheusSpanExporter(SpanExporter):
+    """
+    Prometheus文本格式导出器，按span名称和节点类型聚合耗时直方图
+    """
+
+    # 直方图桶上界（秒）
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+    def __init__(self, metric_name: str = "trace_span_duration_seconds"):
+        self.metric_name = metric_name
+        self._series: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        key = (span.name, str(span.attributes.get("node_type", "")))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [各桶计数..., 总次数, 总耗时, 错误次数]
+                series = self._series[key] = [0] * len(self.BUCKETS) + [0, 0.0, 0]
+            for index, bound in enumerate(self.BUCKETS):
+                if span.duration <= bound:
+                    series[index] += 1
+            series[-3] += 1
+            series[-2] += span.duration
+            if span.error:
+                series[-1] += 1
+
+    def render(self) -> str:
+        """
+        生成Prometheus文本格式的指标
+
+        Returns:
+            str: 指标文本
+        """
+        name = self.metric_name
+        lines = [f"# TYPE {name} histogram"]
+        errors = []
+        with self._lock:
+            for (span_name, node_type), series in sorted(self._series.items()):
+                labels = f'span="{span_name}",node_type="{node_type}"'
+                for index, bound in enumerate(self.BUCKETS):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {series[index]}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series[-3]}')
+                lines.append(f"{name}_count{{{labels}}} {series[-3]}")
+                lines.append(f"{name}_sum{{{labels}}} {series[-2]:.6f}")
+                errors.append(f"trace_span_errors_total{{{labels}}} {series[-1]}")
+        if errors:
+            lines.append("# TYPE trace_span_errors_total counter")
+            lines.extend(errors)
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """
+    追踪器，负责创建span并分发给环形缓冲区和导出器
+    """
+
+    def __init__(self, enabled: bool = False, buffer_size: int = 1000,
+                 exporters: Optional[List[SpanExporter]] = None):
+        """
+        初始化追踪器
+
+        Args:
+            enabled: 是否启用
+            buffer_size: 环形缓冲区大小
+            exporters: 导出器列表
+        """
+        self.enabled = enabled
+        self.buffer = deque(maxlen=buffer_size)
+        self.exporters: List[SpanExporter] = list(exporters or [])
+
+    def span(self, name: str, **attributes):
+        """
+        创建一个span上下文
+
+        用法::
+
+            with tracer.span("workflow.execute_node", node_id=node_id) as span:
+                span.set_attribute("next_node", next_node_id)
+
+        Args:
+            name: span名称
+            **attributes: 初始属性
+
+        Returns:
+            span上下文管理器，未启用时为空实现
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return _ActiveSpan(self, Span(name, attributes))
+
+    def _record(self, span: Span) -> None:
+        self.buffer.append(span)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception:
+                # 导出失败不能影响业务流程
+                pass
+
+    def add_exporter(self, exporter: SpanExporter) -> None:
+        """
+        添加导出器
+
+        Args:
+            exporter: span导出器
+        """
+        self.exporters.append(exporter)
+
+    def recent_spans(self, limit: Optional[int] = None) -> List[Span]:
+        """
+        获取环形缓冲区中最近的span
+
+        Args:
+            limit: 最多返回的数量，None表示全部
+
+        Returns:
+            list: span列表，按结束时间先后排列
+        """
+        spans = list(self.buffer)
+        return spans if limit is None else spans[-limit:]
+
+    def shutdown(self) -> None:
+        """关闭并移除所有导出器，之后可重新配置"""
+        exporters, self.exporters = self.exporters, []
+        for exporter in exporters:
+            exporter.shutdown()
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """
+    获取全局追踪器
+
+    Returns:
+        Tracer: 追踪器实例
+    """
+    return _tracer
+
+
+def configure_tracing(enabled: bool = False, buffer_size: Optional[int] = None,
+                      jsonl_file: Optional[str] = None, prometheus: bool = False) -> Tracer:
+    """
+    配置全局追踪器
+
+    Args:
+        enabled: 是否启用追踪
+        buffer_size: 环形缓冲区大小
+        jsonl_file: JSONL导出文件路径，None表示不导出到文件
+        prometheus: 是否启用Prometheus文本导出
+
+    Returns:
+        Tracer: 全局追踪器
+    """
+    _tracer.enabled = enabled
+    if buffer_size is not None:
+        _tracer.buffer = deque(_tracer.buffer, maxlen=buffer_size)
+    if jsonl_file and not any(
+        isinstance(exporter, JSONLFileSpanExporter) and exporter.file_path == jsonl_file
+        for exporter in _tracer.exporters
+    ):
+        _tracer.add_exporter(JSONLFileSpanExporter(jsonl_file))
+    if prometheus and get_prometheus_exporter() is None:
+        _tracer.add_exporter(PrometheusSpanExporter())
+    return _tracer
+
+
+def get_prometheus_exporter() -> Optional[PrometheusSpanExporter]:
+    """
+    获取全局追踪器上的Prometheus导出器
+
+    Returns:
+        PrometheusSpanExporter: 未配置时返回None
+    """
+    for exporter in _tracer.exporters:
+        if isinstance(exporter, PrometheusSpanExporter):
+            return exporter
+    return None
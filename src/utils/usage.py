@@ -0,0 +1,298 @@
+"""
+模型调用用量与费用统计
+
+每次模型调用记录提示/生成token数、耗时和估算费用，并按会话、接口、
+工作流节点和分析阶段聚合。调用所属的会话、接口等信息通过 contextvars
+传递，调用方只需在外层使用 usage_context() 标注即可，asyncio任务和
+asyncio.to_thread 中的调用会自动继承当前上下文。
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 当前调用的归属信息（template 为提示词模板版本，如 market@v1）
+_session_id: ContextVar[Optional[str]] = ContextVar("usage_session_id", default=None)
+_endpoint: ContextVar[Optional[str]] = ContextVar("usage_endpoint", default=None)
+_node: ContextVar[Optional[str]] = ContextVar("usage_node", default=None)
+_stage: ContextVar[Optional[str]] = ContextVar("usage_stage", default=None)
+_template: ContextVar[Optional[str]] = ContextVar("usage_template", default=None)
+
+_CONTEXT_VARS = {
+    "session_id": _session_id,
+    "endpoint": _endpoint,
+    "node": _node,
+    "stage": _stage,
+    "template": _template,
+}
+
+
+@contextmanager
+def usage_context(**labels):
+    """
+    标注其中发生的模型调用所属的会话、接口、节点或阶段
+
+    用法::
+
+        with usage_context(session_id=session_id, endpoint="/api/analyze"):
+            with usage_context(stage="market"):
+                ...
+
+    Args:
+        **labels: session_id、endpoint、node、stage、template 中的任意几项，
+            未给出的项沿用外层上下文
+    """
+    tokens = []
+    try:
+        for key, value in labels.items():
+            tokens.append((_CONTEXT_VARS[key], _CONTEXT_VARS[key].set(value)))
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_usage_labels() -> Dict[str, Optional[str]]:
+    """
+    获取当前上下文中的归属信息
+
+    Returns:
+        dict: session_id、endpoint、node、stage、template
+    """
+    return {key: var.get() for key, var in _CONTEXT_VARS.items()}
+
+
+def _new_bucket() -> dict:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "latency_seconds": 0.0,
+        "cost": 0.0,
+    }
+
+
+def _split(total: int, weights: Sequence[float]) -> List[int]:
+    # 按权重拆分整数，余数按小数部分从大到小分配，保证各份之和等于总数
+    weight_sum = sum(weights)
+    exact = [total * weight / weight_sum for weight in weights]
+    parts = [int(value) for value in exact]
+    for index in sorted(range(len(exact)), key=lambda i: parts[i] - exact[i])[:total - sum(parts)]:
+        parts[index] += 1
+    return parts
+
+
+def _add(bucket: dict, record: dict) -> None:
+    bucket["calls"] += 1
+    if record["error"]:
+        bucket["errors"] += 1
+    bucket["prompt_tokens"] += record["prompt_tokens"]
+    bucket["completion_tokens"] += record["completion_tokens"]
+    bucket["total_tokens"] += record["prompt_tokens"] + record["completion_tokens"]
+    bucket["latency_seconds"] += record["latency_seconds"]
+    bucket["cost"] += record["cost"]
+
+
+class UsageTracker:
+    """
+    用量聚合器
+    """
+
+    def __init__(self, pricing: Optional[dict] = None, max_session_calls: int = 200):
+        """
+        初始化用量聚合器
+
+        Args:
+            pricing: 模型单价，格式为 {模型名: {"prompt": 每千token价格, "completion": 每千token价格}}
+            max_session_calls: 每个会话保留的调用明细条数
+        """
+        self.pricing = pricing or {}
+        self.max_session_calls = max_session_calls
+        self.totals = _new_bucket()
+        self.by_endpoint: Dict[str, dict] = {}
+        self.by_node: Dict[str, dict] = {}
+        self.by_stage: Dict[str, dict] = {}
+        self.by_template: Dict[str, dict] = {}
+        self.by_model: Dict[str, dict] = {}
+        self.sessions: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def estimate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """
+        估算调用费用
+
+        Args:
+            model: 模型名称
+            prompt_tokens: 提示token数
+            completion_tokens: 生成token数
+
+        Returns:
+            float: 费用，未配置单价时为0
+        """
+        price = self.pricing.get(model) or self.pricing.get("default")
+        if not price:
+            return 0.0
+        return (prompt_tokens * price.get("prompt", 0.0)
+                + completion_tokens * price.get("completion", 0.0)) / 1000
+
+    def record(self, model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               latency_seconds: float = 0.0, error: bool = False, service: Optional[str] = None) -> dict:
+        """
+        记录一次模型调用，归属信息取自当前上下文
+
+        Args:
+            model: 模型名称
+            prompt_tokens: 提示token数
+            completion_tokens: 生成token数
+            latency_seconds: 调用耗时（秒）
+            error: 调用是否失败
+            service: 发起调用的服务名称
+
+        Returns:
+            dict: 调用记录
+        """
+        labels = current_usage_labels()
+        record = {
+            "model": model,
+            "service": service,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_seconds": latency_seconds,
+            "cost": self.estimate_cost(model, prompt_tokens, completion_tokens),
+            "error": error,
+            **labels,
+        }
+        with self._lock:
+            _add(self.totals, record)
+            _add(self.by_model.setdefault(model, _new_bucket()), record)
+            for key, groups in (("endpoint", self.by_endpoint), ("node", self.by_node),
+                                ("stage", self.by_stage), ("template", self.by_template)):
+                if labels[key]:
+                    _add(groups.setdefault(labels[key], _new_bucket()), record)
+            session_id = labels["session_id"]
+            if session_id:
+                session = self.sessions.get(session_id)
+                if session is None:
+                    session = self.sessions[session_id] = {**_new_bucket(), "by_stage": {}, "calls_detail": []}
+                _add(session, record)
+                if labels["stage"]:
+                    _add(session["by_stage"].setdefault(labels["stage"], _new_bucket()), record)
+                if len(session["calls_detail"]) < self.max_session_calls:
+                    session["calls_detail"].append(record)
+        return record
+
+    def record_shared(self, shares: Sequence[Tuple[Context, float]], model: str, prompt_tokens: int = 0,
+                      completion_tokens: int = 0, latency_seconds: float = 0.0, error: bool = False,
+                      service: Optional[str] = None) -> List[dict]:
+        """
+        把一次合并调用（如微批处理）的用量按权重拆分，分别记入各任务的上下文
+
+        Args:
+            shares: [(任务上下文, 权重), ...]
+            model: 模型名称
+            prompt_tokens: 合并调用的提示token数
+            completion_tokens: 合并调用的生成token数
+            latency_seconds: 合并调用耗时（秒）
+            error: 调用是否失败
+            service: 发起调用的服务名称
+
+        Returns:
+            list: 各任务的调用记录
+        """
+        weights = [weight for _, weight in shares]
+        if sum(weights) <= 0:
+            weights = [1] * len(shares)
+        weight_sum = sum(weights)
+        prompt_parts = _split(prompt_tokens, weights)
+        completion_parts = _split(completion_tokens, weights)
+        return [
+            context.run(self.record, model, prompt_part, completion_part,
+                        latency_seconds * weight / weight_sum, error=error, service=service)
+            for (context, _), weight, prompt_part, completion_part
+            in zip(shares, weights, prompt_parts, completion_parts)
+        ]
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        """
+        获取会话的用量汇总
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            dict: 用量汇总，会话没有调用记录时返回None
+        """
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            return {
+                **session,
+                "by_stage": {stage: dict(bucket) for stage, bucket in session["by_stage"].items()},
+                "calls_detail": list(session["calls_detail"]),
+            }
+
+    def pop_session(self, session_id: str) -> Optional[dict]:
+        """
+        取出并移除会话的用量汇总，用于会话结束时随结果持久化
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            dict: 用量汇总，会话没有调用记录时返回None
+        """
+        with self._lock:
+            return self.sessions.pop(session_id, None)
+
+    def summary(self) -> dict:
+        """
+        获取全局用量汇总
+
+        Returns:
+            dict: 总计以及按接口、节点、阶段、模板版本、模型的分组汇总
+        """
+        with self._lock:
+            return {
+                "totals": dict(self.totals),
+                "by_endpoint": {key: dict(value) for key, value in self.by_endpoint.items()},
+                "by_node": {key: dict(value) for key, value in self.by_node.items()},
+                "by_stage": {key: dict(value) for key, value in self.by_stage.items()},
+                "by_template": {key: dict(value) for key, value in self.by_template.items()},
+                "by_model": {key: dict(value) for key, value in self.by_model.items()},
+                "active_sessions": len(self.sessions),
+            }
+
+
+_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """
+    获取全局用量聚合器
+
+    Returns:
+        UsageTracker: 聚合器实例
+    """
+    return _tracker
+
+
+def configure_usage(pricing: Optional[dict] = None, max_session_calls: Optional[int] = None) -> UsageTracker:
+    """
+    配置全局用量聚合器
+
+    Args:
+        pricing: 模型单价
+        max_session_calls: 每个会话保留的调用明细条数
+
+    Returns:
+        UsageTracker: 全局聚合器
+    """
+    if pricing is not None:
+        _tracker.pricing = pricing
+    if max_session_calls is not None:
+        _tracker.max_session_calls = max_session_calls
+    return _tracker